@@ -1,88 +1,541 @@
 import os
 import numpy as np
 import json
+import threading
+import importlib.util
+from collections import OrderedDict
+from model_store import ModelStore, ChecksumError, resolve_model_path
+
+# Model files produced by download_model.py, selected by the "model_variant" setting
+MODEL_VARIANTS = {
+    "fp32": "model.onnx",
+    "int8": "model.int8.onnx",
+}
+
+# Zero-shot hypotheses paired with each window title; the label whose hypothesis is most entailed wins
+HYPOTHESES = {
+    "focused": "This activity is studying or productive work.",
+    "distracted": "This activity is entertainment, games or social media.",
+    "searching": "This activity is searching for information.",
+}
+
+# Entailment logit index of cross-encoder/nli-distilroberta-base, used when the export has no config.json
+DEFAULT_ENTAILMENT_INDEX = 1
+
+# Sentence encoder used by the "prototype" mode, exported by download_model.download_embedder()
+EMBEDDER_MODEL_PATH = "model/embedder/model.onnx"
+EMBEDDER_TOKENIZER_PATH = "model/embedder/tokenizer.json"
+
+# Example titles the prototypes start from; user-labelled examples are added on top
+SEED_EXAMPLES = {
+    "focused": [
+        "main.py - project - Visual Studio Code", "Lecture 5 Linear Algebra - Canvas",
+        "Chapter 3 Notes - Google Docs", "Homework 2.pdf - Preview", "Terminal - zsh",
+        "Introduction to Calculus - Khan Academy", "Quizlet - Biology Flashcards", "Overleaf - thesis.tex",
+    ],
+    "distracted": [
+        "Funny Cat Videos - YouTube", "Netflix", "Home / X", "r/memes - Reddit",
+        "Instagram", "Twitch - Live Stream", "Steam - Store", "TikTok - Make Your Day",
+    ],
+    "searching": [
+        "how to solve quadratic equations - Google Search", "python list comprehension - Stack Overflow",
+        "Photosynthesis - Wikipedia", "what is a derivative - Bing", "numpy reshape - Google Search",
+        "DuckDuckGo - define entropy",
+    ],
+}
+
+class PrototypeIndex:
+    """
+    Per-label prototype vectors: the normalized mean of each label's example
+    embeddings. Per-label sums and counts are kept on disk, so new examples
+    fold in without re-embedding the old ones.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.labels = []
+        self.sums = None     # (labels, dim) sum of normalized example embeddings
+        self.counts = None   # (labels,) examples per label
+        self.matrix = None   # (labels, dim) normalized prototypes
+        self.lock = threading.Lock()
+
+    @property
+    def dim(self):
+        return 0 if self.sums is None else self.sums.shape[1]
+
+    def load(self):
+        """Load the index from path. Returns False if there is nothing (valid) to load."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                labels, sums, counts = [str(l) for l in data["labels"]], data["sums"], data["counts"]
+        except Exception as e:
+            print(f"⚠️ Could not read prototype index {self.path}: {e}")
+            return False
+        with self.lock:
+            self.labels, self.sums, self.counts = labels, sums.astype(np.float32), counts.astype(np.int64)
+            self._refresh()
+        return True
+
+    def save(self):
+        if not self.path or self.sums is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with self.lock:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, labels=np.array(self.labels), sums=self.sums, counts=self.counts)
+        os.replace(tmp_path, self.path)
+
+    def add(self, label, embeddings):
+        """Fold normalized embeddings (n, dim) into label's prototype, creating the label if needed"""
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        with self.lock:
+            if self.sums is None:
+                self.sums = np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+                self.counts = np.zeros(0, dtype=np.int64)
+            if embeddings.shape[1] != self.sums.shape[1]:
+                raise ValueError(f"Embedding size {embeddings.shape[1]} does not match index size {self.sums.shape[1]}")
+            if label not in self.labels:
+                self.labels.append(label)
+                self.sums = np.vstack([self.sums, np.zeros((1, self.sums.shape[1]), dtype=np.float32)])
+                self.counts = np.append(self.counts, 0)
+            row = self.labels.index(label)
+            self.sums[row] += embeddings.sum(axis=0)
+            self.counts[row] += len(embeddings)
+            self._refresh()
+
+    def scores(self, embeddings):
+        """Cosine similarity of normalized embeddings (n, dim) to every prototype: (n, labels)"""
+        with self.lock:
+            return np.atleast_2d(embeddings) @ self.matrix.T
+
+    def _refresh(self):
+        norms = np.linalg.norm(self.sums, axis=1, keepdims=True)
+        self.matrix = self.sums / np.maximum(norms, 1e-12)
+
 
 class AIInferenceEngine:
-    def __init__(self, model_path="model/model.onnx", tokenizer_path="model/tokenizer.json"):
+    def __init__(self, model_path="model/model.onnx", tokenizer_path="model/tokenizer.json",
+                 max_length=64, intra_op_threads=None, inter_op_threads=1,
+                 graph_optimization="all", warmup=True, variant=None, hypotheses=None,
+                 mode="zero_shot", prototypes_path=None, embedding_cache_size=2048, prototype_scale=20.0,
+                 lazy=False, auto_download=False, cache_optimized=True):
+        # Relative paths are resolved against the application directory, not the working directory
+        model_path, tokenizer_path = resolve_model_path(model_path), resolve_model_path(tokenizer_path)
+        if variant is not None:
+            model_path = os.path.join(os.path.dirname(model_path), MODEL_VARIANTS.get(variant, MODEL_VARIANTS["fp32"]))
+        self.variant = variant or "fp32"
         self.model_path = model_path
         self.tokenizer_path = tokenizer_path
+        self.store = ModelStore(os.path.dirname(model_path))
+        self.auto_download = auto_download  # Otherwise a missing model leaves the app in rule-only mode
+        self.cache_optimized = cache_optimized  # Reuse the optimized graph saved on first load
         self.session = None
+        self.load_lock = threading.Lock()
         self.tokenizer = None
-        self.labels = ["focused", "distracted", "searching"]
+        self.hypotheses = dict(hypotheses or HYPOTHESES)
+        self.labels = list(self.hypotheses)
         self.enabled = False
-        
-        self._load_model()
+
+        # Zero-shot NLI: one (title, hypothesis) row per label, scored by its entailment logit.
+        # A model whose config.json has task labels instead is read as a plain classifier.
+        self.zero_shot = True
+        self.entailment_index = DEFAULT_ENTAILMENT_INDEX
+        self.hypothesis_rows = {}  # label -> (prefix_ids, prefix_types, premise_type, suffix_ids, suffix_types)
+
+        # Prototype mode: a sentence encoder embeds the title, which is compared with one
+        # normalized vector per label - a single matrix-vector product per title
+        self.mode = mode  # "zero_shot" or "prototype"
+        self.prototypes = PrototypeIndex(prototypes_path or os.path.join(os.path.dirname(model_path), "prototypes.npz"))
+        self.prototype_scale = prototype_scale  # Cosine similarities are sharpened by this before the softmax
+        self.embedding_cache = OrderedDict()  # text -> normalized embedding
+        self.embedding_cache_size = embedding_cache_size
+        self.embedding_lock = threading.Lock()
+
+        # Inference tuning
+        self.max_length = max_length  # Rows (title + hypothesis) are truncated to this many tokens
+        self.intra_op_threads = intra_op_threads or max(1, min(4, (os.cpu_count() or 2) // 2))
+        self.inter_op_threads = inter_op_threads
+        self.graph_optimization = graph_optimization  # "disable", "basic", "extended" or "all"
+        self.warmup = warmup
+        self.input_names = []
+        self.pad_id = 0
+
+        if lazy:
+            # Defer the session until the first classification the rules can't answer
+            self.enabled = self._available()
+        else:
+            self._load_model()
+
+    @classmethod
+    def from_config(cls, ai_config, **overrides):
+        """Build an engine from ai_config.json settings"""
+        options = {
+            'variant': ai_config.get('model_variant', 'fp32'),
+            'max_length': ai_config.get('max_length', 64),
+            'intra_op_threads': ai_config.get('intra_op_threads'),
+            'mode': ai_config.get('mode', 'zero_shot'),
+            'auto_download': ai_config.get('auto_download', False),
+        }
+        if options['mode'] == 'prototype':
+            options.update(model_path=EMBEDDER_MODEL_PATH, tokenizer_path=EMBEDDER_TOKENIZER_PATH)
+        options.update(overrides)
+        return cls(**options)
+
+    def _available(self):
+        """Cheap check that the dependencies and model files are present, without loading anything"""
+        if not all(importlib.util.find_spec(m) for m in ("onnxruntime", "tokenizers")):
+            print("⚠️ AI dependencies (onnxruntime, tokenizers) not installed. Running in Rule-Only mode.")
+            return False
+        model_name = os.path.basename(self.model_path)
+        fp32_name = MODEL_VARIANTS["fp32"]
+        if self.auto_download or (self.store.has(model_name) or self.store.has(fp32_name)) and os.path.exists(self.tokenizer_path):
+            return True
+        print(f"⚠️ AI Model not found at {self.model_path}. Run `python download_model.py` to enable AI classification.")
+        return False
+
+    def _ensure_loaded(self):
+        if self.session is None and self.enabled:
+            with self.load_lock:
+                if self.session is None:
+                    self._load_model()
+
+    def load(self):
+        """Load the session now. Returns True if the engine is usable."""
+        self._ensure_loaded()
+        return self.session is not None
+
+    def unload(self):
+        """Release the session; the next prediction loads it again"""
+        with self.load_lock:
+            self.session = None
 
     def _load_model(self):
         try:
             import onnxruntime as ort
             from tokenizers import Tokenizer
-            
-            if not os.path.exists(self.model_path) or not os.path.exists(self.tokenizer_path):
+
+            if self.variant != "fp32" and not self.store.has(os.path.basename(self.model_path)):
+                self._build_variant()
+
+            if not self.store.has(os.path.basename(self.model_path)) or not os.path.exists(self.tokenizer_path):
+                if not self.auto_download:
+                    print(f"⚠️ AI Model not found at {self.model_path}. Run `python download_model.py` to enable AI classification.")
+                    self.enabled = False
+                    return
                 print(f"⚠️ AI Model not found at {self.model_path}. Attempting automatic download...")
                 try:
                     import download_model
-                    download_model.download_model()
+                    if self.mode == "prototype":
+                        download_model.download_embedder()
+                    else:
+                        download_model.download_model()
+                    self.store = ModelStore(self.store.root)
                 except Exception as e:
                     print(f"❌ Failed to auto-download model: {e}")
+                    self.enabled = False
                     return
 
-            self.session = ort.InferenceSession(self.model_path)
-            self.tokenizer = Tokenizer.from_file(self.tokenizer_path)
+            self.session = self._create_session(ort)
+            # Resolved once instead of calling get_inputs() on every prediction
+            self.input_names = [i.name for i in self.session.get_inputs()]
+
+            tokenizer_file = self.tokenizer_path
+            if os.path.dirname(self.tokenizer_path) == self.store.root:
+                tokenizer_file = self.store.get(os.path.basename(self.tokenizer_path))
+            self.tokenizer = Tokenizer.from_file(tokenizer_file)
+            self.tokenizer.no_padding()  # Batches are padded to their own longest sequence
+            self.pad_id = self._find_pad_id()
+            if self.mode == "prototype":
+                self.zero_shot = False
+                self.tokenizer.enable_truncation(max_length=self.max_length)
+                self._load_prototypes()
+            else:
+                self._load_label_config()
+                if self.zero_shot:
+                    self.tokenizer.no_truncation()  # Titles are truncated around the cached hypothesis tokens
+                    self._cache_hypotheses()
+                else:
+                    self.tokenizer.enable_truncation(max_length=self.max_length)
             self.enabled = True
-            print("✅ AI Inference Engine loaded successfully")
-            
+
+            if self.warmup:
+                # First run allocates buffers and finalizes kernels; do it now rather than on the first live tick
+                self.predict_batch(["warm up"])
+            print(f"✅ AI Inference Engine loaded successfully ({self.mode}, {self.variant})")
+
         except ImportError:
             print("⚠️ AI dependencies (onnxruntime, tokenizers) not installed. Running in Rule-Only mode.")
+            self.enabled = False
+        except ChecksumError as e:
+            print(f"❌ AI model failed verification ({e}). Run `python download_model.py` to restore it.")
+            self.session = None
+            self.enabled = False
         except Exception as e:
             print(f"❌ Error loading AI model: {e}")
+            self.session = None
+            self.enabled = False
+
+    def _create_session(self, ort):
+        """
+        Open the verified model from the store. The first load saves the
+        optimized graph; later loads reuse it with optimization switched off.
+        """
+        name = os.path.basename(self.model_path)
+        model_file = self.store.get(name)
+        providers = ["CPUExecutionProvider"]
+        if not self.cache_optimized:
+            return ort.InferenceSession(model_file, sess_options=self._session_options(ort), providers=providers)
+
+        cached = self.store.optimized_path(name, f"ort{ort.__version__}-{self.graph_optimization}")
+        if os.path.exists(cached):
+            options = self._session_options(ort)
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            try:
+                return ort.InferenceSession(cached, sess_options=options, providers=providers)
+            except Exception as e:
+                print(f"⚠️ Discarding unreadable optimized model cache: {e}")
+                os.remove(cached)
+
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        options = self._session_options(ort)
+        tmp_path = cached + ".tmp.onnx"
+        options.optimized_model_filepath = tmp_path
+        session = ort.InferenceSession(model_file, sess_options=options, providers=providers)
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, cached)
+        return session
+
+    def _build_variant(self):
+        """Derive a missing quantized model from the fp32 export, or fall back to fp32"""
+        model_dir = os.path.dirname(self.model_path)
+        fp32_path = os.path.join(model_dir, MODEL_VARIANTS["fp32"])
+        if self.store.has(MODEL_VARIANTS["fp32"]):
+            try:
+                import download_model
+                name = os.path.basename(self.model_path)
+                if download_model.quantize_model(model_dir, MODEL_VARIANTS["fp32"], name):
+                    self.store.add(name)
+                    return
+            except Exception as e:
+                print(f"❌ Failed to build {self.variant} model: {e}")
+        print(f"⚠️ {self.variant} model unavailable, using fp32")
+        self.model_path = fp32_path
+        self.variant = "fp32"
+
+    def _session_options(self, ort):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }.get(self.graph_optimization, ort.GraphOptimizationLevel.ORT_ENABLE_ALL)
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        return options
+
+    def _load_label_config(self):
+        """Read id2label from the exported config.json to find the entailment logit"""
+        config_path = self.store.get("config.json")
+        if config_path is None:
+            return
+        with open(config_path, 'r') as f:
+            id2label = json.load(f).get("id2label", {})
+        names = {int(i): str(name).lower() for i, name in id2label.items()}
+        entailment = [i for i, name in names.items() if name == "entailment"]
+        if entailment:
+            self.entailment_index = entailment[0]
+        elif names:
+            # Fine-tuned classifier: its outputs are the task labels themselves
+            self.zero_shot = False
+            self.labels = [names[i] for i in sorted(names)]
+
+    def _cache_hypotheses(self):
+        """
+        Tokenize each hypothesis once. Encoding a placeholder premise as a pair
+        yields the model's own special-token layout; everything before the
+        premise is the prefix, everything after it (separators + hypothesis) the suffix.
+        """
+        self.hypothesis_rows = {}
+        for label, hypothesis in self.hypotheses.items():
+            encoding = self.tokenizer.encode("x", hypothesis)
+            premise = [i for i, seq in enumerate(encoding.sequence_ids) if seq == 0]
+            start, end = premise[0], premise[-1] + 1
+            self.hypothesis_rows[label] = (
+                encoding.ids[:start], encoding.type_ids[:start], encoding.type_ids[start],
+                encoding.ids[end:], encoding.type_ids[end:]
+            )
+
+    def _load_prototypes(self):
+        """Load the prototype index, or build it from SEED_EXAMPLES when missing or made by another encoder"""
+        dim = self._embed(["dimension probe"]).shape[1]
+        if self.prototypes.load() and self.prototypes.dim == dim:
+            self.labels = self.prototypes.labels
+            return
+        print("🔄 Building prototype index from seed examples...")
+        self.prototypes = PrototypeIndex(self.prototypes.path)
+        for label, examples in SEED_EXAMPLES.items():
+            self.prototypes.add(label, self._embed(examples))
+        self.prototypes.save()
+        self.labels = self.prototypes.labels
+
+    def add_example(self, label, text):
+        """
+        Fold a user-labelled title into the label's prototype and persist it.
+        No model re-export is needed; the label is created if it is new.
+        """
+        if self.mode != "prototype":
+            return False
+        self._ensure_loaded()
+        if not self.enabled:
+            return False
+        self.prototypes.add(label, self._cached_embeddings([text]))
+        self.prototypes.save()
+        self.labels = self.prototypes.labels
+        return True
+
+    def _find_pad_id(self):
+        for token in ("<pad>", "[PAD]"):
+            token_id = self.tokenizer.token_to_id(token)
+            if token_id is not None:
+                return token_id
+        return 0
 
     def predict(self, text):
         """
         Predict focus state from text.
         Returns: (state, confidence)
         """
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts, batch_size=32):
+        """
+        Predict focus states for many texts.
+        In zero-shot mode each text expands to one row per label; all rows of
+        a batch go through the model in a single padded call. Texts are sorted
+        by token length so short titles don't pay for long ones.
+        Returns: list of (state, confidence) in input order
+        """
+        self._ensure_loaded()
         if not self.enabled:
-            return "unknown", 0.0
+            return [("unknown", 0.0)] * len(texts)
+        if self.mode == "prototype":
+            return self._predict_prototypes(texts, batch_size)
 
         try:
-            # Tokenize
-            encoded = self.tokenizer.encode(text)
-            input_ids = np.array([encoded.ids], dtype=np.int64)
-            attention_mask = np.array([encoded.attention_mask], dtype=np.int64)
-            
-            # Run Inference
-            inputs = {
-                self.session.get_inputs()[0].name: input_ids,
-                self.session.get_inputs()[1].name: attention_mask
-            }
-            logits = self.session.run(None, inputs)[0]
-            
-            # Softmax
-            probs = self._softmax(logits[0])
-            pred_idx = np.argmax(probs)
-            confidence = float(probs[pred_idx])
-            
-            # Map index to label (assuming model was trained with these labels)
-            # Note: You might need to adjust this mapping based on your specific model training
-            # For a general zero-shot or similarity model, logic would be different.
-            # Here we assume a custom trained classification head.
-            # If using raw embeddings (MiniLM), we would calculate cosine similarity to reference vectors.
-            
-            # SIMPLIFIED LOGIC for "Zero-Shot" using Embeddings (MiniLM style)
-            # Since we are using a raw transformer, we likely get embeddings, not logits.
-            # Let's assume we are using a sequence classification model for simplicity.
-            # If using raw MiniLM, we would need to compare embeddings.
-            
-            # For this implementation, let's assume the model outputs 3 logits: [focused, distracted, searching]
-            label = self.labels[pred_idx] if pred_idx < len(self.labels) else "unknown"
-            
-            return label, confidence
+            encodings = self.tokenizer.encode_batch(list(texts), add_special_tokens=not self.zero_shot)
+            premises = [e.ids for e in encodings]
+            order = sorted(range(len(premises)), key=lambda i: len(premises[i]))
+            results = [None] * len(premises)
+
+            for start in range(0, len(order), batch_size):
+                chunk = order[start:start + batch_size]
+                if self.zero_shot:
+                    scores = self._entailment_scores([premises[i] for i in chunk])
+                else:
+                    scores = self._run([(premises[i], encodings[i].type_ids) for i in chunk])
+
+                # Softmax across labels
+                probs = self._softmax(scores)
+                pred_idx = np.argmax(probs, axis=-1)
+
+                for row, i in enumerate(chunk):
+                    idx = int(pred_idx[row])
+                    label = self.labels[idx] if idx < len(self.labels) else "unknown"
+                    results[i] = (label, float(probs[row, idx]))
+
+            return results
 
         except Exception as e:
             print(f"AI Prediction Error: {e}")
-            return "unknown", 0.0
+            return [("unknown", 0.0)] * len(texts)
+
+    def _entailment_scores(self, premises):
+        """Run every (premise, hypothesis) pair in one call; returns entailment logits shaped (texts, labels)"""
+        rows = []
+        for premise in premises:
+            for label in self.labels:
+                prefix_ids, prefix_types, premise_type, suffix_ids, suffix_types = self.hypothesis_rows[label]
+                ids = premise[:max(1, self.max_length - len(prefix_ids) - len(suffix_ids))]
+                rows.append((prefix_ids + ids + suffix_ids, prefix_types + [premise_type] * len(ids) + suffix_types))
+        logits = self._run(rows)
+        return logits[:, self.entailment_index].reshape(len(premises), len(self.labels))
+
+    def _predict_prototypes(self, texts, batch_size=32):
+        """Cosine similarity of each (cached) title embedding to the label prototypes"""
+        try:
+            embeddings = self._cached_embeddings(texts, batch_size)
+            probs = self._softmax(self.prototypes.scores(embeddings) * self.prototype_scale)
+            pred_idx = np.argmax(probs, axis=-1)
+            labels = self.prototypes.labels
+            return [(labels[idx], float(probs[row, idx])) for row, idx in enumerate(pred_idx)]
+        except Exception as e:
+            print(f"AI Prediction Error: {e}")
+            return [("unknown", 0.0)] * len(texts)
+
+    def _cached_embeddings(self, texts, batch_size=32):
+        """Embeddings for texts, computing only the ones not seen recently"""
+        with self.embedding_lock:
+            cached = {text: self.embedding_cache.get(text) for text in texts}
+        missing = list(dict.fromkeys(text for text, vector in cached.items() if vector is None))
+
+        for start in range(0, len(missing), batch_size):
+            chunk = missing[start:start + batch_size]
+            vectors = self._embed(chunk)
+            with self.embedding_lock:
+                for text, vector in zip(chunk, vectors):
+                    cached[text] = vector
+                    self.embedding_cache[text] = vector
+                while len(self.embedding_cache) > self.embedding_cache_size:
+                    self.embedding_cache.popitem(last=False)
+
+        with self.embedding_lock:
+            for text in texts:
+                if text in self.embedding_cache:
+                    self.embedding_cache.move_to_end(text)
+        return np.stack([cached[text] for text in texts])
+
+    def _embed(self, texts):
+        """Mean-pooled, L2-normalized sentence embeddings shaped (texts, dim)"""
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids, attention_mask, token_type_ids = self._pad([(e.ids, e.type_ids) for e in encodings])
+        output = self._forward(input_ids, attention_mask, token_type_ids)
+        if output.ndim == 3:
+            # Token embeddings: average over real (unpadded) tokens
+            mask = attention_mask[..., None].astype(output.dtype)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return (output / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def _run(self, rows):
+        """Pad (ids, type_ids) rows to their longest length and run the session"""
+        return self._forward(*self._pad(rows))
+
+    def _pad(self, rows):
+        """Stack (ids, type_ids) rows into padded input_ids, attention_mask and token_type_ids"""
+        length = max(1, max(len(ids) for ids, _ in rows))
+        input_ids = np.full((len(rows), length), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(rows), length), dtype=np.int64)
+        token_type_ids = np.zeros((len(rows), length), dtype=np.int64)
+        for row, (ids, type_ids) in enumerate(rows):
+            n = len(ids)
+            input_ids[row, :n] = ids
+            attention_mask[row, :n] = 1
+            token_type_ids[row, :n] = type_ids
+        return input_ids, attention_mask, token_type_ids
+
+    def _forward(self, input_ids, attention_mask, token_type_ids):
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask, "token_type_ids": token_type_ids}
+        inputs = {name: feeds[name] for name in self.input_names if name in feeds}
+        if len(inputs) < len(self.input_names):
+            # Unrecognized names: fall back to positional ids/mask as exported by download_model
+            inputs = {self.input_names[0]: input_ids, self.input_names[1]: attention_mask}
+        return self.session.run(None, inputs)[0]
 
     def _softmax(self, x):
-        e_x = np.exp(x - np.max(x))
-        return e_x / e_x.sum()
+        e_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+        return e_x / e_x.sum(axis=-1, keepdims=True)
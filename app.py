@@ -4,6 +4,11 @@ from gamification import GamificationEngine
 from courses import CourseManager
 from session_history import SessionHistory
 from camera_detector import CameraDetector
+from camera_worker import ProcessCameraDetector
+from clip_recorder import ClipRecorder
+from model_manager import ModelManager
+from window_provider import OWN_APP_NAMES
+from state_stream import StateStream, HAS_MSGPACK
 from camera_integration import (
     calculate_attention_multiplier,
     PostureMonitor,
@@ -24,18 +29,58 @@ log.setLevel(logging.ERROR)
 
 app = Flask(__name__)
 
+# Load camera config
+try:
+    with open('camera_config.json', 'r') as f:
+        camera_config = json.load(f)
+except FileNotFoundError:
+    camera_config = {"enabled": False}
+
+# Load AI config
+try:
+    with open('ai_config.json', 'r') as f:
+        ai_config = json.load(f)
+except FileNotFoundError:
+    ai_config = {}
+
+# Heavyweight models load on first use and are unloaded when idle or over budget
+model_manager = ModelManager(
+    idle_timeout=ai_config.get('model_idle_seconds', 300),
+    memory_budget_mb=ai_config.get('model_memory_budget_mb')
+)
+model_manager.start()
+
 # Initialize Core Logic
-focus_detector = FocusDetector()
+focus_detector = FocusDetector(ai_config, model_manager=model_manager)
 game_engine = GamificationEngine()
 course_manager = CourseManager()
 session_history = SessionHistory()
-camera_detector = CameraDetector()
+if camera_config.get('worker_process', False):
+    # Run capture and inference in a child process (frames via shared memory)
+    camera_detector = ProcessCameraDetector(inference_socket=camera_config.get('inference_socket'))
+else:
+    camera_detector = CameraDetector(inference_socket=camera_config.get('inference_socket'),
+                                     model_manager=model_manager)
 
 # Initialize camera integration components
 posture_monitor = PostureMonitor(warning_interval_minutes=10)
 break_reminder = BreakReminder(break_interval_minutes=20)
 camera_analytics = CameraAnalytics()
 
+# Event-triggered clip capture (never in privacy mode)
+clip_recorder = None
+if camera_config.get('clip_capture_enabled', False) and not camera_config.get('privacy_mode', False):
+    clip_recorder = ClipRecorder(
+        camera_detector.get_clip_frame,
+        clip_dir=camera_config.get('clip_dir', 'clips'),
+        pre_roll_seconds=camera_config.get('clip_pre_roll_seconds', 10),
+        post_roll_seconds=camera_config.get('clip_post_roll_seconds', 5),
+        max_buffer_mb=camera_config.get('clip_max_buffer_mb', 8),
+        triggers=camera_config.get('clip_triggers', ['phone', 'low_attention']),
+        attention_threshold=camera_config.get('clip_attention_threshold', 40)
+    )
+    clip_recorder.start()
+
 # Global State
 current_state = {
     "app_name": "Ready",
@@ -77,20 +122,81 @@ current_state = {
         "raw_state": "unknown",
         "reason": "",
         "grace_period_active": False,
-        "grace_period_remaining": 0
+        "grace_period_remaining": 0,
+        "cache_hit_rate": 0,
+        "ai_deadline_misses": 0
     }
 }
 
+# Slow tier: only changes when a session starts or stops, not on every tick
+SLOW_FIELDS = ("courses", "total_sessions")
+
+# Everything the HUD overlay shows
+HUD_FIELDS = ("session_active", "session_mode", "session_time_formatted", "health",
+              "is_studying", "user_present", "camera_enabled")
+
+def refresh_slow_state():
+    """Re-read the course list and session count (after a session starts or stops)"""
+    current_state["courses"] = list(course_manager.get_courses())
+    current_state["total_sessions"] = session_history.get_total_sessions()
+
+refresh_slow_state()
+
+# Pushes changed state fields to the UI over Server-Sent Events (/api/stream)
+state_stream = StateStream()
+
+# current_state is written by update_loop, pushed window changes and session
+# handlers; each holds this lock while it applies its changes and publishes
+state_lock = threading.Lock()
+last_focus_sequence = 0  # Newest focus result shown, so a late push can't undo a newer tick
+session_generation = 0  # Bumped on session start/stop, so a tick spanning one drops its stale fields
+
+def on_focus_change(focus_result):
+    """Show a pushed window change right away; XP and health still update on the 1s tick"""
+    global last_focus_sequence
+    with state_lock:
+        if not game_engine.session_active or focus_result['sequence'] <= last_focus_sequence:
+            return
+        last_focus_sequence = focus_result['sequence']
+        app_name = focus_result['app_name']
+        current_state["app_name"] = app_name
+        current_state["window_title"] = focus_result['window_title']
+        current_state["is_studying"] = focus_result['state'] in ("focused", "searching") or app_name in ["FocusWin", "StudyWin"]
+        current_state["ai_debug_info"] = {
+            **current_state["ai_debug_info"],
+            "source": focus_result.get('source', 'Unknown'),
+            "confidence": int(focus_result.get('confidence', 0) * 100),
+            "raw_state": focus_result['state'],
+            "reason": focus_result['reason']
+        }
+        state_stream.publish('status', current_state)
+
+if ai_config.get('push_window_changes', True) and focus_detector.enable_push(
+        on_focus_change, active=lambda: game_engine.session_active):
+    print("✅ Window changes are pushed by the window provider")
+
 def update_loop():
     """Background thread to update game state every second"""
+    global last_focus_sequence
     while True:
         try:
+            # Work out the tick without the lock; pushes and session handlers only wait for the apply below
+            generation = session_generation
+            updates = {}
+            focus_updates = {}  # Fields a pushed window change also sets
+            focus_sequence = None
+            
             # Get camera status if enabled
             camera_status = camera_detector.get_status()
             user_present = True  # Default to present (assume user is there unless proven otherwise)
             attention_multiplier = 1.0  # Default multiplier
             
             if camera_status['enabled']:
+                # Use every detection since the last tick rather than the latest frame only
+                detection_window = camera_detector.consume_window()
+                if detection_window:
+                    camera_status = {**camera_status, **detection_window}
+                
                 # Only mark as away if camera explicitly detects absence
                 # If camera can't detect (low light, etc.), assume present
                 detected_present = camera_status.get('present')
@@ -110,29 +216,33 @@ def update_loop():
                     
                     # Check posture warnings
                     if posture_monitor.update(camera_status.get('good_posture', False)):
-                        current_state['posture_warning'] = True
+                        updates['posture_warning'] = True
                     else:
-                        current_state['posture_warning'] = False
+                        updates['posture_warning'] = False
                     
                     # Check break reminders
                     if break_reminder.check_break_needed():
-                        current_state['break_reminder'] = True
+                        updates['break_reminder'] = True
                     else:
-                        current_state['break_reminder'] = False
+                        updates['break_reminder'] = False
                     
-                    current_state['time_until_break'] = break_reminder.get_time_until_break()
+                    updates['time_until_break'] = break_reminder.get_time_until_break()
+                
+                # Save a clip if a configured trigger fired
+                if clip_recorder and game_engine.session_active:
+                    clip_recorder.check_triggers(camera_status)
                 
                 # Update camera state
-                current_state['camera_enabled'] = True
-                current_state['camera_present'] = user_present
-                current_state['camera_attention_score'] = attention_score
-                current_state['camera_attention_multiplier'] = round(attention_multiplier, 2)
-                current_state['camera_looking_at_screen'] = camera_status.get('looking_at_screen', False)
-                current_state['camera_good_posture'] = camera_status.get('good_posture', False)
-                current_state['camera_message'] = camera_status.get('message', '')
+                updates['camera_enabled'] = True
+                updates['camera_present'] = user_present
+                updates['camera_attention_score'] = attention_score
+                updates['camera_attention_multiplier'] = round(attention_multiplier, 2)
+                updates['camera_looking_at_screen'] = camera_status.get('looking_at_screen', False)
+                updates['camera_good_posture'] = camera_status.get('good_posture', False)
+                updates['camera_message'] = camera_status.get('message', '')
             else:
-                current_state['camera_enabled'] = False
-                current_state['camera_message'] = 'Camera disabled'
+                updates['camera_enabled'] = False
+                updates['camera_message'] = 'Camera disabled'
             
             # Only track window activity if session is active
             if game_engine.session_active:
@@ -141,7 +251,9 @@ def update_loop():
                 try:
                     # Fall back to window tracking (New AI System)
                     # 1. Get Focus State
+                    focus_detector.set_course(game_engine.current_course)
                     focus_result = focus_detector.get_focus_state()
+                    focus_sequence = focus_result.get('sequence')
                     
                     app_name = focus_result['app_name']
                     window_title = focus_result['window_title']
@@ -157,13 +269,16 @@ def update_loop():
                         if hasattr(focus_detector, 'grace_period_start') and focus_detector.grace_period_start:
                             grace_remaining = int(focus_detector.grace_period_duration - (time.time() - focus_detector.grace_period_start))
                     
-                    current_state["ai_debug_info"] = {
+                    focus_updates["ai_debug_info"] = {
                         "source": focus_result.get('source', 'Unknown'),
                         "confidence": int(focus_result.get('confidence', 0) * 100),
                         "raw_state": state,
                         "reason": reason,
                         "grace_period_active": getattr(focus_detector, 'in_grace_period', False),
-                        "grace_period_remaining": max(0, grace_remaining)
+                        "grace_period_remaining": max(0, grace_remaining),
+                        "cache_hit_rate": int(focus_detector.get_cache_stats()['hit_rate'] * 100),
+                        "verdict_reuse_rate": int(focus_detector.get_evaluation_stats()['reuse_rate'] * 100),
+                        "ai_deadline_misses": focus_detector.get_ai_stats()['deadline_misses']
                     }
                 except Exception as e:
                     print(f"❌ ERROR in focus detection: {e}")
@@ -202,10 +317,10 @@ def update_loop():
                     is_studying = True
                     
                     # Update global state so UI reflects current app
-                    current_state["app_name"] = app_name
-                    current_state["window_title"] = window_title
-                    current_state["is_studying"] = True
-                    current_state["user_present"] = user_present
+                    focus_updates["app_name"] = app_name
+                    focus_updates["window_title"] = window_title
+                    focus_updates["is_studying"] = True
+                    updates["user_present"] = user_present
                     
                     # IMPORTANT: Do NOT call game_engine.update()
                     # This prevents gaining XP/Health but also prevents losing it
@@ -227,20 +342,20 @@ def update_loop():
                     print("Health depleted! Session failed.")
                     session_data = game_engine.stop_session()
                     # Store results for frontend to retrieve
-                    current_state["auto_stop_results"] = session_data
+                    updates["auto_stop_results"] = session_data
                 
                 # 5. Check if challenge mode session is complete
                 if game_engine.is_session_complete():
                     print("Challenge mode session complete! Auto-stopping.")
                     session_data = game_engine.stop_session()
                     # Store results for frontend to retrieve
-                    current_state["auto_stop_results"] = session_data
+                    updates["auto_stop_results"] = session_data
                 
                 # 6. Update Global State
-                current_state["app_name"] = app_name
-                current_state["window_title"] = window_title
-                current_state["is_studying"] = is_studying
-                current_state["user_present"] = user_present # Add this line
+                focus_updates["app_name"] = app_name
+                focus_updates["window_title"] = window_title
+                focus_updates["is_studying"] = is_studying
+                updates["user_present"] = user_present # Add this line
                 
                 # 7. Voice Assistant Feedback
                 # Distracted if: Not studying OR (Camera enabled AND (Phone detected OR Low attention))
@@ -251,34 +366,45 @@ def update_loop():
                     elif camera_status.get('attention_score', 100) < 40:
                         is_distracted = True
                 
-                current_state["has_permissions"] = has_permissions
-                current_state["session_paused"] = game_engine.session_paused
+                updates["has_permissions"] = has_permissions
+                updates["session_paused"] = game_engine.session_paused
             else:
                 # No active session - set default values
-                current_state["app_name"] = "Ready"
-                current_state["window_title"] = "Waiting for session..."
-                current_state["is_studying"] = False
-                current_state["has_permissions"] = True
-                current_state["session_paused"] = False
+                focus_detector.set_course(None)
+                updates["app_name"] = "Ready"
+                updates["window_title"] = "Waiting for session..."
+                updates["is_studying"] = False
+                updates["has_permissions"] = True
+                updates["session_paused"] = False
+            
+            with state_lock:
+                # A session started or stopped while this tick ran: its fields are out of date
+                if generation == session_generation:
+                    current_state.update(updates)
+                    # A pushed window change newer than this tick's evaluation wins
+                    if focus_sequence is None or focus_sequence > last_focus_sequence:
+                        current_state.update(focus_updates)
+                        last_focus_sequence = max(last_focus_sequence, focus_sequence or 0)
+                
+                # Always update these regardless of session state
+                current_state["xp"] = game_engine.xp
+                current_state["level"] = game_engine.level
+                current_state["health"] = game_engine.health
+                current_state["time_formatted"] = game_engine.get_formatted_time()
+                current_state["session_time_formatted"] = game_engine.get_session_formatted_time()
             
-            # Always update these regardless of session state
-            current_state["xp"] = game_engine.xp
-            current_state["level"] = game_engine.level
-            current_state["health"] = game_engine.health
-            current_state["time_formatted"] = game_engine.get_formatted_time()
-            current_state["session_time_formatted"] = game_engine.get_session_formatted_time()
+                # Session state
+                current_state["session_active"] = game_engine.session_active
+                current_state["session_mode"] = game_engine.session_mode
+                current_state["challenge_duration"] = game_engine.challenge_duration
+                current_state["time_remaining"] = game_engine.get_session_time_remaining()
+                current_state["session_elapsed"] = game_engine.get_session_elapsed_time()
+                current_state["current_course"] = game_engine.current_course
+                current_state["current_streak"] = game_engine.current_streak
+                current_state["best_streak"] = game_engine.best_streak
             
-            # Session state
-            current_state["session_active"] = game_engine.session_active
-            current_state["session_mode"] = game_engine.session_mode
-            current_state["challenge_duration"] = game_engine.challenge_duration
-            current_state["time_remaining"] = game_engine.get_session_time_remaining()
-            current_state["session_elapsed"] = game_engine.get_session_elapsed_time()
-            current_state["current_course"] = game_engine.current_course
-            current_state["courses"] = course_manager.get_courses()
-            current_state["total_sessions"] = session_history.get_total_sessions()
-            current_state["current_streak"] = game_engine.current_streak
-            current_state["best_streak"] = game_engine.best_streak
+                state_stream.publish('status', current_state)
+                state_stream.publish('camera', camera_status)
             
         except Exception as e:
             print(f"Error in update loop: {e}")
@@ -293,6 +419,10 @@ def cleanup():
         camera_detector.stop()
     except Exception as e:
         print(f"Error stopping camera: {e}")
+    if clip_recorder:
+        clip_recorder.stop()
+    if focus_detector.course_stats is not None:
+        focus_detector.course_stats.save()
     print("✅ Cleanup complete")
     # Force exit to prevent hanging
     import sys
@@ -309,22 +439,69 @@ update_thread.start()
 def index():
     return render_template('index.html')
 
+def requested_fields(state):
+    """?fields=a,b selects fields; ?tier=fast|slow the per-tick or the session-level ones"""
+    if request.args.get('fields'):
+        return [field for field in request.args['fields'].split(',') if field]
+    tier = request.args.get('tier')
+    if tier == 'slow':
+        return SLOW_FIELDS
+    if tier == 'fast':
+        return [field for field in state if field not in SLOW_FIELDS]
+    return None
+
+def serve_snapshot(fields=None, allow_msgpack=False):
+    """
+    Latest published state, encoded once per version and projection. Supports
+    If-None-Match: an unchanged version is answered with 304.
+    """
+    snapshot = state_stream.snapshot('status')
+    if snapshot is None:
+        with state_lock:
+            state_stream.publish('status', current_state)
+        snapshot = state_stream.snapshot('status')
+    
+    encoding = 'json'
+    if allow_msgpack and HAS_MSGPACK:
+        best = request.accept_mimetypes.best_match(['application/json', 'application/msgpack', 'application/x-msgpack'])
+        if best and best != 'application/json':
+            encoding = 'msgpack'
+    response = Response(snapshot.encode(fields, encoding),
+                        mimetype='application/msgpack' if encoding == 'msgpack' else 'application/json')
+    response.set_etag(snapshot.etag if encoding == 'json' else f"{snapshot.etag}-{encoding}")
+    response.headers['Cache-Control'] = 'no-cache'
+    if allow_msgpack:
+        response.vary.add('Accept')
+    return response.make_conditional(request)
+
 @app.route('/api/status')
 def status():
-    # print(f"API STATUS - Active: {current_state.get('session_active')}, Health: {current_state.get('health')}")
-    
-    # Force sync critical session state from game engine to ensure UI is snappy
-    current_state["session_active"] = game_engine.session_active
-    current_state["session_mode"] = game_engine.session_mode
-    current_state["current_course"] = game_engine.current_course
-    current_state["time_remaining"] = game_engine.get_session_time_remaining()
-    current_state["session_elapsed"] = game_engine.get_session_elapsed_time()
-    
-    return jsonify(current_state)
+    """Tracking state; session start/stop publish immediately, so there is nothing to re-sync here"""
+    snapshot = state_stream.snapshot('status')
+    return serve_snapshot(requested_fields(snapshot.state if snapshot else current_state))
+
+@app.route('/api/hud')
+def hud_status():
+    """Only what the HUD shows; MessagePack when the client sends Accept: application/msgpack"""
+    return serve_snapshot(HUD_FIELDS, allow_msgpack=True)
+
+@app.route('/api/stream')
+def stream():
+    """
+    Server-Sent Events: a snapshot of each topic on connect, then only changed
+    fields. Topics: status (default), camera. ?fields=a,b limits the fields sent.
+    """
+    topics = request.args.get('topics', 'status').split(',')
+    fields = request.args.get('fields')
+    subscriber = state_stream.subscribe([topic for topic in topics if topic in ('status', 'camera')],
+                                        fields=[field for field in fields.split(',') if field] if fields else None)
+    return Response(state_stream.events(subscriber), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/session/start', methods=['POST'])
 def start_session():
     """Start a new study session"""
+    global session_generation
     try:
         data = request.get_json()
         mode = data.get('mode')
@@ -337,24 +514,28 @@ def start_session():
         if mode == 'challenge' and not duration:
             return jsonify({"error": "Duration required for challenge mode"}), 400
         
-        # Add course if provided
-        if course:
-            course_manager.add_course(course)
+        with state_lock:
+            session_generation += 1
+            # Add course if provided
+            if course:
+                course_manager.add_course(course)
+                refresh_slow_state()
         
-        # Reset camera analytics and monitors for new session
-        camera_analytics.reset()
-        posture_monitor.reset()
-        break_reminder.start_session()
+            # Reset camera analytics and monitors for new session
+            camera_analytics.reset()
+            posture_monitor.reset()
+            break_reminder.start_session()
         
-        # Start session with correct parameter order: mode, course, duration
-        game_engine.start_session(mode=mode, course=course, duration=duration)
+            # Start session with correct parameter order: mode, course, duration
+            game_engine.start_session(mode=mode, course=course, duration=duration)
         
-        # Immediately update global state to reflect active session
-        current_state["session_active"] = True
-        current_state["session_mode"] = mode
-        current_state["current_course"] = course
-        current_state["app_name"] = "Ready" # Reset app name
-        current_state["window_title"] = "Session Started"
+            # Immediately update global state to reflect active session
+            current_state["session_active"] = True
+            current_state["session_mode"] = mode
+            current_state["current_course"] = course
+            current_state["app_name"] = "Ready" # Reset app name
+            current_state["window_title"] = "Session Started"
+            state_stream.publish('status', current_state)
         
         return jsonify({"success": True, "mode": mode, "duration": duration, "course": course})
     except Exception as e:
@@ -363,28 +544,34 @@ def start_session():
 @app.route('/api/session/stop', methods=['POST'])
 def stop_session():
     """Stop the current session"""
+    global session_generation
     try:
-        # Clear any pending auto-stop results
-        current_state["auto_stop_results"] = None
+        with state_lock:
+            session_generation += 1
+            # Clear any pending auto-stop results
+            current_state["auto_stop_results"] = None
         
-        # Get session data before stopping
-        session_data = game_engine.stop_session()
+            # Get session data before stopping
+            session_data = game_engine.stop_session()
+            current_state["session_active"] = False
         
-        # Add camera analytics to session data if available
-        if session_data and camera_detector.enabled:
-            camera_summary = camera_analytics.get_session_summary()
-            session_data.update(camera_summary)
+            # Add camera analytics to session data if available
+            if session_data and camera_detector.enabled:
+                camera_summary = camera_analytics.get_session_summary()
+                session_data.update(camera_summary)
         
-        # Save to history if session data exists
-        if session_data and session_data['course']:
-            session_history.add_session(
-                course=session_data['course'],
-                mode=session_data['mode'],
-                duration_seconds=session_data['duration_seconds'],
-                xp_earned=session_data['xp_earned'],
-                start_time=session_data['start_time'],
-                end_time=session_data['end_time']
-            )
+            # Save to history if session data exists
+            if session_data and session_data['course']:
+                session_history.add_session(
+                    course=session_data['course'],
+                    mode=session_data['mode'],
+                    duration_seconds=session_data['duration_seconds'],
+                    xp_earned=session_data['xp_earned'],
+                    start_time=session_data['start_time'],
+                    end_time=session_data['end_time']
+                )
+                refresh_slow_state()
+            state_stream.publish('status', current_state)
         
         # Return session results for results screen
         return jsonify({
@@ -430,7 +617,52 @@ def toggle_camera():
 @app.route('/api/camera/status')
 def camera_status():
     """Get current camera status"""
-    return jsonify(camera_detector.get_status())
+    return Response(camera_detector.get_status_json(), mimetype='application/json')
+
+@app.route('/api/models')
+def model_status():
+    """Loaded models, their idle time and attributed memory"""
+    return jsonify(model_manager.get_stats())
+
+@app.route('/api/overrides', methods=['GET', 'POST', 'DELETE'])
+def overrides():
+    """
+    List, add (POST) or remove (DELETE) user corrections.
+    Body: {state, scope: window|tokens|app, app_name?, window_title?, tokens?};
+    app and title default to the current window.
+    """
+    if focus_detector.overrides is None:
+        return jsonify({'error': 'Overrides are disabled'}), 404
+    if request.method == 'GET':
+        return jsonify({
+            'overrides': focus_detector.overrides.entries,
+            'stats': focus_detector.overrides.get_stats()
+        })
+
+    data = request.json or {}
+    scope = data.get('scope', 'window')
+    app_name, window_title = focus_detector.current_window or (None, None)
+    # Token sets match in any app unless one is given
+    app_name = data.get('app_name', None if scope == 'tokens' else app_name)
+    window_title = data.get('window_title', window_title)
+    if scope != 'tokens' and (not app_name or app_name in OWN_APP_NAMES):
+        return jsonify({'error': 'No window to label'}), 400
+    try:
+        if request.method == 'POST':
+            entry = focus_detector.add_override(data.get('state'), app_name, window_title,
+                                                scope, data.get('tokens'))
+            return jsonify({'success': True, 'override': entry})
+        removed = focus_detector.remove_override(app_name, window_title, scope, data.get('tokens'))
+        return jsonify({'success': removed})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/overrides/reload', methods=['POST'])
+def reload_overrides():
+    """Re-read the overrides file after editing it by hand"""
+    if focus_detector.overrides is None:
+        return jsonify({'error': 'Overrides are disabled'}), 404
+    return jsonify({'success': True, 'overrides': focus_detector.overrides.reload()})
 
 def generate_frames():
     """Generator function for video streaming"""
@@ -491,13 +723,6 @@ if __name__ == '__main__':
     else:
         print("✅ Accessibility permissions: Granted")
     
-    # Load camera config
-    try:
-        with open('camera_config.json', 'r') as f:
-            camera_config = json.load(f)
-    except FileNotFoundError:
-        camera_config = {"enabled": False}
-
     # Start camera if enabled in config
     if camera_config.get('enabled', False):
         camera_detector.start()
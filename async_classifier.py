@@ -0,0 +1,89 @@
+import queue
+import threading
+from collections import OrderedDict
+
+
+class AsyncClassifier:
+    """Runs a slow predict function on a background thread
+
+    Callers ask for a verdict with a short deadline. If the prediction isn't
+    ready in time they get None and fall back to a default; the finished
+    verdict is kept until the next request for the same key picks it up.
+    Requests for a key that is already queued or running are not repeated.
+    """
+
+    def __init__(self, predict, max_pending=32, max_results=256):
+        self.predict = predict
+        self.max_results = max_results
+        self.lock = threading.Lock()
+        self.requests = queue.Queue(maxsize=max_pending)
+        self.in_flight = {}  # key -> threading.Event set when the verdict is ready
+        self.results = OrderedDict()  # key -> verdict, awaiting pickup
+        self.worker = None
+        self.stats = {"submitted": 0, "completed": 0, "deduplicated": 0, "deadline_misses": 0, "dropped": 0}
+
+    def classify(self, key, text, timeout=0.0):
+        """
+        Get the verdict for key, waiting at most timeout seconds.
+        Returns the predict() result, or None if it isn't available yet.
+        """
+        with self.lock:
+            if key in self.results:
+                return self.results.pop(key)
+
+            event = self.in_flight.get(key)
+            if event is not None:
+                self.stats["deduplicated"] += 1
+            else:
+                event = threading.Event()
+                try:
+                    self.requests.put_nowait((key, text))
+                except queue.Full:
+                    self.stats["dropped"] += 1
+                    return None
+                self.in_flight[key] = event
+                self.stats["submitted"] += 1
+                self._ensure_worker()
+
+        if timeout > 0 and event.wait(timeout):
+            with self.lock:
+                result = self.results.pop(key, None)
+            if result is not None:
+                return result
+
+        with self.lock:
+            self.stats["deadline_misses"] += 1
+        return None
+
+    def is_pending(self, key):
+        with self.lock:
+            return key in self.in_flight
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, pending=len(self.in_flight))
+
+    def _ensure_worker(self):
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self._worker_loop, daemon=True)
+            self.worker.start()
+
+    def _worker_loop(self):
+        while True:
+            key, text = self.requests.get()
+            try:
+                result = self.predict(text)
+            except Exception as e:
+                print(f"❌ Error in background classification: {e}")
+                result = None
+
+            with self.lock:
+                if result is not None:
+                    self.results[key] = result
+                    self.results.move_to_end(key)
+                    while len(self.results) > self.max_results:
+                        self.results.popitem(last=False)
+                    self.stats["completed"] += 1
+                event = self.in_flight.pop(key, None)
+            if event:
+                event.set()
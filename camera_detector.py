@@ -1,8 +1,10 @@
 import cv2
 import numpy as np
-from datetime import datetime
 import threading
 import time
+from camera_integration import (CameraStatusMixin, CascadeGate, Detection, DetectionAccumulator, PhoneSchedule,
+                                encode_clip_frame)
+from model_manager import ModelManager
 
 # MediaPipe for advanced detection
 try:
@@ -21,10 +23,20 @@ except ImportError:
     HAS_YOLO = False
     print("⚠️ Ultralytics not installed - phone detection disabled")
 
-class CameraDetector:
+def parse_phone_boxes(result, min_confidence=0.3):
+    """First phone box above min_confidence in one YOLO result: (detected, bbox)"""
+    for box in result.boxes:
+        if float(box.conf[0]) > min_confidence:  # Lowered threshold for better detection
+            x1, y1, x2, y2 = box.xyxy[0].tolist()
+            return True, (int(x1), int(y1), int(x2), int(y2))
+    return False, None
+
+class CameraDetector(CameraStatusMixin):
     """Advanced camera-based detection with pose and gaze tracking"""
     
-    def __init__(self):
+    CAMERA_MODELS = ['face_mesh', 'pose', 'hands', 'yolo']
+    
+    def __init__(self, inference_socket=None, model_manager=None):
         self.camera = None
         self.enabled = False
         self.last_detection = None
@@ -32,6 +44,9 @@ class CameraDetector:
         self.running = False
         self.debug_frame = None  # Store latest frame for dev mode
         self.lock = threading.Lock()  # Thread safety for frame access
+        self.detection_interval = 0.1  # Seconds between detections (10 fps)
+        self.accumulator = DetectionAccumulator()  # Every detection, drained once per update tick
+        self.on_detection = None  # Optional callback invoked with each detection result
         
         # Smoothing variables
         self.smoothed_score = 0
@@ -50,46 +65,33 @@ class CameraDetector:
             cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         )
         
-        # Initialize MediaPipe if available
+        # Models are created on first use and released by the manager when the
+        # camera stops or they sit idle, so a later start() recreates them
+        self.models = model_manager or ModelManager()
+        self.owns_models = model_manager is None  # Our own manager's reaper runs while the camera does
         if HAS_MEDIAPIPE:
             self.mp_face_mesh = mp.solutions.face_mesh
             self.mp_pose = mp.solutions.pose
             self.mp_hands = mp.solutions.hands
+            self.models.register('face_mesh', self._create_face_mesh, lambda model: model.close())
+            self.models.register('pose', self._create_pose, lambda model: model.close())
+            self.models.register('hands', self._create_hands, lambda model: model.close())
             
-            self.face_mesh = self.mp_face_mesh.FaceMesh(
-                max_num_faces=1,
-                refine_landmarks=True,
-                min_detection_confidence=0.3,  # Lowered for low-light
-                min_tracking_confidence=0.3    # Lowered for low-light
-            )
-            
-            self.pose = self.mp_pose.Pose(
-                min_detection_confidence=0.3,  # Lowered for low-light
-                min_tracking_confidence=0.3    # Lowered for low-light
-            )
-            
-            self.hands = self.mp_hands.Hands(
-                max_num_hands=2,
-                min_detection_confidence=0.3,  # Lowered for low-light
-                min_tracking_confidence=0.3    # Lowered for low-light
-            )
-        else:
-            self.face_mesh = None
-            self.pose = None
-            self.hands = None
-            
-        # Initialize YOLO if available
+        # Phone detection runs in the shared inference server when one is up;
+        # the local YOLO model is only loaded without it
+        self.yolo_classes = [67]  # 67 is cell phone in COCO dataset
         if HAS_YOLO:
+            self.models.register('yolo', self._create_yolo)
+        self.phone_client = None
+        if inference_socket:
+            from inference_server import InferenceClient, InferenceUnavailable
+            client = InferenceClient(inference_socket)
             try:
-                # Load Nano model (fastest)
-                self.yolo_model = YOLO('yolov8n.pt')
-                self.yolo_classes = [67]  # 67 is cell phone in COCO dataset
-                print("✅ YOLOv8 model loaded for phone detection")
-            except Exception as e:
-                print(f"❌ Error loading YOLO model: {e}")
-                self.yolo_model = None
-        else:
-            self.yolo_model = None
+                if client.ping().get("phone"):
+                    self.phone_client = client
+                    print("✅ Using shared inference server for phone detection")
+            except InferenceUnavailable as e:
+                print(f"⚠️ Shared inference server at {inference_socket} unavailable ({e}) - loading YOLO locally")
             
         self.frame_count = 0
         self.last_phone_detected = False
@@ -98,6 +100,12 @@ class CameraDetector:
         self.consecutive_failures = 0
         self.max_failures = 10
         
+        # Cascade: hand model and YOLO only run while a wrist is near the face
+        self.cascade_enabled = True
+        self.cascade_gate = CascadeGate()
+        self.phone_schedule = PhoneSchedule(interval=3)  # Frames between YOLO runs while the cascade is open
+        self.cascade_stats = {'frames': 0, 'hand_runs': 0, 'yolo_runs': 0}
+        
     def start(self):
         """Start camera capture in background thread"""
         if self.enabled:
@@ -110,6 +118,9 @@ class CameraDetector:
                 
             self.enabled = True
             self.running = True
+            self.accumulator.reset()
+            if self.owns_models:
+                self.models.start()
             
             # Start detection in background thread
             self.detection_thread = threading.Thread(target=self._detection_loop, daemon=True)
@@ -144,32 +155,10 @@ class CameraDetector:
             finally:
                 self.camera = None
         
-        # Clean up MediaPipe resources - be defensive
-        if HAS_MEDIAPIPE:
-            try:
-                # Only close if they were initialized
-                if hasattr(self, 'face_mesh') and self.face_mesh is not None:
-                    try:
-                        self.face_mesh.close()
-                    except:
-                        pass
-                    self.face_mesh = None
-                    
-                if hasattr(self, 'pose') and self.pose is not None:
-                    try:
-                        self.pose.close()
-                    except:
-                        pass
-                    self.pose = None
-                    
-                if hasattr(self, 'hands') and self.hands is not None:
-                    try:
-                        self.hands.close()
-                    except:
-                        pass
-                    self.hands = None
-            except Exception as e:
-                print(f"Error closing MediaPipe: {e}")
+        # Release the camera models; they are recreated on the next start()
+        self.models.unload_all(self.CAMERA_MODELS)
+        if self.owns_models:
+            self.models.stop()
         
         # Release OpenCV windows
         try:
@@ -188,14 +177,25 @@ class CameraDetector:
                 return buffer.tobytes()
             return None
     
+    def get_clip_frame(self, max_width=320, quality=60):
+        """Get a downscaled JPEG of the latest frame for clip capture (called off the detection thread)"""
+        # Only the copy holds the lock the detection thread needs every frame
+        with self.lock:
+            if self.debug_frame is None:
+                return None
+            frame = self.debug_frame.copy()
+        return encode_clip_frame(frame, max_width, quality)
+    
     def _detection_loop(self):
         """Background thread for continuous detection"""
         while self.running:
             try:
                 detection = self._detect_once()
                 if detection:
-                    self.last_detection = detection
-                time.sleep(0.1)  # 10 fps (sufficient for attention tracking)
+                    self._publish_detection(detection)
+                    if self.on_detection:
+                        self.on_detection(detection)
+                time.sleep(self.detection_interval)  # 10 fps by default (sufficient for attention tracking)
             except Exception as e:
                 print(f"Detection error: {e}")
                 time.sleep(1)
@@ -233,7 +233,7 @@ class CameraDetector:
             self.debug_frame = frame.copy()
         
         # Use MediaPipe if available, otherwise fall back to basic detection
-        if HAS_MEDIAPIPE and self.face_mesh and self.pose:
+        if HAS_MEDIAPIPE and self.models.available('face_mesh') and self.models.available('pose'):
             return self._advanced_detection(frame)
         else:
             return self._basic_detection(frame)
@@ -258,15 +258,14 @@ class CameraDetector:
         # if detected:
         #     print(f"✅ Face detected (basic mode): {len(faces)} face(s)")
         
-        return {
-            'present': detected,
-            'face_count': len(faces),
-            'attention_score': 50 if detected else 0,
-            'looking_at_screen': detected,
-            'timestamp': datetime.now().isoformat(),
-            'confidence': 0.6 if detected else 0.2,
-            'method': 'basic'
-        }
+        return Detection(
+            present=detected,
+            face_count=len(faces),
+            attention_score=50 if detected else 0,
+            looking_at_screen=detected,
+            confidence=0.6 if detected else 0.2,
+            method='basic'
+        )
     
     def _advanced_detection(self, frame):
         """Advanced detection with MediaPipe"""
@@ -306,23 +305,43 @@ class CameraDetector:
             if rgb_frame is None or rgb_frame.size == 0:
                 return None
             
-            # Check if MediaPipe objects are still valid (not closed during shutdown)
-            if not self.running or self.face_mesh is None or self.pose is None or self.hands is None:
+            # Don't recreate models that stop() is releasing
+            if not self.running:
                 return None
                 
-            face_results = self.face_mesh.process(rgb_frame)
-            pose_results = self.pose.process(rgb_frame)
-            hand_results = self.hands.process(rgb_frame)
+            # Held for the call so the manager can't unload them mid-frame
+            with self.models.use('face_mesh') as face_mesh, self.models.use('pose') as pose:
+                if face_mesh is None or pose is None:
+                    return None
+                face_results = face_mesh.process(rgb_frame)
+                pose_results = pose.process(rgb_frame)
+            
+            # Only look for hands/phones when a wrist comes up near the face
+            if self.cascade_enabled:
+                pose_list = pose_results.pose_landmarks.landmark if pose_results.pose_landmarks else None
+                run_cascade = self.cascade_gate.update(pose_list)
+            else:
+                run_cascade = True
+            
+            # Hand landmarks only feed the phone heuristic used when YOLO is unavailable
+            hand_results = None
+            if run_cascade and not self.has_phone_model:
+                with self.models.use('hands') as hands:
+                    if hands is not None:
+                        hand_results = hands.process(rgb_frame)
+                        self.cascade_stats['hand_runs'] += 1
         except Exception as e:
             # Silently skip this frame on any MediaPipe error
             return None
         
-            # Run YOLO detection periodically (every 3 frames ~ 0.3 sec)
         self.frame_count += 1
-        if self.frame_count % 3 == 0 and self.yolo_model:
-            phone_result = self._detect_phone_yolo(frame)
-            if phone_result:
-                print(f"DEBUG: YOLO phone detection result: {phone_result}")
+        self.cascade_stats['frames'] += 1
+        
+        # Run YOLO periodically (every 3 frames ~ 0.3 sec) while the cascade is open or a phone
+        # is in view; between runs the last verdict stands
+        if self.has_phone_model and self.phone_schedule.due(run_cascade, self.last_phone_detected):
+            self.cascade_stats['yolo_runs'] += 1
+            self._detect_phone_yolo(frame)
         
         # Calculate attention score with head pose
         attention_score, phone_detected, head_pose = self._calculate_attention_score(face_results, pose_results, hand_results, frame.shape)
@@ -348,24 +367,26 @@ class CameraDetector:
                 print(f"✅ Face detected (advanced mode): Score={final_score}, Looking={looking_at_screen}")
             else:
                 print(f"❌ No face detected (advanced mode)")
+            if self.cascade_enabled:
+                stats = self.get_cascade_stats()
+                print(f"DEBUG: Cascade skip rates - Hands: {stats['hand_skip_rate']:.0%}, YOLO: {stats['yolo_skip_rate']:.0%}")
         
         # Draw debug info on the stored frame
         if self.debug_frame is not None:
             self._draw_debug_info(self.debug_frame, face_landmarks, pose_landmarks, head_pose, final_score, phone_detected)
         
-        return {
-            'present': present,
-            'face_count': 1 if present else 0,
-            'attention_score': final_score,
-            'looking_at_screen': looking_at_screen,
-            'head_facing_forward': self._is_facing_forward_3d(head_pose) if head_pose else False,
-            'good_posture': self._has_good_posture(pose_landmarks),
-            'phone_detected': phone_detected,
-            'head_pose': head_pose,
-            'timestamp': datetime.now().isoformat(),
-            'confidence': 0.9 if present else 0.1,
-            'method': 'advanced'
-        }
+        return Detection(
+            present=present,
+            face_count=1 if present else 0,
+            attention_score=final_score,
+            looking_at_screen=looking_at_screen,
+            head_facing_forward=self._is_facing_forward_3d(head_pose) if head_pose else False,
+            good_posture=self._has_good_posture(pose_landmarks),
+            phone_detected=phone_detected,
+            head_pose=head_pose,
+            confidence=0.9 if present else 0.1,
+            method='advanced'
+        )
     
     def _calculate_attention_score(self, face_results, pose_results, hand_results, img_shape):
         """Calculate attention score from 0-100 using 3D head pose"""
@@ -427,13 +448,27 @@ class CameraDetector:
             score = max(0, score - 50)
             phone_detected = True
         # Priority 2: Hand Heuristic (only if YOLO not available/failed)
-        elif not self.yolo_model and hand_results.multi_hand_landmarks and face_results.multi_face_landmarks:
+        elif not self.has_phone_model and hand_results and hand_results.multi_hand_landmarks and face_results.multi_face_landmarks:
             if self._is_using_phone(hand_results.multi_hand_landmarks, face_results.multi_face_landmarks[0]):
                 score = max(0, score - 50)
                 phone_detected = True
         
         return min(100, score), phone_detected, head_pose
     
+    def get_cascade_stats(self):
+        """Fraction of frames on which the hand model and YOLO were skipped"""
+        frames = self.cascade_stats['frames']
+        if not frames:
+            return {'frames': 0, 'hand_skip_rate': 0.0, 'yolo_skip_rate': 0.0, 'gate': self.cascade_gate.get_stats()}
+        # Baselines: hands used to run on every frame, YOLO on every third
+        yolo_baseline = max(1, frames // 3)
+        return {
+            'frames': frames,
+            'hand_skip_rate': round(1 - self.cascade_stats['hand_runs'] / frames, 3),
+            'yolo_skip_rate': round(max(0.0, 1 - self.cascade_stats['yolo_runs'] / yolo_baseline), 3),
+            'gate': self.cascade_gate.get_stats()
+        }
+    
     def _is_facing_forward(self, face_landmarks):
         """Check if face is oriented toward screen"""
         if not face_landmarks:
@@ -564,26 +599,64 @@ class CameraDetector:
         pitch, yaw, roll = head_pose
         return -15 < pitch < 15 and -20 < yaw < 20
         
+    def _create_face_mesh(self):
+        return self.mp_face_mesh.FaceMesh(
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.3,  # Lowered for low-light
+            min_tracking_confidence=0.3    # Lowered for low-light
+        )
+
+    def _create_pose(self):
+        return self.mp_pose.Pose(
+            min_detection_confidence=0.3,  # Lowered for low-light
+            min_tracking_confidence=0.3    # Lowered for low-light
+        )
+
+    def _create_hands(self):
+        return self.mp_hands.Hands(
+            max_num_hands=2,
+            min_detection_confidence=0.3,  # Lowered for low-light
+            min_tracking_confidence=0.3    # Lowered for low-light
+        )
+
+    def _create_yolo(self):
+        # Load Nano model (fastest)
+        model = YOLO('yolov8n.pt')
+        print("✅ YOLOv8 model loaded for phone detection")
+        return model
+
+    @property
+    def has_phone_model(self):
+        return self.phone_client is not None or self.models.available('yolo')
+
+    def _detect_phone_remote(self, frame):
+        """Ask the shared inference server; falls back to local YOLO if it's gone"""
+        from inference_server import InferenceUnavailable
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        if not ok:
+            return False, None
+        try:
+            return self.phone_client.detect_phone(jpeg.tobytes())
+        except InferenceUnavailable as e:
+            print(f"⚠️ Shared inference server failed ({e}) - loading YOLO locally")
+            self.phone_client.close()
+            self.phone_client = None
+            return False, None
+
     def _detect_phone_yolo(self, frame):
         """Run YOLO inference to detect phones"""
         try:
-            results = self.yolo_model(frame, classes=self.yolo_classes, verbose=False)
-            
-            detected = False
-            bbox = None
-            
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    conf = float(box.conf[0])
-                    if conf > 0.3:  # Lowered threshold for better detection
-                        detected = True
-                        # Get bbox for drawing
-                        x1, y1, x2, y2 = box.xyxy[0].tolist()
-                        bbox = (int(x1), int(y1), int(x2), int(y2))
+            if self.phone_client is not None:
+                detected, bbox = self._detect_phone_remote(frame)
+            else:
+                with self.models.use('yolo') as yolo_model:
+                    results = yolo_model(frame, classes=self.yolo_classes, verbose=False) if yolo_model else []
+                detected, bbox = False, None
+                for result in results:
+                    detected, bbox = parse_phone_boxes(result)
+                    if detected:
                         break
-                if detected:
-                    break
             
             self.last_phone_detected = detected
             self.phone_bbox = bbox
@@ -661,89 +734,3 @@ class CameraDetector:
             
             # Limit FPS to ~30 to save resources
             time.sleep(0.033)
-            
-    def calibrate(self):
-        """Set current head pose as the baseline for 'focused' state"""
-        if not self.last_detection or not self.last_detection.get('head_pose'):
-            return False, "No head pose detected. Please look at the camera."
-            
-        pitch, yaw, roll = self.last_detection['head_pose']
-        
-        self.calibration_data = {
-            'baseline_pitch': pitch,
-            'baseline_yaw': yaw,
-            'baseline_roll': roll,
-            'is_calibrated': True
-        }
-        
-        return True, "Calibration successful! Current position set as baseline."
-    
-    def get_status(self):
-        """Get current detection status"""
-        if not self.enabled:
-            return {
-                'enabled': False,
-                'present': False,
-                'attention_score': 0,
-                'message': 'Camera disabled'
-            }
-            
-        if not self.last_detection:
-            # Check if we've been waiting too long
-            if hasattr(self, 'detection_thread') and self.detection_thread.is_alive():
-                # If it's been more than 5 seconds since start (we can approximate or just say "Initializing...")
-                return {
-                    'enabled': True,
-                    'present': None,
-                    'attention_score': 0,
-                    'message': 'Initializing camera...'
-                }
-            else:
-                return {
-                    'enabled': True,
-                    'present': None,
-                    'attention_score': 0,
-                    'message': 'Camera error'
-                }
-        
-        return {
-            'enabled': True,
-            'present': self.last_detection['present'],
-            'face_count': self.last_detection['face_count'],
-            'attention_score': self.last_detection.get('attention_score', 0),
-            'looking_at_screen': self.last_detection.get('looking_at_screen', False),
-            'head_facing_forward': self.last_detection.get('head_facing_forward', False),
-            'good_posture': self.last_detection.get('good_posture', False),
-            'confidence': self.last_detection['confidence'],
-            'timestamp': self.last_detection['timestamp'],
-            'method': self.last_detection.get('method', 'basic'),
-            'method': self.last_detection.get('method', 'basic'),
-            'phone_detected': self.last_detection.get('phone_detected', False),
-            'is_calibrated': self.calibration_data['is_calibrated'],
-            'message': self._get_status_message(self.last_detection)
-        }
-    
-    def _get_status_message(self, detection):
-        """Generate human-readable status message"""
-        if not detection['present']:
-            return 'User away'
-            
-        if detection.get('phone_detected', False):
-            return '📱 Phone detected'
-        
-        score = detection.get('attention_score', 0)
-        
-        if score >= 80:
-            return '✅ Fully focused'
-        elif score >= 60:
-            return '👀 Paying attention'
-        elif score >= 40:
-            return '⚠️ Somewhat distracted'
-        else:
-            return '❌ Distracted'
-    
-    def is_user_present(self):
-        """Simple check if user is present"""
-        if not self.enabled or not self.last_detection:
-            return None
-        return self.last_detection['present']
@@ -5,9 +5,15 @@ Provides utilities for camera-based study tracking including:
 - Posture monitoring and warnings
 - Break reminders (20-20-20 rule)
 - Camera analytics
+- Per-tick aggregation of camera detections
+- Status reporting shared by camera detector implementations
+- Cascade gating of the hand and phone models
 """
 
+import json
+import math
 import time
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
@@ -34,6 +40,16 @@ def calculate_attention_multiplier(attention_score: float) -> float:
         return 0.5  # Minimum multiplier
 
 
+def encode_clip_frame(frame, max_width: int = 320, quality: int = 60) -> Optional[bytes]:
+    """Downscale a BGR frame to max_width and encode it as a small JPEG for clip buffers"""
+    import cv2
+    h, w = frame.shape[:2]
+    if w > max_width:
+        frame = cv2.resize(frame, (max_width, int(h * max_width / w)), interpolation=cv2.INTER_AREA)
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ret else None
+
+
 class PostureMonitor:
     """Monitors posture quality and triggers warnings"""
     
@@ -242,3 +258,398 @@ class CameraAnalytics:
         self.posture_readings = []
         self.time_away_seconds = 0
         self.time_present_seconds = 0
+
+
+class Detection:
+    """Result of a single camera detection
+
+    Timestamps are taken from the monotonic clock (for ordering and ages) and
+    the wall clock (for display); the ISO string is only built on demand.
+    Supports dict-style reads so callers can treat it like the old result dict.
+    """
+    
+    __slots__ = (
+        'present', 'face_count', 'attention_score', 'looking_at_screen',
+        'head_facing_forward', 'good_posture', 'phone_detected', 'head_pose',
+        'confidence', 'method', 'monotonic', 'wall_time'
+    )
+    
+    def __init__(self, present: bool, face_count: int, attention_score: int,
+                 looking_at_screen: bool, confidence: float, method: str,
+                 head_facing_forward: bool = False, good_posture: bool = False,
+                 phone_detected: bool = False, head_pose: Optional[tuple] = None):
+        self.present = present
+        self.face_count = face_count
+        self.attention_score = attention_score
+        self.looking_at_screen = looking_at_screen
+        self.head_facing_forward = head_facing_forward
+        self.good_posture = good_posture
+        self.phone_detected = phone_detected
+        self.head_pose = head_pose
+        self.confidence = confidence
+        self.method = method
+        self.monotonic = time.monotonic()
+        self.wall_time = time.time()
+    
+    @property
+    def timestamp(self) -> str:
+        """ISO-8601 wall-clock time of the detection"""
+        return datetime.fromtimestamp(self.wall_time).isoformat()
+    
+    def age(self) -> float:
+        """Seconds since the detection was made"""
+        return time.monotonic() - self.monotonic
+    
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+    
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+    
+    def to_dict(self) -> Dict:
+        """Serialize to the plain dict format used by the API"""
+        return {
+            'present': self.present,
+            'face_count': self.face_count,
+            'attention_score': self.attention_score,
+            'looking_at_screen': self.looking_at_screen,
+            'head_facing_forward': self.head_facing_forward,
+            'good_posture': self.good_posture,
+            'phone_detected': self.phone_detected,
+            'head_pose': self.head_pose,
+            'timestamp': self.timestamp,
+            'confidence': self.confidence,
+            'method': self.method
+        }
+
+
+class StatusSnapshot:
+    """Camera status built once per detection version, with lazily cached JSON"""
+    
+    __slots__ = ('key', 'status', '_json')
+    
+    def __init__(self, key: tuple, status: Dict):
+        self.key = key
+        self.status = status
+        self._json = None
+    
+    def json(self) -> bytes:
+        """Serialized status, encoded on first use only"""
+        if self._json is None:
+            self._json = json.dumps(self.status).encode('utf-8')
+        return self._json
+
+
+class DetectionAccumulator:
+    """Folds every camera detection into per-tick window aggregates.
+
+    The detection thread calls add() for each frame result and the update
+    loop calls consume() once per tick. Both sides only use deque append and
+    popleft, which are atomic, so no lock is shared between the threads.
+    """
+    
+    def __init__(self, max_samples: int = 600):
+        self._samples = deque(maxlen=max_samples)
+        
+    def add(self, detection: Dict):
+        """Record a single detection result"""
+        self._samples.append((
+            float(detection.get('attention_score', 0) or 0),
+            bool(detection.get('looking_at_screen', False)),
+            bool(detection.get('present', False)),
+            bool(detection.get('phone_detected', False)),
+            bool(detection.get('good_posture', False)),
+        ))
+    
+    def consume(self) -> Optional[Dict]:
+        """
+        Drain all detections recorded since the last call
+        
+        Returns:
+            Dictionary with window aggregates, or None if no detections arrived
+        """
+        count = 0
+        attention_total = 0.0
+        looking_count = 0
+        present_count = 0
+        posture_count = 0
+        phone_detected = False
+        
+        while True:
+            try:
+                attention, looking, present, phone, posture = self._samples.popleft()
+            except IndexError:
+                break
+            count += 1
+            attention_total += attention
+            looking_count += looking
+            present_count += present
+            posture_count += posture
+            phone_detected = phone_detected or phone
+        
+        if count == 0:
+            return None
+        
+        present_fraction = present_count / count
+        looking_fraction = looking_count / count
+        posture_fraction = posture_count / count
+        
+        return {
+            'samples': count,
+            'attention_score': int(round(attention_total / count)),
+            'looking_fraction': round(looking_fraction, 3),
+            'present_fraction': round(present_fraction, 3),
+            'good_posture_fraction': round(posture_fraction, 3),
+            'looking_at_screen': looking_fraction >= 0.5,
+            'present': present_fraction >= 0.5,
+            'good_posture': posture_fraction >= 0.5,
+            'phone_detected': phone_detected
+        }
+    
+    def reset(self):
+        """Discard any pending detections"""
+        self._samples.clear()
+
+
+class CascadeGate:
+    """Decides per frame whether the hand model and phone detector need to run
+
+    The pose graph already tracks the wrists, so the expensive models only run
+    while a wrist is raised near the face. A short hold keeps them running for
+    a few frames after the wrist drops, and a periodic refresh catches phones
+    held out of frame (e.g. in the lap).
+    """
+    
+    NOSE = 0
+    LEFT_SHOULDER = 11
+    RIGHT_SHOULDER = 12
+    LEFT_WRIST = 15
+    RIGHT_WRIST = 16
+    
+    def __init__(self, radius_scale: float = 1.3, min_visibility: float = 0.3,
+                 hold_frames: int = 10, refresh_frames: int = 30):
+        self.radius_scale = radius_scale  # Trigger radius around the nose, in shoulder widths
+        self.min_visibility = min_visibility
+        self.hold_frames = hold_frames
+        self.refresh_frames = refresh_frames  # 0 disables the periodic refresh
+        self.reset()
+    
+    def update(self, pose_landmarks) -> bool:
+        """
+        Feed one frame of pose landmarks
+        
+        Args:
+            pose_landmarks: Indexable pose landmarks (x, y, visibility) or None
+            
+        Returns:
+            True if the hand/phone models should run on this frame
+        """
+        self.frames += 1
+        
+        if self.wrists_near_face(pose_landmarks):
+            self.hold_remaining = self.hold_frames
+            self.triggered_frames += 1
+            active = True
+        elif self.hold_remaining > 0:
+            self.hold_remaining -= 1
+            active = True
+        else:
+            active = bool(self.refresh_frames) and self.frames % self.refresh_frames == 0
+        
+        if active:
+            self.active_frames += 1
+        return active
+    
+    def wrists_near_face(self, pose_landmarks) -> bool:
+        """Check if either visible wrist is within the trigger radius of the nose"""
+        if not pose_landmarks:
+            return True  # No pose to gate on - fail open
+        
+        nose = pose_landmarks[self.NOSE]
+        if nose.visibility < self.min_visibility:
+            return True
+        
+        left_shoulder = pose_landmarks[self.LEFT_SHOULDER]
+        right_shoulder = pose_landmarks[self.RIGHT_SHOULDER]
+        shoulder_width = math.hypot(left_shoulder.x - right_shoulder.x, left_shoulder.y - right_shoulder.y)
+        if shoulder_width < 0.05:
+            shoulder_width = 0.25  # Shoulders not resolved; assume a typical webcam framing
+        radius = self.radius_scale * shoulder_width
+        
+        for wrist_id in (self.LEFT_WRIST, self.RIGHT_WRIST):
+            wrist = pose_landmarks[wrist_id]
+            if wrist.visibility < self.min_visibility:
+                continue
+            if math.hypot(wrist.x - nose.x, wrist.y - nose.y) < radius:
+                return True
+        return False
+    
+    def get_stats(self) -> Dict:
+        """Fraction of frames on which the gated models were skipped"""
+        frames = max(1, self.frames)
+        return {
+            'frames': self.frames,
+            'triggered_rate': round(self.triggered_frames / frames, 3),
+            'skip_rate': round(1 - self.active_frames / frames, 3) if self.frames else 0.0
+        }
+    
+    def reset(self):
+        """Clear counters and hold state"""
+        self.frames = 0
+        self.active_frames = 0
+        self.triggered_frames = 0
+        self.hold_remaining = 0
+
+
+class PhoneSchedule:
+    """Decides per frame whether the phone detector runs
+    
+    It runs every `interval` frames while the cascade gate is open. While its
+    last run saw a phone it keeps that schedule even with the gate closed, so
+    a phone held just outside the wrist window keeps its verdict until a real
+    run clears it instead of being dropped when the gate closes.
+    """
+    
+    def __init__(self, interval: int = 3):
+        self.interval = interval
+        self.frames_since_run = interval  # Run on the first open frame
+    
+    def due(self, gate_open: bool, phone_detected: bool) -> bool:
+        """Count one frame; True if the phone detector should run on it"""
+        self.frames_since_run += 1
+        if (gate_open or phone_detected) and self.frames_since_run >= self.interval:
+            self.frames_since_run = 0
+            return True
+        return False
+
+
+class CameraStatusMixin:
+    """Status reporting and calibration shared by in-process and worker-process detectors
+
+    Expects the host class to provide enabled, last_detection, detection_thread,
+    calibration_data and accumulator attributes.
+    """
+    
+    detection_version = 0  # Incremented for every published detection
+    status_snapshot = None  # Cached StatusSnapshot for the current version
+    
+    def _publish_detection(self, detection: Detection):
+        """Make a new detection visible to status readers and the tick accumulator"""
+        self.last_detection = detection
+        self.detection_version += 1
+        self.accumulator.add(detection)
+    
+    def calibrate(self):
+        """Set current head pose as the baseline for 'focused' state"""
+        if not self.last_detection or not self.last_detection.get('head_pose'):
+            return False, "No head pose detected. Please look at the camera."
+            
+        pitch, yaw, roll = self.last_detection['head_pose']
+        
+        self.calibration_data = {
+            'baseline_pitch': pitch,
+            'baseline_yaw': yaw,
+            'baseline_roll': roll,
+            'is_calibrated': True
+        }
+        
+        return True, "Calibration successful! Current position set as baseline."
+    
+    def get_status(self):
+        """Get current detection status (shared between callers - treat as read-only)"""
+        return self._get_status_snapshot().status
+    
+    def get_status_json(self) -> bytes:
+        """Get current detection status serialized as JSON bytes"""
+        return self._get_status_snapshot().json()
+    
+    def _get_status_snapshot(self) -> StatusSnapshot:
+        """Rebuild the status only when the detection or camera state changed"""
+        thread = self.detection_thread
+        key = (
+            self.enabled,
+            self.detection_version,
+            self.calibration_data['is_calibrated'],
+            thread is not None and thread.is_alive()
+        )
+        snapshot = self.status_snapshot
+        if snapshot is None or snapshot.key != key:
+            snapshot = StatusSnapshot(key, self._build_status(detecting=key[3]))
+            self.status_snapshot = snapshot
+        return snapshot
+    
+    def _build_status(self, detecting: bool) -> Dict:
+        if not self.enabled:
+            return {
+                'enabled': False,
+                'present': False,
+                'attention_score': 0,
+                'message': 'Camera disabled'
+            }
+        
+        detection = self.last_detection
+        if not detection:
+            if detecting:
+                return {
+                    'enabled': True,
+                    'present': None,
+                    'attention_score': 0,
+                    'message': 'Initializing camera...'
+                }
+            else:
+                return {
+                    'enabled': True,
+                    'present': None,
+                    'attention_score': 0,
+                    'message': 'Camera error'
+                }
+        
+        return {
+            'enabled': True,
+            'present': detection.present,
+            'face_count': detection.face_count,
+            'attention_score': detection.attention_score,
+            'looking_at_screen': detection.looking_at_screen,
+            'head_facing_forward': detection.head_facing_forward,
+            'good_posture': detection.good_posture,
+            'confidence': detection.confidence,
+            'timestamp': detection.timestamp,
+            'method': detection.method,
+            'phone_detected': detection.phone_detected,
+            'is_calibrated': self.calibration_data['is_calibrated'],
+            'message': self._get_status_message(detection)
+        }
+    
+    def consume_window(self):
+        """Aggregate of all detections since the previous call (None if there were none)"""
+        if not self.enabled:
+            return None
+        return self.accumulator.consume()
+    
+    def _get_status_message(self, detection):
+        """Generate human-readable status message"""
+        if not detection['present']:
+            return 'User away'
+            
+        if detection.get('phone_detected', False):
+            return '📱 Phone detected'
+        
+        score = detection.get('attention_score', 0)
+        
+        if score >= 80:
+            return '✅ Fully focused'
+        elif score >= 60:
+            return '👀 Paying attention'
+        elif score >= 40:
+            return '⚠️ Somewhat distracted'
+        else:
+            return '❌ Distracted'
+    
+    def is_user_present(self):
+        """Simple check if user is present"""
+        if not self.enabled or not self.last_detection:
+            return None
+        return self.last_detection['present']
@@ -0,0 +1,386 @@
+"""
+Camera Worker Process
+Runs CameraDetector capture and inference in a child process so MediaPipe,
+YOLO and OpenCV do not compete with Flask and update_loop for the GIL.
+- Encoded frames come back through a shared-memory ring buffer
+- Detection results come back through a small queue over a socket pair
+- The worker is restarted automatically if it crashes
+"""
+
+import os
+import queue
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Connection
+from typing import Optional, Tuple
+
+from camera_integration import CameraStatusMixin, DetectionAccumulator, encode_clip_frame
+
+
+class SharedFrameRing:
+    """Fixed-size ring of encoded frames in shared memory (single writer, many readers)
+
+    Layout: a header with the latest sequence number, slot count and slot size,
+    followed by slots of (sequence, length, data). The writer invalidates a slot
+    before overwriting it and readers re-check the slot sequence after copying,
+    so a torn read is detected and retried instead of returned.
+    """
+
+    HEADER = struct.Struct('<QII')  # latest_seq, slot_count, slot_size
+    SLOT_HEADER = struct.Struct('<QI')  # seq, length
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        _, self.slot_count, self.slot_size = self.HEADER.unpack_from(shm.buf, 0)
+
+    @classmethod
+    def create(cls, slot_count: int = 4, slot_size: int = 1 << 20) -> 'SharedFrameRing':
+        """Allocate a new ring (parent side)"""
+        size = cls.HEADER.size + slot_count * (cls.SLOT_HEADER.size + slot_size)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        cls.HEADER.pack_into(shm.buf, 0, 0, slot_count, slot_size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedFrameRing':
+        """Attach to an existing ring by name (worker side)"""
+        shm = shared_memory.SharedMemory(name=name)
+        # The parent owns the segment; stop this process's resource tracker
+        # from unlinking it when the worker exits or is restarted.
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _slot_offset(self, seq: int) -> int:
+        return self.HEADER.size + (seq % self.slot_count) * (self.SLOT_HEADER.size + self.slot_size)
+
+    def write(self, data: bytes) -> bool:
+        """Publish a frame. Returns False if it does not fit in a slot."""
+        if len(data) > self.slot_size:
+            return False
+
+        buf = self.shm.buf
+        seq = self.HEADER.unpack_from(buf, 0)[0] + 1
+        offset = self._slot_offset(seq)
+        data_offset = offset + self.SLOT_HEADER.size
+
+        self.SLOT_HEADER.pack_into(buf, offset, 0, 0)  # Invalidate while writing
+        buf[data_offset:data_offset + len(data)] = data
+        self.SLOT_HEADER.pack_into(buf, offset, seq, len(data))
+        self.HEADER.pack_into(buf, 0, seq, self.slot_count, self.slot_size)
+        return True
+
+    def latest_seq(self) -> int:
+        """Sequence number of the most recently published frame (0 if none)"""
+        return self.HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def read_latest(self, retries: int = 3) -> Optional[Tuple[int, bytes]]:
+        """Copy out the most recent frame as (seq, data), or None if there is none"""
+        buf = self.shm.buf
+        for _ in range(retries):
+            seq = self.HEADER.unpack_from(buf, 0)[0]
+            if seq == 0:
+                return None
+
+            offset = self._slot_offset(seq)
+            slot_seq, length = self.SLOT_HEADER.unpack_from(buf, offset)
+            if slot_seq != seq:
+                continue
+
+            data_offset = offset + self.SLOT_HEADER.size
+            data = bytes(buf[data_offset:data_offset + length])
+
+            if self.SLOT_HEADER.unpack_from(buf, offset)[0] == seq:
+                return seq, data
+        return None
+
+    def close(self):
+        """Detach from the ring, and free it if this side created it"""
+        try:
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+        except Exception:
+            pass
+
+
+class ProcessCameraDetector(CameraStatusMixin):
+    """Drop-in replacement for CameraDetector that runs detection in a worker process"""
+
+    def __init__(self, slot_count: int = 4, slot_size: int = 1 << 20, max_restart_delay: float = 30.0,
+                 inference_socket: Optional[str] = None):
+        self.enabled = False
+        self.running = False
+        self.last_detection = None
+        self.detection_thread = None  # Reads results from the worker
+        self.accumulator = DetectionAccumulator()
+
+        # Calibration is applied in the worker; kept here for status reporting
+        self.calibration_data = {
+            'baseline_pitch': 0,
+            'baseline_yaw': 0,
+            'baseline_roll': 0,
+            'is_calibrated': False
+        }
+
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.max_restart_delay = max_restart_delay
+        self.inference_socket = inference_socket
+
+        self.ring = None
+        self.clip_frame = None  # ((seq, max_width, quality), jpeg) of the last clip frame
+        self.process = None
+        self.conn = None
+        self.send_lock = threading.Lock()
+        self.restart_count = 0
+        self.worker_started_at = None
+
+    def start(self):
+        """Start the worker process and the result reader thread"""
+        if self.enabled:
+            return
+
+        try:
+            self.ring = SharedFrameRing.create(self.slot_count, self.slot_size)
+            self.enabled = True
+            self.running = True
+            self.accumulator.reset()
+            self.restart_count = 0
+            self._launch_worker()
+
+            self.detection_thread = threading.Thread(target=self._reader_loop, daemon=True)
+            self.detection_thread.start()
+
+            print("✅ Camera worker process started")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error starting camera worker: {e}")
+            self.stop()
+            return False
+
+    def stop(self):
+        """Stop the worker process and release shared memory"""
+        print("🛑 Stopping camera worker...")
+
+        self.running = False
+        self.enabled = False
+
+        self._send(('stop', None))
+        self._terminate_worker()
+
+        if self.detection_thread and self.detection_thread.is_alive() \
+                and self.detection_thread is not threading.current_thread():
+            self.detection_thread.join(timeout=1.0)
+
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+
+        print("✅ Camera worker stopped")
+
+    def get_frame(self):
+        """Get the latest JPEG frame published by the worker"""
+        ring = self.ring
+        if ring is None:
+            return None
+        latest = ring.read_latest()
+        return latest[1] if latest else None
+
+    def get_clip_frame(self, max_width=320, quality=60):
+        """Downscaled JPEG of the latest worker frame for clip capture, re-encoded once per frame"""
+        ring = self.ring
+        latest = ring.read_latest() if ring is not None else None
+        if latest is None:
+            return None
+        key = (latest[0], max_width, quality)
+        if self.clip_frame is not None and self.clip_frame[0] == key:
+            return self.clip_frame[1]
+
+        import cv2
+        import numpy as np
+        frame = cv2.imdecode(np.frombuffer(latest[1], dtype=np.uint8), cv2.IMREAD_COLOR)
+        data = encode_clip_frame(frame, max_width, quality) if frame is not None else None
+        self.clip_frame = (key, data)
+        return data
+
+    def calibrate(self):
+        """Calibrate from the latest detection and forward the baseline to the worker"""
+        success, message = super().calibrate()
+        if success:
+            self._send(('calibrate', self.calibration_data))
+        return success, message
+
+    def _launch_worker(self):
+        """Spawn the worker with one end of a socket pair for messages"""
+        parent_sock, child_sock = socket.socketpair()
+        args = [sys.executable, os.path.abspath(__file__),
+                '--ring', self.ring.name, '--fd', str(child_sock.fileno())]
+        if self.inference_socket:
+            args += ['--inference-socket', self.inference_socket]
+        try:
+            self.process = subprocess.Popen(
+                args,
+                pass_fds=(child_sock.fileno(),),
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+        finally:
+            child_sock.close()
+
+        self.conn = Connection(parent_sock.detach())
+        self.worker_started_at = time.time()
+
+        if self.calibration_data['is_calibrated']:
+            self._send(('calibrate', self.calibration_data))
+
+    def _terminate_worker(self):
+        """Make sure the worker has exited, then close the message channel"""
+        process, self.process = self.process, None
+        if process and process.poll() is None:
+            try:
+                process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+        conn, self.conn = self.conn, None
+        if conn:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _send(self, message):
+        conn = self.conn
+        if conn is None:
+            return
+        try:
+            with self.send_lock:
+                conn.send(message)
+        except (OSError, ValueError):
+            pass
+
+    def _reader_loop(self):
+        """Receive detections from the worker, restarting it if it dies"""
+        while self.running:
+            conn = self.conn
+            try:
+                if conn is None:
+                    raise EOFError
+                kind, payload = conn.recv()
+            except (EOFError, OSError, ValueError):
+                if not self.running:
+                    break
+                self._restart_worker()
+                continue
+
+            if kind == 'detection':
+                self._publish_detection(payload)
+            elif kind == 'error':
+                print(f"❌ Camera worker error: {payload}")
+
+    def _restart_worker(self):
+        """Relaunch a crashed worker with exponential backoff"""
+        self._terminate_worker()
+
+        # A worker that ran for a while before dying gets a fresh backoff
+        if self.worker_started_at and time.time() - self.worker_started_at > self.max_restart_delay:
+            self.restart_count = 0
+        self.restart_count += 1
+        delay = min(self.max_restart_delay, 0.5 * (2 ** (self.restart_count - 1)))
+        print(f"⚠️ Camera worker exited - restarting in {delay:.1f}s (attempt {self.restart_count})")
+
+        deadline = time.time() + delay
+        while self.running and time.time() < deadline:
+            time.sleep(0.1)
+
+        if self.running:
+            try:
+                self._launch_worker()
+            except Exception as e:
+                print(f"❌ Error restarting camera worker: {e}")
+
+
+def _worker_main(ring_name, fd, inference_socket=None):
+    """Entry point of the worker process"""
+    from camera_detector import CameraDetector
+
+    conn = Connection(fd)
+    ring = SharedFrameRing.attach(ring_name)
+    results = queue.Queue(maxsize=16)
+
+    def on_detection(detection):
+        # Keep the newest results if the parent falls behind
+        while True:
+            try:
+                results.put_nowait(detection)
+                return
+            except queue.Full:
+                try:
+                    results.get_nowait()
+                except queue.Empty:
+                    pass
+
+    detector = CameraDetector(inference_socket=inference_socket)
+    detector.on_detection = on_detection
+    if not detector.start():
+        conn.send(('error', 'Could not open camera'))
+        return 1
+
+    exit_code = 0
+    try:
+        while True:
+            if conn.poll():
+                command, payload = conn.recv()
+                if command == 'stop':
+                    break
+                elif command == 'calibrate':
+                    detector.calibration_data = dict(payload)
+
+            if not detector.enabled:
+                # The detector gave up on the camera; let the parent restart us
+                exit_code = 1
+                break
+
+            try:
+                detection = results.get(timeout=0.05)
+            except queue.Empty:
+                continue
+
+            conn.send(('detection', detection))
+
+            frame = detector.get_frame()
+            if frame:
+                ring.write(frame)
+    except (EOFError, OSError):
+        pass  # Parent went away
+    finally:
+        detector.stop()
+        ring.close()
+        conn.close()
+    return exit_code
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Camera detection worker process")
+    parser.add_argument('--ring', required=True, help="Shared-memory frame ring name")
+    parser.add_argument('--fd', type=int, required=True, help="Inherited socket descriptor")
+    parser.add_argument('--inference-socket', help="Shared inference server for phone detection")
+    args = parser.parse_args()
+
+    sys.exit(_worker_main(args.ring, args.fd, args.inference_socket))
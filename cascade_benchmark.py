@@ -0,0 +1,171 @@
+"""
+Cascade Gating Replay Benchmark
+Measures how gating the phone detector on wrist position affects recall.
+
+Record a trace from the webcam (YOLO runs on every frame to give reference labels):
+    python cascade_benchmark.py record trace.jsonl --seconds 120
+
+Replay it against several gate settings:
+    python cascade_benchmark.py replay trace.jsonl
+"""
+
+import argparse
+import json
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from camera_integration import CascadeGate, PhoneSchedule
+
+Landmark = namedtuple('Landmark', ['x', 'y', 'visibility'])
+
+
+def record(path: str, seconds: float):
+    """Capture pose landmarks and per-frame YOLO phone labels to a JSON-lines trace"""
+    import cv2
+    from camera_detector import CameraDetector
+
+    detector = CameraDetector()
+    pose_model = detector.models.get('pose')
+    if not detector.models.get('yolo') or not pose_model:
+        print("❌ Recording needs both MediaPipe and YOLO")
+        return
+
+    camera = cv2.VideoCapture(0)
+    if not camera.isOpened():
+        print("❌ Could not open camera")
+        return
+
+    frames = 0
+    deadline = time.time() + seconds
+    print(f"🎥 Recording {seconds:.0f}s of pose + phone labels to {path}")
+    try:
+        with open(path, 'w') as f:
+            while time.time() < deadline:
+                ret, frame = camera.read()
+                if not ret:
+                    continue
+
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                pose_results = pose_model.process(rgb_frame)
+                detector._detect_phone_yolo(frame)
+
+                pose = None
+                if pose_results.pose_landmarks:
+                    pose = [[round(lm.x, 4), round(lm.y, 4), round(lm.visibility, 3)]
+                            for lm in pose_results.pose_landmarks.landmark]
+
+                f.write(json.dumps({'pose': pose, 'phone': detector.last_phone_detected}) + '\n')
+                frames += 1
+                time.sleep(0.1)  # Match the detector's 10 fps
+    finally:
+        camera.release()
+    print(f"✅ Recorded {frames} frames")
+
+
+def load_trace(path: str) -> List[Dict]:
+    """Load a recorded trace, converting landmarks to attribute access"""
+    trace = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            pose = item.get('pose')
+            trace.append({
+                'pose': [Landmark(*lm) for lm in pose] if pose else None,
+                'phone': bool(item.get('phone'))
+            })
+    return trace
+
+
+def simulate(trace: List[Dict], gate: Optional[CascadeGate], yolo_interval: int = 3) -> Dict:
+    """
+    Replay a trace through the detector's phone logic
+
+    Args:
+        trace: Frames from load_trace()
+        gate: Cascade gate to apply, or None for the ungated baseline
+        yolo_interval: Frames between YOLO runs while allowed to run
+
+    Returns:
+        Dictionary with recall, precision, YOLO runs and skip rate
+    """
+    phone_detected = False
+    schedule = PhoneSchedule(yolo_interval)
+    yolo_runs = 0
+    true_positives = 0
+    false_positives = 0
+    positives = 0
+
+    for item in trace:
+        active = gate.update(item['pose']) if gate else True
+
+        if schedule.due(active, phone_detected):
+            yolo_runs += 1
+            phone_detected = item['phone']
+
+        if item['phone']:
+            positives += 1
+            if phone_detected:
+                true_positives += 1
+        elif phone_detected:
+            false_positives += 1
+
+    frames = len(trace)
+    return {
+        'frames': frames,
+        'recall': true_positives / positives if positives else 1.0,
+        'precision': true_positives / (true_positives + false_positives) if (true_positives + false_positives) else 1.0,
+        'yolo_runs': yolo_runs,
+        'gate_skip_rate': gate.get_stats()['skip_rate'] if gate else 0.0
+    }
+
+
+def replay(path: str):
+    """Compare the ungated baseline with a few gate settings"""
+    trace = load_trace(path)
+    if not trace:
+        print("❌ Empty trace")
+        return
+
+    configs = [
+        ("baseline (no gate)", None),
+        ("default", CascadeGate()),
+        ("tight radius", CascadeGate(radius_scale=1.0)),
+        ("wide radius", CascadeGate(radius_scale=1.6)),
+        ("no hold", CascadeGate(hold_frames=0)),
+        ("no refresh", CascadeGate(refresh_frames=0)),
+    ]
+
+    baseline = None
+    print(f"{'config':<20} {'recall':>7} {'precision':>9} {'yolo runs':>10} {'vs base':>8} {'skip':>6}")
+    for name, gate in configs:
+        result = simulate(trace, gate)
+        if baseline is None:
+            baseline = result
+        change = result['yolo_runs'] / baseline['yolo_runs'] - 1 if baseline['yolo_runs'] else 0.0
+        print(f"{name:<20} {result['recall']:>7.1%} {result['precision']:>9.1%} "
+              f"{result['yolo_runs']:>10} {change:>+8.0%} {result['gate_skip_rate']:>6.0%}")
+
+    positives = sum(1 for item in trace if item['phone'])
+    print(f"\n{len(trace)} frames, {positives} with a phone in view")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cascade gating replay benchmark")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help="Record a trace from the webcam")
+    record_parser.add_argument('path')
+    record_parser.add_argument('--seconds', type=float, default=60)
+
+    replay_parser = subparsers.add_parser('replay', help="Replay a trace against gate settings")
+    replay_parser.add_argument('path')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.path, args.seconds)
+    else:
+        replay(args.path)
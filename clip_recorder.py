@@ -0,0 +1,242 @@
+"""
+Event-Triggered Clip Capture
+Keeps the last few seconds of low-resolution, already-encoded JPEG frames in
+a bounded ring buffer and writes a short clip to disk when a trigger fires
+(phone detected, attention below threshold).
+- Frames are sampled and encoded on the recorder's own thread, never on the
+  detection thread
+- The buffer has a hard byte ceiling as well as a time window
+- Clips are written by a background thread as concatenated JPEGs (.mjpeg,
+  playable with ffplay/VLC) plus a JSON sidecar, so nothing is re-encoded
+- The writer reads a clip's frames straight from the buffer, which keeps them
+  pinned until the clip is on disk. Buffered frame bytes, including a clip
+  waiting to be written, therefore never exceed max_buffer_mb: while a write
+  is backed up, new frames that don't fit are dropped, and a clip finishing
+  while another is still being written is dropped too
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ClipBuffer:
+    """Ring buffer of (monotonic_ts, jpeg_bytes) bounded by age and total bytes"""
+
+    def __init__(self, max_seconds: float, max_bytes: int):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.frames = deque()
+        self.total_bytes = 0
+        self.pinned_since = None  # Frames from this timestamp on belong to a clip being written
+        self.lock = threading.Lock()
+
+    def append(self, data: bytes, timestamp: Optional[float] = None) -> bool:
+        """Add a frame, evicting the oldest unpinned ones to stay within both limits.
+        Returns False if the frame was dropped."""
+        if len(data) > self.max_bytes:
+            return False
+        timestamp = time.monotonic() if timestamp is None else timestamp
+
+        with self.lock:
+            self.frames.append((timestamp, data))
+            self.total_bytes += len(data)
+
+            while self.frames and (self.total_bytes > self.max_bytes or
+                                   timestamp - self.frames[0][0] > self.max_seconds):
+                if self.pinned_since is not None and self.frames[0][0] >= self.pinned_since:
+                    break
+                _, old = self.frames.popleft()
+                self.total_bytes -= len(old)
+
+            if self.total_bytes > self.max_bytes:
+                # Everything left is pinned: the new frame gives way instead
+                self.frames.pop()
+                self.total_bytes -= len(data)
+                return False
+        return True
+
+    def pin(self, start: float):
+        """Keep frames from start on until unpin(), even past the time window"""
+        with self.lock:
+            self.pinned_since = start
+
+    def unpin(self):
+        with self.lock:
+            self.pinned_since = None
+
+    def frames_since(self, start: float, end: Optional[float] = None) -> List[Tuple[float, bytes]]:
+        """Frames with a timestamp at or after start, and up to end if given (references, not copies)"""
+        with self.lock:
+            return [frame for frame in self.frames if frame[0] >= start and (end is None or frame[0] <= end)]
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.total_bytes = 0
+            self.pinned_since = None
+
+
+class ClipRecorder:
+    """Samples frames into a pre-roll buffer and saves clips when triggers fire"""
+
+    TRIGGERS = ('phone', 'low_attention')
+
+    def __init__(self, frame_source: Callable[[], Optional[bytes]], clip_dir: str = "clips",
+                 pre_roll_seconds: float = 10, post_roll_seconds: float = 5, fps: float = 5,
+                 max_buffer_mb: float = 8, triggers=TRIGGERS, attention_threshold: int = 40,
+                 cooldown_seconds: float = 60):
+        """
+        Args:
+            frame_source: Returns the current frame as low-resolution JPEG bytes (or None)
+            clip_dir: Directory clips are written to
+            pre_roll_seconds: Seconds of footage kept from before the trigger
+            post_roll_seconds: Seconds of footage recorded after the trigger
+            fps: Sampling rate of the buffer
+            max_buffer_mb: Hard ceiling on buffered frame bytes, including a clip waiting to be written
+            triggers: Enabled trigger names (see TRIGGERS)
+            attention_threshold: Attention score below which 'low_attention' fires
+            cooldown_seconds: Minimum time between two clips
+        """
+        self.frame_source = frame_source
+        self.clip_dir = clip_dir
+        self.pre_roll_seconds = pre_roll_seconds
+        self.post_roll_seconds = post_roll_seconds
+        self.frame_interval = 1.0 / fps
+        self.triggers = set(triggers)
+        self.attention_threshold = attention_threshold
+        self.cooldown_seconds = cooldown_seconds
+
+        # Window covers the pre-roll plus the post-roll still to be collected
+        self.buffer = ClipBuffer(pre_roll_seconds + post_roll_seconds, int(max_buffer_mb * 1024 * 1024))
+        self.pending = None  # (reason, trigger_ts, wall_time) awaiting post-roll
+        self.last_clip_time = None
+        self.write_queue = queue.Queue(maxsize=1)  # One clip in flight; its frames stay pinned in the buffer
+        self.clips_written = 0
+
+        self.running = False
+        self.capture_thread = None
+        self.writer_thread = None
+
+    def start(self):
+        """Start the sampling and writer threads"""
+        if self.running:
+            return
+        self.running = True
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.capture_thread.start()
+        self.writer_thread.start()
+        print(f"🎬 Clip capture armed ({self.pre_roll_seconds:.0f}s pre-roll, triggers: {', '.join(sorted(self.triggers))})")
+
+    def stop(self):
+        """Stop sampling; clips already queued are still written"""
+        self.running = False
+        if self.capture_thread and self.capture_thread.is_alive():
+            self.capture_thread.join(timeout=1.0)
+        self.write_queue.put(None)
+        if self.writer_thread and self.writer_thread.is_alive():
+            self.writer_thread.join(timeout=5.0)
+        self.buffer.clear()
+
+    def check_triggers(self, camera_status: Dict) -> Optional[str]:
+        """
+        Evaluate the enabled triggers against a camera status
+
+        Returns:
+            The trigger that fired, or None
+        """
+        if not camera_status.get('enabled'):
+            return None
+
+        reason = None
+        if 'phone' in self.triggers and camera_status.get('phone_detected', False):
+            reason = 'phone'
+        elif 'low_attention' in self.triggers and camera_status.get('present') \
+                and camera_status.get('attention_score', 100) < self.attention_threshold:
+            reason = 'low_attention'
+
+        if reason and self.trigger(reason):
+            return reason
+        return None
+
+    def trigger(self, reason: str) -> bool:
+        """Schedule a clip around now. Returns False while in cooldown or already recording."""
+        now = time.monotonic()
+        if self.pending is not None:
+            return False
+        if self.last_clip_time is not None and now - self.last_clip_time < self.cooldown_seconds:
+            return False
+
+        self.pending = (reason, now, time.time())
+        self.last_clip_time = now
+        print(f"🎬 Clip triggered: {reason}")
+        return True
+
+    def _capture_loop(self):
+        """Sample the frame source into the buffer and hand finished clips to the writer"""
+        while self.running:
+            started = time.monotonic()
+            try:
+                frame = self.frame_source()
+                if frame:
+                    self.buffer.append(frame, started)
+            except Exception as e:
+                print(f"Clip capture error: {e}")
+
+            pending = self.pending
+            if pending and started - pending[1] >= self.post_roll_seconds:
+                self.pending = None
+                reason, trigger_ts, wall_time = pending
+                if self.buffer.pinned_since is not None:
+                    print("⚠️ Clip writer busy - dropping clip")
+                else:
+                    self.buffer.pin(trigger_ts - self.pre_roll_seconds)
+                    self.write_queue.put_nowait((reason, trigger_ts, wall_time, started))
+
+            time.sleep(max(0.0, self.frame_interval - (time.monotonic() - started)))
+
+    def _writer_loop(self):
+        """Write queued clips to disk"""
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                break
+            reason, trigger_ts, wall_time, end_ts = item
+            try:
+                # References into the pinned buffer, not copies
+                frames = self.buffer.frames_since(trigger_ts - self.pre_roll_seconds, end_ts)
+                path = self._write_clip(reason, trigger_ts, wall_time, frames)
+                if path:
+                    self.clips_written += 1
+                    print(f"🎬 Clip saved: {path}")
+            except Exception as e:
+                print(f"Error writing clip: {e}")
+            finally:
+                frames = None
+                self.buffer.unpin()
+
+    def _write_clip(self, reason, trigger_ts, wall_time, frames) -> Optional[str]:
+        if not frames:
+            return None
+        os.makedirs(self.clip_dir, exist_ok=True)
+
+        name = f"clip_{datetime.fromtimestamp(wall_time).strftime('%Y%m%d_%H%M%S')}_{reason}"
+        path = os.path.join(self.clip_dir, name + ".mjpeg")
+        with open(path, 'wb') as f:
+            for _, data in frames:
+                f.write(data)
+
+        with open(os.path.join(self.clip_dir, name + ".json"), 'w') as f:
+            json.dump({
+                "reason": reason,
+                "triggered_at": datetime.fromtimestamp(wall_time).isoformat(),
+                "frame_count": len(frames),
+                "frame_offsets": [round(ts - trigger_ts, 3) for ts, _ in frames]
+            }, f, indent=2)
+        return path
@@ -0,0 +1,178 @@
+"""
+Course-Aware Title Statistics
+Learns which title tokens show up during focused time in each course.
+- Counts live in fixed-size count-min sketches (depth x width uint32), so
+  memory stays flat however many distinct titles are seen
+- Each visit to a window counts once, however long it lasts: a background
+  sketch counts every window a session visits, a course sketch only the
+  focused visits in that course. Their ratio for a token is the share of its
+  visits that were focused study of the course
+- A title's score averages that share over its tokens (rarely seen tokens
+  count as the course's base rate) and must clearly beat the base rate, so one
+  common token shared with study titles is not enough. Numbers and stopwords
+  are not counted
+- Saved to one .npz file and loaded on start
+"""
+
+import os
+import threading
+import zlib
+
+import numpy as np
+
+from override_index import title_tokens
+
+# Words that say nothing about the course; numbers are dropped as well
+STOPWORDS = frozenset("""
+a an and are as at be by com for from how in is it my new of on or page tab the this
+to untitled what why window with www you your http https html pdf
+""".split())
+
+
+def course_tokens(window_title):
+    """Title tokens that can carry course evidence"""
+    return [token for token in title_tokens(window_title)
+            if len(token) > 1 and not token.isdigit() and token not in STOPWORDS]
+
+
+class CountMinSketch:
+    """Approximate counts with conservative update; estimates never undercount"""
+
+    def __init__(self, width=4096, depth=4, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.uint32)
+        self.rows = np.arange(depth)
+
+    def _cells(self, token):
+        # Double hashing with two stable hashes (str hash() is salted per process)
+        data = token.encode('utf-8')
+        h1, h2 = zlib.crc32(data), zlib.adler32(data) | 1
+        return (h1 + self.rows * h2) % self.width
+
+    def add(self, token, count=1):
+        cells = self._cells(token)
+        current = self.table[self.rows, cells]
+        # Conservative update: only raise the cells that are at the minimum
+        self.table[self.rows, cells] = np.maximum(current, current.min() + count)
+
+    def estimate(self, token):
+        return int(self.table[self.rows, self._cells(token)].min())
+
+
+class CourseStats:
+    """Per-course token sketches and the association of a title with a course"""
+
+    def __init__(self, path="course_stats.npz", width=4096, depth=4, min_support=50, min_lift=1.5,
+                 max_courses=32):
+        self.path = path
+        self.width = width
+        self.depth = depth
+        self.min_support = min_support  # Visits a token must be seen in before it counts
+        self.min_lift = min_lift  # How far a title must beat the course's base rate
+        self.max_courses = max_courses  # Least recently studied courses are dropped beyond this
+        self.lock = threading.Lock()
+        self.background = CountMinSketch(width, depth)
+        self.courses = {}  # course key -> CountMinSketch, most recently observed last
+        self.course_visits = {}  # course key -> focused visits
+        self.total_visits = 0  # Observed visits with any usable token
+        self.dirty = False
+        self.load()
+
+    @staticmethod
+    def _key(course):
+        return course.strip().lower()
+
+    def observe(self, course, window_title, state):
+        """Count one visit to a window during a session of course (call once per window change)"""
+        if not course:
+            return
+        tokens = course_tokens(window_title)
+        if not tokens:
+            return
+        key = self._key(course)
+        with self.lock:
+            self.total_visits += 1
+            for token in tokens:
+                self.background.add(token)
+            if state == "focused":
+                sketch = self.courses.pop(key, None) or CountMinSketch(self.width, self.depth)
+                self.courses[key] = sketch
+                self.course_visits[key] = self.course_visits.get(key, 0) + 1
+                for token in tokens:
+                    sketch.add(token)
+                while len(self.courses) > self.max_courses:
+                    oldest = next(iter(self.courses))
+                    del self.courses[oldest]
+                    self.course_visits.pop(oldest, None)
+            self.dirty = True
+
+    def association(self, course, window_title):
+        """
+        Returns (score, token): the share of session time that was focused study
+        of course, averaged over the title's tokens, and the strongest token.
+        Tokens seen in fewer than min_support visits count as the course's base
+        rate. The score is 0.0 unless it is min_lift times the base rate.
+        """
+        key = self._key(course) if course else None
+        sketch = self.courses.get(key)
+        tokens = course_tokens(window_title)
+        if sketch is None or not tokens or not self.total_visits:
+            return 0.0, None
+        with self.lock:
+            base = self.course_visits.get(key, 0) / self.total_visits
+            shares = []
+            for token in tokens:
+                seen = self.background.estimate(token)
+                # Both sketches overcount; the ratio is capped for colliding tokens
+                shares.append(min(sketch.estimate(token), seen) / seen if seen >= self.min_support else base)
+        score = sum(shares) / len(shares)
+        if score < base * self.min_lift:
+            return 0.0, None
+        return score, tokens[max(range(len(tokens)), key=shares.__getitem__)]
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                if data["background"].shape != (self.depth, self.width):
+                    print("⚠️ Course stats have a different sketch size, starting fresh")
+                    return
+                if "total_visits" not in data:
+                    # Also drops stats that counted every tick instead of every visit
+                    print("⚠️ Course stats have no visit counts, starting fresh")
+                    return
+                self.background = CountMinSketch(self.width, self.depth, data["background"].copy())
+                self.total_visits = int(data["total_visits"])
+                for name, table, visits in zip(data["names"], data["courses"], data["course_visits"]):
+                    self.courses[str(name)] = CountMinSketch(self.width, self.depth, table.copy())
+                    self.course_visits[str(name)] = int(visits)
+        except Exception as e:
+            print(f"Error loading course stats: {e}")
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        with self.lock:
+            names = list(self.courses)
+            tables = [self.courses[name].table for name in names]
+            courses = np.stack(tables) if tables else np.zeros((0, self.depth, self.width), dtype=np.uint32)
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.savez_compressed(f, background=self.background.table, names=np.array(names, dtype=str),
+                                        courses=courses,
+                                        course_visits=np.array([self.course_visits.get(name, 0) for name in names],
+                                                               dtype=np.int64),
+                                        total_visits=np.int64(self.total_visits))
+                os.replace(tmp_path, self.path)
+                self.dirty = False
+            except Exception as e:
+                print(f"Error saving course stats: {e}")
+
+    def get_stats(self):
+        return {
+            "courses": len(self.courses),
+            "memory_kb": (len(self.courses) + 1) * self.depth * self.width * 4 // 1024
+        }
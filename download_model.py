@@ -1,12 +1,28 @@
 import os
+import shutil
 import sys
+import tempfile
 
-def download_model():
+from model_store import ModelStore, MODEL_DIR
+
+def publish(staging, target):
+    """
+    Register every exported file with the model store in target.
+    Files are exported to a staging directory first so a re-export never
+    writes through the hard links into existing stored objects.
+    """
+    store = ModelStore(target)
+    names = [name for name in sorted(os.listdir(staging)) if os.path.isfile(os.path.join(staging, name))]
+    for name in names:
+        store.add(name, os.path.join(staging, name))
+    shutil.rmtree(staging, ignore_errors=True)
+    print(f"📦 Stored {len(names)} files in {target} (manifest.json)")
+
+def download_model(target=MODEL_DIR):
     print("🚀 Setting up AI Model for FocusWin...")
     
-    # Create model directory
-    if not os.path.exists("model"):
-        os.makedirs("model")
+    os.makedirs(target, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=target)
         
     print("📦 Installing dependencies...")
     try:
@@ -31,8 +47,9 @@ def download_model():
     tokenizer = AutoTokenizer.from_pretrained(model_id)
     model = AutoModelForSequenceClassification.from_pretrained(model_id)
     
-    # Save Tokenizer
-    tokenizer.save_pretrained("model")
+    # Save Tokenizer, and the config whose id2label tells the engine which logit is entailment
+    tokenizer.save_pretrained(staging)
+    model.config.save_pretrained(staging)
     print("✅ Tokenizer saved.")
     
     # Export to ONNX
@@ -42,7 +59,7 @@ def download_model():
     torch.onnx.export(
         model, 
         (dummy_input["input_ids"], dummy_input["attention_mask"]), 
-        "model/model.onnx",
+        os.path.join(staging, "model.onnx"),
         input_names=["input_ids", "attention_mask"],
         output_names=["logits"],
         dynamic_axes={
@@ -51,8 +68,85 @@ def download_model():
         },
         opset_version=11
     )
-    print("✅ Model converted to ONNX: model/model.onnx")
+    print("✅ Model converted to ONNX")
+    
+    quantize_model(staging)
+    publish(staging, target)
     print("\n🎉 Setup Complete! You can now run the app with AI detection.")
 
+def download_embedder(model_id="sentence-transformers/all-MiniLM-L6-v2", target=os.path.join(MODEL_DIR, "embedder")):
+    """
+    Export a small sentence encoder for the "prototype" classifier mode.
+    The ONNX graph outputs token embeddings; the engine mean-pools them.
+    """
+    from transformers import AutoTokenizer, AutoModel
+    import torch
+    
+    print(f"⬇️  Downloading sentence encoder {model_id}...")
+    os.makedirs(target, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=target)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModel.from_pretrained(model_id)
+    model.eval()
+    tokenizer.save_pretrained(staging)
+    
+    print("🔄 Converting sentence encoder to ONNX...")
+    dummy_input = tokenizer("This is a test", return_tensors="pt")
+    torch.onnx.export(
+        model,
+        (dummy_input["input_ids"], dummy_input["attention_mask"], dummy_input["token_type_ids"]),
+        os.path.join(staging, "model.onnx"),
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch_size", 1: "sequence_length"},
+            "attention_mask": {0: "batch_size", 1: "sequence_length"},
+            "token_type_ids": {0: "batch_size", 1: "sequence_length"},
+            "last_hidden_state": {0: "batch_size", 1: "sequence_length"}
+        },
+        opset_version=11
+    )
+    print("✅ Sentence encoder converted to ONNX")
+    
+    quantize_model(staging)
+    publish(staging, target)
+
+def quantize_model(model_dir=MODEL_DIR, source="model.onnx", target="model.int8.onnx"):
+    """
+    Build a dynamically quantized int8 copy of the exported model.
+    Weights are stored as int8 and activations quantized at run time, which
+    roughly quarters the file size and speeds up MatMul-heavy layers on CPU.
+    Returns the path of the quantized model, or None if it couldn't be built.
+    """
+    source_path = os.path.join(model_dir, source)
+    target_path = os.path.join(model_dir, target)
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError:
+        print("⚠️  onnxruntime quantization tools not available - skipping int8 model")
+        return None
+    
+    print("🔄 Quantizing model to int8...")
+    if os.path.exists(target_path):
+        os.remove(target_path)  # May be a hard link into the model store; don't overwrite the object
+    try:
+        quantize_dynamic(source_path, target_path, weight_type=QuantType.QInt8)
+    except Exception as e:
+        print(f"❌ Failed to quantize model: {e}")
+        return None
+    
+    size_mb = lambda path: os.path.getsize(path) / (1024 * 1024)
+    print(f"✅ Quantized model saved: {target_path} ({size_mb(source_path):.0f} MB -> {size_mb(target_path):.0f} MB)")
+    return target_path
+
 if __name__ == "__main__":
-    download_model()
+    if "--quantize-only" in sys.argv:
+        if quantize_model():
+            ModelStore(MODEL_DIR).add("model.int8.onnx")
+    elif "--verify" in sys.argv:
+        results = ModelStore(MODEL_DIR).verify_all()
+        print(f"✅ {sum(results.values())}/{len(results)} stored files verified")
+    elif "--embedder" in sys.argv:
+        download_embedder()
+    else:
+        download_model()
@@ -1,13 +1,57 @@
+import os
+import threading
 import time
 from window_provider import get_window_provider
 from rule_engine import RuleEngine
 from ai_engine import AIInferenceEngine
+from inference_server import SharedInferenceEngine
+from verdict_cache import VerdictCache
+from async_classifier import AsyncClassifier
+from ngram_classifier import NgramClassifier, NGRAM_MODEL_PATH
+from model_store import resolve_model_path
+from model_manager import ModelManager
+from override_index import OverrideIndex
+from course_stats import CourseStats
 
 class FocusDetector:
-    def __init__(self):
-        self.window_provider = get_window_provider()
+    def __init__(self, ai_config=None, model_manager=None, window_provider=None, clock=time.time):
+        ai_config = ai_config or {}
+        self.window_provider = window_provider or get_window_provider()
+        self.clock = clock  # Replays drive the grace period with trace time
         self.rule_engine = RuleEngine()
-        self.ai_engine = AIInferenceEngine()
+        if ai_config.get('inference_socket'):
+            # Classify through the shared per-machine server, with the in-process model as fallback
+            self.ai_engine = SharedInferenceEngine(
+                ai_config['inference_socket'],
+                fallback=lambda: AIInferenceEngine.from_config(ai_config, lazy=ai_config.get('lazy_load', True))
+            )
+        else:
+            self.ai_engine = AIInferenceEngine.from_config(ai_config, lazy=ai_config.get('lazy_load', True))
+        
+        # The in-process session is released after it sits idle and reloaded on the next escalation
+        self.models = model_manager
+        if self.models is None:
+            self.models = ModelManager(idle_timeout=ai_config.get('model_idle_seconds', 300))
+            self.models.start()
+        if isinstance(self.ai_engine, AIInferenceEngine):
+            self.models.register('text_model', self._load_ai_engine, lambda engine: engine.unload())
+        
+        # Distilled n-gram model answers confident titles before the transformer is asked
+        self.ngram_classifier = self._load_ngram(ai_config.get('ngram_model', NGRAM_MODEL_PATH))
+        self.ngram_threshold = ai_config.get('ngram_threshold', 0.8)
+        self.ngram_stats = {"answered": 0, "escalated": 0}
+        
+        # Tokens learned from focused time in the current course count as study
+        course_stats_path = ai_config.get('course_stats_path', 'course_stats.npz')
+        self.course_stats = CourseStats(course_stats_path) if course_stats_path else None
+        self.course_threshold = ai_config.get('course_threshold', 0.9)
+        self.course = None
+        self.course_answered = 0
+        self.last_observed = None  # (course, app, title) last counted, so each visit counts once
+        
+        # AI runs off the update-loop thread; a tick waits at most ai_deadline for it
+        self.ai_classifier = AsyncClassifier(self._predict)
+        self.ai_deadline = ai_config.get('deadline_seconds', 0.05) # seconds
         
         # Grace Period State
         self.last_state = "focused"
@@ -15,10 +59,46 @@ class FocusDetector:
         self.grace_period_duration = 15.0 # seconds
         self.in_grace_period = False
         
-        # Caching
-        self.last_window_title = ""
-        self.last_app_name = ""
-        self.last_result = None
+        # Caching of rule/AI verdicts per normalized window
+        self.verdict_cache = VerdictCache(maxsize=512)
+        
+        # Windows the user labelled by hand win over rules and AI
+        overrides_path = ai_config.get('overrides_path', 'overrides.json')
+        self.overrides = OverrideIndex(overrides_path) if overrides_path else None
+        
+        # Change-driven evaluation: an unchanged window reuses the last verdict and
+        # only advances the grace period. Pushed changes arrive on the provider's thread.
+        self.last_window = None
+        self.last_verdict = None
+        self.last_override_version = None
+        self.current_window = None  # Last window seen, the target of "label this window"
+        self.evaluation_stats = {"ticks": 0, "evaluations": 0, "pushed": 0}
+        self.state_lock = threading.Lock()
+        self.on_change = None  # Optional callback with the focus result of each pushed change
+        self.push_active = None  # Optional predicate; pushed changes are ignored while it is False
+
+    def enable_push(self, callback=None, active=None):
+        """
+        Evaluate window changes as soon as the provider reports them and pass
+        the result to callback. With active, changes are only evaluated while
+        active() is true (e.g. during a session), so nothing is classified and
+        no model is loaded between sessions. Returns False if the provider can't push.
+        """
+        self.on_change = callback
+        self.push_active = active
+        return self.window_provider.subscribe(self._on_window_change)
+
+    def _on_window_change(self, app_name, window_title, has_permissions):
+        if self.push_active is not None and not self.push_active():
+            return
+        with self.state_lock:
+            self.evaluation_stats["pushed"] += 1
+            result = self._evaluate(app_name, window_title, has_permissions)
+        if self.on_change:
+            try:
+                self.on_change(result)
+            except Exception as e:
+                print(f"❌ Error in focus change callback: {e}")
 
     def get_focus_state(self):
         """
@@ -38,15 +118,87 @@ class FocusDetector:
                 "has_permissions": False
             }
         
-        # Optimization: If window hasn't changed, return cached result (but update grace period)
-        if app_name == self.last_app_name and window_title == self.last_window_title and self.last_result:
-             # We still need to check grace period expiry even if window is same
-             # e.g. User stays on YouTube Home for > 15s
-             pass 
+        with self.state_lock:
+            return self._evaluate(app_name, window_title, has_permissions)
+
+    def _evaluate(self, app_name, window_title, has_permissions):
+        self.evaluation_stats["ticks"] += 1
+        window = (app_name, window_title)
+        self.current_window = window
+        override = self.overrides.lookup(app_name, window_title) if self.overrides else None
+        override_version = self.overrides.version if self.overrides else None
+        if override:
+            final_state, reason = override
+            confidence, source = 1.0, "override"
+            self.last_window = None  # Classify afresh if the override is removed
+        elif window == self.last_window and self.last_verdict[3] != "pending" and \
+                override_version == self.last_override_version:
+            # Same window as last time: keep the verdict, just run the grace period below
+            final_state, confidence, reason, source = self.last_verdict
         else:
-            self.last_app_name = app_name
-            self.last_window_title = window_title
+            self.evaluation_stats["evaluations"] += 1
+            # Reuse the verdict for a window we've already classified
+            cached = self.verdict_cache.get(app_name, window_title)
+            if cached:
+                final_state, confidence, reason, source = cached
+            else:
+                final_state, confidence, reason, source = self._classify(app_name, window_title)
+                if source not in ("error", "pending"):
+                    self.verdict_cache.put(app_name, window_title, (final_state, confidence, reason, source))
+            self.last_window = window
+            self.last_verdict = (final_state, confidence, reason, source)
+            self.last_override_version = override_version
+
+        # Learn from verdicts that didn't come from the course statistics themselves, once per
+        # visit: neither the time spent on a window nor pushed re-evaluations add weight
+        visit = (self.course, app_name, window_title)
+        if self.course_stats is not None and source not in ("course", "pending", "error") and \
+                visit != self.last_observed:
+            self.last_observed = visit
+            self.course_stats.observe(self.course, window_title, final_state)
+
+        # Grace Period Logic
+        # If we switch FROM focused TO distracted, start grace period
+        if final_state == "distracted" and self.last_state == "focused":
+            if not self.in_grace_period:
+                print(f"🛡️ Entering Grace Period for {self.grace_period_duration}s")
+                self.in_grace_period = True
+                self.grace_period_start = self.clock()
+        
+        # If we are IN grace period
+        if self.in_grace_period:
+            elapsed = self.clock() - self.grace_period_start
+            if elapsed < self.grace_period_duration:
+                # Still in grace period - override to "searching" or "focused"
+                # "searching" is a good neutral state that doesn't penalize but warns
+                if final_state == "distracted":
+                    final_state = "searching" # Neutral state
+                    reason = f"Grace Period ({int(self.grace_period_duration - elapsed)}s left)"
+            else:
+                # Grace period expired
+                self.in_grace_period = False
+                print("⚠️ Grace Period Expired!")
+
+        # If we switch back to focused, reset grace period
+        if final_state == "focused":
+            self.in_grace_period = False
+            self.grace_period_start = None
+
+        self.last_state = final_state
         
+        return {
+            "state": final_state,
+            "confidence": confidence,
+            "reason": reason,
+            "source": source,
+            "app_name": app_name,
+            "window_title": window_title,
+            "has_permissions": has_permissions,
+            "sequence": self.evaluation_stats["ticks"]  # Orders pushed and polled results
+        }
+
+    def _classify(self, app_name, window_title):
+        """Rules first, then course statistics, the n-gram model and AI. Returns (state, confidence, reason, source)."""
         # 1. Rule-Based Check (Fast)
         try:
             rule_state, rule_conf, rule_reason = self.rule_engine.analyze(app_name, window_title)
@@ -66,9 +218,37 @@ class FocusDetector:
             confidence = rule_conf
             reason = rule_reason
         else:
-            # 2. AI Check (Slow/Fallback)
+            # 2. Title tokens strongly associated with the current course
+            if self.course_stats is not None and self.course:
+                score, token = self.course_stats.association(self.course, window_title)
+                if score >= self.course_threshold:
+                    self.course_answered += 1
+                    return "focused", score, f"Associated with {self.course} (\"{token}\")", "course"
+            
+            # 3. Distilled n-gram model (microseconds) - escalates low-confidence titles
+            if self.ngram_classifier is not None:
+                try:
+                    ngram_state, ngram_conf = self.ngram_classifier.predict(f"{app_name} {window_title}")
+                    if ngram_conf >= self.ngram_threshold:
+                        self.ngram_stats["answered"] += 1
+                        return ngram_state, ngram_conf, f"Fast model classified as {ngram_state} ({int(ngram_conf*100)}%)", "ngram"
+                    self.ngram_stats["escalated"] += 1
+                except Exception as e:
+                    print(f"❌ Error in n-gram classifier: {e}")
+            
+            # 4. AI Check (Slow/Fallback) - runs in the background with a deadline
             try:
-                ai_state, ai_conf = self.ai_engine.predict(f"{app_name} {window_title}")
+                ai_result = None
+                if self.ai_engine.enabled:
+                    ai_result = self.ai_classifier.classify(
+                        VerdictCache.key(app_name, window_title),
+                        f"{app_name} {window_title}",
+                        timeout=self.ai_deadline
+                    )
+                    if ai_result is None:
+                        # Not ready yet - use the default now, a later tick picks up the verdict
+                        return "distracted", 0.5, "AI classification pending", "pending"
+                ai_state, ai_conf = ai_result or ("unknown", 0.0)
                 if ai_state != "unknown" and ai_conf > 0.6:  # Lowered from 0.7 to 0.6
                     final_state = ai_state
                     confidence = ai_conf
@@ -88,41 +268,68 @@ class FocusDetector:
                 reason = f"AI error: {str(e)}"
                 source = "error"
 
-        # 3. Grace Period Logic
-        # If we switch FROM focused TO distracted, start grace period
-        if final_state == "distracted" and self.last_state == "focused":
-            if not self.in_grace_period:
-                print(f"🛡️ Entering Grace Period for {self.grace_period_duration}s")
-                self.in_grace_period = True
-                self.grace_period_start = time.time()
-        
-        # If we are IN grace period
-        if self.in_grace_period:
-            elapsed = time.time() - self.grace_period_start
-            if elapsed < self.grace_period_duration:
-                # Still in grace period - override to "searching" or "focused"
-                # "searching" is a good neutral state that doesn't penalize but warns
-                if final_state == "distracted":
-                    final_state = "searching" # Neutral state
-                    reason = f"Grace Period ({int(self.grace_period_duration - elapsed)}s left)"
-            else:
-                # Grace period expired
-                self.in_grace_period = False
-                print("⚠️ Grace Period Expired!")
+        return final_state, confidence, reason, source
 
-        # If we switch back to focused, reset grace period
-        if final_state == "focused":
-            self.in_grace_period = False
-            self.grace_period_start = None
+    def _load_ai_engine(self):
+        return self.ai_engine if self.ai_engine.load() else None
 
-        self.last_state = final_state
-        
-        return {
-            "state": final_state,
-            "confidence": confidence,
-            "reason": reason,
-            "source": source,
-            "app_name": app_name,
-            "window_title": window_title,
-            "has_permissions": has_permissions
-        }
+    def _predict(self, text):
+        # Held through the call so an idle eviction can't drop the session mid-prediction.
+        # A shared-server engine isn't managed (use() yields None) and is called directly.
+        with self.models.use('text_model') as engine:
+            return (engine or self.ai_engine).predict(text)
+
+    def set_course(self, course):
+        """Course of the running session (None between sessions)"""
+        course = course or None
+        if course == self.course:
+            return
+        with self.state_lock:
+            previous, self.course = self.course, course
+            # Cached verdicts may depend on the previous course
+            self.verdict_cache.clear()
+            self.last_window = None
+        if previous and self.course_stats is not None:
+            self.course_stats.save()
+
+    def add_override(self, state, app_name, window_title=None, scope="window", tokens=None):
+        """Label a window, a token set or an app by hand (see OverrideIndex.add)"""
+        if self.overrides is None:
+            raise ValueError("Overrides are disabled")
+        return self.overrides.add(state, app_name, window_title, scope, tokens)
+
+    def remove_override(self, app_name, window_title=None, scope="window", tokens=None):
+        if self.overrides is None:
+            return False
+        return self.overrides.remove(app_name, window_title, scope, tokens)
+
+    def get_evaluation_stats(self):
+        """Ticks, how many of them re-classified the window, and pushed changes"""
+        stats = dict(self.evaluation_stats)
+        stats["reuse_rate"] = round(1 - stats["evaluations"] / stats["ticks"], 3) if stats["ticks"] else 0.0
+        return stats
+
+    def get_cache_stats(self):
+        """Hit-rate statistics of the verdict cache"""
+        return self.verdict_cache.get_stats()
+
+    def get_ai_stats(self):
+        """Background AI classification and n-gram escalation counters"""
+        stats = self.ai_classifier.get_stats()
+        stats.update({f"ngram_{k}": v for k, v in self.ngram_stats.items()})
+        stats["course_answered"] = self.course_answered
+        return stats
+
+    def _load_ngram(self, path):
+        if not path:
+            return None
+        path = resolve_model_path(path)
+        if not os.path.exists(path):
+            return None
+        try:
+            classifier = NgramClassifier.load(path)
+            print(f"✅ N-gram classifier loaded ({path})")
+            return classifier
+        except Exception as e:
+            print(f"❌ Error loading n-gram classifier: {e}")
+            return None
@@ -0,0 +1,487 @@
+"""
+Shared Local Inference Server
+Hosts the text classifier and the YOLO phone detector once per user and
+serves every tracker process (web app, camera worker) over a Unix socket, so
+they don't each load their own copy of the models.
+- Requests arriving within a short window are batched into one model call
+- Messages are length-prefixed JSON headers with an optional binary payload
+  (JPEG frames); nothing is unpickled
+- The socket lives in a private (0700) per-user directory and is itself 0600.
+  Clients check that the socket and the process serving it belong to their
+  own user before sending anything, so camera frames never reach another user
+- Clients fall back to in-process models when the server is absent or untrusted
+
+    python inference_server.py                       # text + phone models
+    python inference_server.py --no-phone --window-ms 10
+"""
+
+import json
+import os
+import queue
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+
+def default_socket_dir() -> str:
+    """Per-user runtime directory: $XDG_RUNTIME_DIR when set, else a private one in the temp dir"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "focuswin")
+    return os.path.join(tempfile.gettempdir(), f"focuswin-{os.getuid()}")
+
+
+DEFAULT_SOCKET_PATH = os.path.join(default_socket_dir(), "inference.sock")
+
+_FRAME = struct.Struct('!II')  # header length, payload length
+MAX_HEADER_BYTES = 1 << 20
+MAX_PAYLOAD_BYTES = 16 << 20
+
+
+class InferenceUnavailable(Exception):
+    """The server could not be reached or failed to answer"""
+
+
+def ensure_private_dir(path: str):
+    """Create path with mode 0700, or check an existing one is ours and closed to other users"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    check_private_dir(path)
+
+
+def check_private_dir(path: str):
+    """Raise RuntimeError unless path is a directory owned by this user with no access for others"""
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise RuntimeError(f"{path} is not a directory owned by this user")
+    if info.st_mode & 0o077:
+        raise RuntimeError(f"{path} is accessible to other users (mode {stat.S_IMODE(info.st_mode):o}), "
+                           f"expected 0700")
+
+
+def peer_uid(sock: socket.socket) -> Optional[int]:
+    """User id of the process at the other end of a Unix socket, or None if the platform can't tell"""
+    if hasattr(socket, "SO_PEERCRED"):  # Linux: struct ucred {pid, uid, gid}
+        _, uid, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                                        struct.calcsize('3i')))
+        return uid
+    if sys.platform == "darwin" or sys.platform.startswith("freebsd"):
+        # struct xucred {version, uid, ngroups, groups[16], ...}; not every Python build exports the
+        # constants, so fall back to their values from <sys/un.h>
+        level = getattr(socket, "SOL_LOCAL", 0)
+        option = getattr(socket, "LOCAL_PEERCRED", 0x001)
+        try:
+            data = sock.getsockopt(level, option, struct.calcsize('IIh16IP'))
+        except OSError:
+            return None
+        _, uid = struct.unpack_from('Ii', data)
+        return uid
+    return None
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b""):
+    data = json.dumps(header).encode('utf-8')
+    sock.sendall(_FRAME.pack(len(data), len(payload)) + data + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 16))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock: socket.socket) -> Tuple[dict, bytes]:
+    header_len, payload_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    if header_len > MAX_HEADER_BYTES or payload_len > MAX_PAYLOAD_BYTES:
+        raise ConnectionError("Message too large")
+    header = json.loads(_recv_exact(sock, header_len).decode('utf-8'))
+    return header, _recv_exact(sock, payload_len) if payload_len else b""
+
+
+class MicroBatcher:
+    """Collects items submitted by concurrent callers for up to `window` seconds
+    and runs them through `fn` as one batch"""
+
+    def __init__(self, fn: Callable[[list], list], window: float = 0.005, max_batch: int = 32):
+        self.fn = fn
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.stats = {"requests": 0, "items": 0, "batches": 0}
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, items: list, timeout: Optional[float] = None) -> list:
+        """Run items as part of the next batch and return their results"""
+        slot = {"done": threading.Event(), "results": None, "error": None}
+        self.requests.put((list(items), slot))
+        if not slot["done"].wait(timeout):
+            raise TimeoutError("Batch did not complete in time")
+        if slot["error"] is not None:
+            raise slot["error"]
+        return slot["results"]
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["mean_batch"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
+
+    def _loop(self):
+        while True:
+            pending = [self.requests.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(request)
+                size += len(request[0])
+
+            items = [item for request_items, _ in pending for item in request_items]
+            try:
+                results = self.fn(items) if items else []
+                error = None
+            except Exception as e:
+                results, error = [], e
+
+            self.stats["requests"] += len(pending)
+            self.stats["items"] += len(items)
+            self.stats["batches"] += 1
+            offset = 0
+            for request_items, slot in pending:
+                slot["results"] = results[offset:offset + len(request_items)]
+                slot["error"] = error
+                offset += len(request_items)
+                slot["done"].set()
+
+
+class InferenceServer:
+    """Serves batched text classification and phone detection on a Unix socket"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, text_engine=None,
+                 phone_detector: Optional[Callable[[List[bytes]], list]] = None,
+                 window: float = 0.005, max_batch: int = 32):
+        """
+        Args:
+            text_engine: Object with predict_batch(texts) -> [(state, confidence)]
+            phone_detector: Callable taking JPEG frames, returning [(detected, bbox)]
+            window: Seconds to wait for more requests before running a batch
+        """
+        self.socket_path = socket_path
+        self.text_engine = text_engine
+        self.text_batcher = MicroBatcher(text_engine.predict_batch, window, max_batch) if text_engine else None
+        self.phone_batcher = MicroBatcher(phone_detector, window, max_batch) if phone_detector else None
+        self.listener = None
+        self.running = False
+        self.accept_thread = None
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+
+    def start(self):
+        """Bind the socket and accept clients on a background thread"""
+        ensure_private_dir(os.path.dirname(os.path.abspath(self.socket_path)))
+        if os.path.exists(self.socket_path):
+            if _socket_alive(self.socket_path):
+                raise RuntimeError(f"Another inference server is listening on {self.socket_path}")
+            os.remove(self.socket_path)  # Stale socket from a crashed server
+
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)  # Only our own user; the 0700 directory covers the gap since bind
+        self.listener.listen(16)
+        self.running = True
+        self.accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self.accept_thread.start()
+        print(f"🧠 Inference server listening on {self.socket_path}")
+
+    def stop(self):
+        self.running = False
+        if self.listener:
+            try:
+                self.listener.close()
+            except OSError:
+                pass
+        with self.connections_lock:
+            connections = list(self.connections)
+        for conn in connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while self.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def get_stats(self):
+        return {
+            "clients": len(self.connections),
+            "text": self.text_batcher.get_stats() if self.text_batcher else None,
+            "phone": self.phone_batcher.get_stats() if self.phone_batcher else None,
+        }
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def _serve_client(self, conn: socket.socket):
+        with self.connections_lock:
+            self.connections.add(conn)
+        try:
+            while self.running:
+                try:
+                    header, payload = recv_message(conn)
+                except (ConnectionError, OSError, ValueError):
+                    break
+                send_message(conn, self._handle(header, payload))
+        except OSError:
+            pass
+        finally:
+            with self.connections_lock:
+                self.connections.discard(conn)
+            conn.close()
+
+    def _handle(self, header: dict, payload: bytes) -> dict:
+        op = header.get("op")
+        try:
+            if op == "ping":
+                return {"ok": True, "text": self.text_batcher is not None, "phone": self.phone_batcher is not None}
+            if op == "classify" and self.text_batcher:
+                results = self.text_batcher.submit(header.get("texts", []), timeout=30)
+                return {"ok": True, "results": [[state, float(conf)] for state, conf in results]}
+            if op == "phone" and self.phone_batcher:
+                detected, bbox = self.phone_batcher.submit([payload], timeout=30)[0]
+                return {"ok": True, "detected": bool(detected), "bbox": list(bbox) if bbox else None}
+            return {"ok": False, "error": f"Unsupported operation: {op}"}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+
+def _socket_alive(path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.settimeout(0.5)
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+class InferenceClient:
+    """Blocking client for InferenceServer; one request in flight at a time"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 2.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.sock = None
+        self.lock = threading.Lock()
+
+    def request(self, header: dict, payload: bytes = b"") -> dict:
+        with self.lock:
+            try:
+                if self.sock is None:
+                    self.sock = self._connect()
+                send_message(self.sock, header, payload)
+                response, _ = recv_message(self.sock)
+            except (OSError, ConnectionError, ValueError) as e:
+                self._close()
+                raise InferenceUnavailable(str(e))
+        if not response.get("ok"):
+            raise InferenceUnavailable(response.get("error", "Request failed"))
+        return response
+
+    def _connect(self) -> socket.socket:
+        """Connect and make sure our own user runs the server before anything is sent"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            if os.stat(self.socket_path).st_uid != os.getuid():
+                raise InferenceUnavailable(f"{self.socket_path} belongs to another user")
+            sock.connect(self.socket_path)
+            uid = peer_uid(sock)
+            if uid is None:
+                # No peer credentials here: only our own user can reach a socket in a private directory
+                try:
+                    check_private_dir(os.path.dirname(os.path.abspath(self.socket_path)))
+                except RuntimeError as e:
+                    raise InferenceUnavailable(f"Cannot verify the inference server's user: {e}")
+            elif uid != os.getuid():
+                raise InferenceUnavailable("Inference server runs as another user")
+            return sock
+        except BaseException:
+            sock.close()
+            raise
+
+    def ping(self) -> dict:
+        return self.request({"op": "ping"})
+
+    def classify(self, texts: List[str]) -> List[Tuple[str, float]]:
+        return [(state, conf) for state, conf in self.request({"op": "classify", "texts": list(texts)})["results"]]
+
+    def detect_phone(self, jpeg: bytes) -> Tuple[bool, Optional[tuple]]:
+        response = self.request({"op": "phone"}, jpeg)
+        return response["detected"], tuple(response["bbox"]) if response["bbox"] else None
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+    def _close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+
+class SharedInferenceEngine:
+    """
+    Drop-in for AIInferenceEngine that classifies through the shared server.
+    When the server is absent or fails, it builds the in-process engine with
+    `fallback` and uses that, retrying the server every `retry_interval` seconds.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, fallback: Optional[Callable] = None,
+                 retry_interval: float = 30.0, timeout: float = 2.0):
+        self.client = InferenceClient(socket_path, timeout=timeout)
+        self.fallback_factory = fallback
+        self.fallback = None
+        self.retry_interval = retry_interval
+        self.remote = False
+        self.last_failure = None
+        self.enabled = False
+
+        reason = "no text model"
+        try:
+            self.remote = bool(self.client.ping().get("text"))
+        except InferenceUnavailable as e:
+            reason = str(e)
+        if self.remote:
+            print(f"✅ Using shared inference server at {socket_path}")
+            self.enabled = True
+        else:
+            print(f"⚠️ Shared inference server at {socket_path} unavailable ({reason}) - using in-process model")
+            self.last_failure = time.monotonic()
+            self.enabled = self._local() is not None and self._local().enabled
+
+    def _local(self):
+        if self.fallback is None and self.fallback_factory is not None:
+            self.fallback = self.fallback_factory()
+        return self.fallback
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts, batch_size=32):
+        retry_due = self.last_failure is None or time.monotonic() - self.last_failure >= self.retry_interval
+        if self.remote or retry_due:
+            try:
+                results = self.client.classify(texts)
+                if not self.remote:
+                    print("✅ Shared inference server available again")
+                self.remote, self.last_failure, self.enabled = True, None, True
+                return results
+            except InferenceUnavailable as e:
+                if self.remote:
+                    print(f"⚠️ Shared inference server failed ({e}) - falling back to in-process model")
+                self.remote, self.last_failure = False, time.monotonic()
+
+        local = self._local()
+        if local is None or not local.enabled:
+            return [("unknown", 0.0)] * len(texts)
+        return local.predict_batch(texts, batch_size=batch_size)
+
+
+class YoloPhoneDetector:
+    """Batched YOLO phone detection over JPEG frames (server side)"""
+
+    def __init__(self, weights: str = 'yolov8n.pt'):
+        from ultralytics import YOLO
+        self.model = YOLO(weights)
+
+    def __call__(self, jpegs: List[bytes]) -> list:
+        import cv2
+        import numpy as np
+        from camera_detector import parse_phone_boxes
+
+        frames = [cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR) for data in jpegs]
+        valid = [i for i, frame in enumerate(frames) if frame is not None]
+        results = [(False, None)] * len(frames)
+        if valid:
+            batch = self.model([frames[i] for i in valid], classes=[67], verbose=False)
+            for i, result in zip(valid, batch):
+                results[i] = parse_phone_boxes(result)
+        return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared local inference server")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    parser.add_argument('--window-ms', type=float, default=5.0, help="Batching window")
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--no-text', action='store_true', help="Don't host the text classifier")
+    parser.add_argument('--no-phone', action='store_true', help="Don't host the YOLO phone detector")
+    args = parser.parse_args()
+
+    text_engine = None
+    if not args.no_text:
+        from ai_engine import AIInferenceEngine
+        try:
+            with open('ai_config.json', 'r') as f:
+                ai_config = json.load(f)
+        except FileNotFoundError:
+            ai_config = {}
+        text_engine = AIInferenceEngine.from_config(ai_config)
+        if not text_engine.enabled:
+            text_engine = None
+
+    phone_detector = None
+    if not args.no_phone:
+        try:
+            phone_detector = YoloPhoneDetector()
+        except Exception as e:
+            print(f"⚠️ Phone detector unavailable: {e}")
+
+    if text_engine is None and phone_detector is None:
+        print("❌ No models to serve")
+        return 1
+
+    InferenceServer(args.socket, text_engine, phone_detector,
+                    window=args.window_ms / 1000, max_batch=args.max_batch).serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
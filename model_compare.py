@@ -0,0 +1,156 @@
+"""
+Model Variant Comparison
+Loads two ONNX variants from a local model directory (by default the fp32
+export and its int8 quantization) and reports load time, file size, resident
+memory, per-title latency, batch throughput and label agreement on a corpus
+of window titles. Works offline against any directory holding the model
+files and a tokenizer.json.
+
+    python model_compare.py                            # model/, synthetic corpus
+    python model_compare.py --model-dir tiny_model --titles titles.tsv
+    python model_compare.py --baseline fp32 --candidate int8 --json report.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+from ai_engine import AIInferenceEngine, MODEL_VARIANTS
+from model_manager import rss_mb
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def agreement(baseline, candidate):
+    """
+    Compare two lists of (label, confidence) predictions
+    Returns: dict with overall agreement, per-label agreement and mean confidence drift
+    """
+    if len(baseline) != len(candidate):
+        raise ValueError("Prediction lists differ in length")
+
+    per_label = {}
+    matches = 0
+    drift = 0.0
+    for (label_a, conf_a), (label_b, conf_b) in zip(baseline, candidate):
+        same = label_a == label_b
+        matches += same
+        stats = per_label.setdefault(label_a, [0, 0])
+        stats[0] += same
+        stats[1] += 1
+        drift += abs(conf_a - conf_b)
+
+    n = len(baseline)
+    return {
+        "agreement": round(matches / n, 4) if n else 0.0,
+        "per_label": {label: round(hit / total, 4) for label, (hit, total) in sorted(per_label.items())},
+        "mean_confidence_drift": round(drift / n, 4) if n else 0.0,
+    }
+
+
+def profile(model_dir, variant, texts, repeat=1, batch_size=32):
+    """Load one variant and time it on texts. Returns (stats, predictions)."""
+    model_path = os.path.join(model_dir, MODEL_VARIANTS.get(variant, variant))
+    tokenizer_path = os.path.join(model_dir, "tokenizer.json")
+    if not os.path.exists(model_path) or not os.path.exists(tokenizer_path):
+        raise FileNotFoundError(f"{variant}: {model_path} or {tokenizer_path} not found")
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    engine = AIInferenceEngine(model_path=model_path, tokenizer_path=tokenizer_path)
+    load_seconds = time.perf_counter() - started
+    if not engine.enabled:
+        raise RuntimeError(f"{variant}: model failed to load")
+
+    # One title per call, as the update loop issues them
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            started = time.perf_counter()
+            engine.predict(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    predictions = engine.predict_batch(texts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - started
+
+    stats = {
+        "variant": variant,
+        "file_mb": round(os.path.getsize(model_path) / (1024 * 1024), 1),
+        "load_ms": round(load_seconds * 1000, 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "batch_titles_per_s": round(len(texts) / batch_seconds, 1) if batch_seconds else 0.0,
+    }
+    return stats, predictions
+
+
+def compare(model_dir, texts, baseline="fp32", candidate="int8", repeat=1, batch_size=32):
+    """Profile both variants on the same texts and measure how often they agree"""
+    base_stats, base_predictions = profile(model_dir, baseline, texts, repeat, batch_size)
+    cand_stats, cand_predictions = profile(model_dir, candidate, texts, repeat, batch_size)
+    return {
+        "titles": len(texts),
+        "baseline": base_stats,
+        "candidate": cand_stats,
+        **agreement(base_predictions, cand_predictions),
+    }
+
+
+def load_texts(path):
+    """One "app<TAB>title" (or bare title) per line, joined the way FocusDetector does"""
+    texts = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line:
+                app, _, title = line.partition('\t')
+                texts.append(f"{app} {title}" if title else app)
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ONNX model variants")
+    parser.add_argument('--model-dir', default="model")
+    parser.add_argument('--baseline', default="fp32", help=f"Variant name ({', '.join(MODEL_VARIANTS)}) or file name")
+    parser.add_argument('--candidate', default="int8", help="Variant name or file name")
+    parser.add_argument('--titles', help="Tab-separated app/title file (default: synthetic corpus)")
+    parser.add_argument('--size', type=int, default=500, help="Synthetic corpus size")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--json', help="Also write the report to this file")
+    args = parser.parse_args()
+
+    if args.titles:
+        texts = load_texts(args.titles)
+    else:
+        from rule_benchmark import synthetic_corpus
+        from rule_engine import RuleEngine
+        texts = [f"{app} {title}" for app, title in synthetic_corpus(RuleEngine(), args.size)]
+
+    report = compare(args.model_dir, texts, args.baseline, args.candidate, args.repeat)
+
+    print(f"\nCorpus: {report['titles']} titles")
+    print(f"{'variant':<10} {'file MB':>8} {'load ms':>9} {'RSS +MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch/s':>9}")
+    for side in ("baseline", "candidate"):
+        s = report[side]
+        print(f"{s['variant']:<10} {s['file_mb']:>8} {s['load_ms']:>9} {s['rss_delta_mb']:>8} "
+              f"{s['p50_ms']:>8} {s['p95_ms']:>8} {s['batch_titles_per_s']:>9}")
+    print(f"\nLabel agreement: {report['agreement']:.1%}   Mean confidence drift: {report['mean_confidence_drift']:.3f}")
+    for label, rate in report['per_label'].items():
+        print(f"  {label:<12} {rate:.1%}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""
+Model Lifecycle Manager
+Owns the heavyweight models (YOLO, the MediaPipe graphs, the ONNX text model)
+so they are only resident while something uses them.
+- A model is loaded on first use and remembers when it was last used
+- Models idle for longer than their timeout are unloaded; when the loaded
+  models exceed the memory budget, the least recently used idle ones go first
+- The growth in process RSS while a model loads is attributed to it
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+def rss_mb():
+    """Current resident set size of this process in MB (0.0 when unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, KB on Linux; it's a peak, not current usage
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except Exception:
+        return 0.0
+
+
+class ManagedModel:
+    """One registered model and its usage bookkeeping"""
+
+    def __init__(self, name: str, loader: Callable, unloader: Optional[Callable], idle_timeout: Optional[float]):
+        self.name = name
+        self.loader = loader  # () -> model, or None if it can't be loaded
+        self.unloader = unloader  # (model) -> None, e.g. close()
+        self.idle_timeout = idle_timeout
+        self.lock = threading.RLock()  # Held while loading/unloading
+        self.model = None
+        self.failed = False
+        self.in_use = 0
+        self.last_used = None
+        self.rss_mb = 0.0
+        self.loads = 0
+        self.unloads = 0
+
+
+class ModelManager:
+    """Loads registered models on demand and unloads them when idle or over budget"""
+
+    def __init__(self, idle_timeout: Optional[float] = 300.0, memory_budget_mb: Optional[float] = None,
+                 check_interval: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            idle_timeout: Default seconds without use before a model is unloaded (None: never)
+            memory_budget_mb: Cap on the attributed memory of loaded models (None: no cap)
+            check_interval: Seconds between idle checks of the background thread
+        """
+        self.idle_timeout = idle_timeout
+        self.memory_budget_mb = memory_budget_mb
+        self.check_interval = check_interval
+        self.clock = clock
+        self.models: Dict[str, ManagedModel] = {}
+        self.running = False
+        self.thread = None
+        self.wakeup = threading.Event()
+
+    def register(self, name: str, loader: Callable, unloader: Optional[Callable] = None,
+                 idle_timeout: Optional[float] = -1):
+        """Register a model; idle_timeout overrides the manager default (None: never unload when idle)"""
+        timeout = self.idle_timeout if idle_timeout == -1 else idle_timeout
+        self.models[name] = ManagedModel(name, loader, unloader, timeout)
+
+    def available(self, name: str) -> bool:
+        """False once the model failed to load (until reset)"""
+        entry = self.models.get(name)
+        return entry is not None and not entry.failed
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self.models.get(name)
+        return entry is not None and entry.model is not None
+
+    def reset(self, name: str):
+        """Allow another load attempt after a failure"""
+        self.models[name].failed = False
+
+    def acquire(self, name: str):
+        """Load the model if needed and mark it in use. Returns None if it can't be loaded."""
+        entry = self.models.get(name)
+        if entry is None:
+            return None
+        loaded = False
+        with entry.lock:
+            if entry.model is None and not entry.failed:
+                loaded = self._load(entry)
+            if entry.model is None:
+                return None
+            entry.in_use += 1
+            entry.last_used = self.clock()
+            model = entry.model
+        if loaded:
+            self._enforce_budget()  # Outside the lock: evicting takes other models' locks
+        return model
+
+    def release(self, name: str):
+        entry = self.models[name]
+        with entry.lock:
+            entry.in_use = max(0, entry.in_use - 1)
+            entry.last_used = self.clock()
+
+    @contextmanager
+    def use(self, name: str):
+        """Hold a model for the duration of the block; it is never unloaded while held"""
+        model = self.acquire(name)
+        try:
+            yield model
+        finally:
+            if model is not None:
+                self.release(name)
+
+    def get(self, name: str):
+        """Load if needed and record a use, for models used without holding them"""
+        model = self.acquire(name)
+        if model is not None:
+            self.release(name)
+        return model
+
+    def _load(self, entry: ManagedModel) -> bool:
+        rss_before = rss_mb()
+        started = time.time()
+        try:
+            model = entry.loader()
+        except Exception as e:
+            print(f"❌ Error loading {entry.name}: {e}")
+            model = None
+        if model is None:
+            entry.failed = True
+            return False
+        entry.model = model
+        entry.rss_mb = max(0.0, rss_mb() - rss_before)
+        entry.loads += 1
+        print(f"📦 Loaded {entry.name} in {time.time() - started:.1f}s (+{entry.rss_mb:.0f} MB)")
+        return True
+
+    def unload(self, name: str) -> bool:
+        """Unload a model unless something holds it. Returns True if it was unloaded."""
+        entry = self.models.get(name)
+        if entry is None:
+            return False
+        with entry.lock:
+            if entry.model is None or entry.in_use:
+                return False
+            model, entry.model = entry.model, None
+            entry.unloads += 1
+            entry.rss_mb = 0.0
+        if entry.unloader is not None:
+            try:
+                entry.unloader(model)
+            except Exception as e:
+                print(f"Error unloading {name}: {e}")
+        return True
+
+    def unload_all(self, names: Optional[List[str]] = None) -> List[str]:
+        return [name for name in (names or list(self.models)) if self.unload(name)]
+
+    def evict(self) -> List[str]:
+        """Unload models past their idle timeout, then enforce the memory budget"""
+        now = self.clock()
+        evicted = []
+        for entry in list(self.models.values()):
+            if (entry.model is not None and not entry.in_use and entry.idle_timeout is not None
+                    and now - entry.last_used >= entry.idle_timeout and self.unload(entry.name)):
+                print(f"💤 Unloaded {entry.name} after {now - entry.last_used:.0f}s idle")
+                evicted.append(entry.name)
+        return evicted + self._enforce_budget()
+
+    def _enforce_budget(self) -> List[str]:
+        if self.memory_budget_mb is None:
+            return []
+        evicted = []
+        idle = sorted((e for e in self.models.values() if e.model is not None and not e.in_use),
+                      key=lambda e: e.last_used)
+        for entry in idle:
+            if self.resident_mb() <= self.memory_budget_mb:
+                break
+            if self.unload(entry.name):
+                print(f"💤 Unloaded {entry.name} to stay under {self.memory_budget_mb:.0f} MB")
+                evicted.append(entry.name)
+        return evicted
+
+    def resident_mb(self) -> float:
+        """Memory attributed to the loaded models"""
+        return sum(e.rss_mb for e in self.models.values() if e.model is not None)
+
+    def start(self):
+        """Check for idle models on a background thread"""
+        if self.running:
+            return
+        if self.thread is not None:
+            self.thread.join()  # A stopped reaper exits as soon as it wakes up
+        self.running = True
+        self.wakeup.clear()
+        self.thread = threading.Thread(target=self._evict_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+    def _evict_loop(self):
+        while self.running:
+            self.wakeup.wait(self.check_interval)
+            if self.running:
+                self.evict()
+
+    def get_stats(self) -> Dict:
+        now = self.clock()
+        models = {}
+        for name, entry in self.models.items():
+            models[name] = {
+                "loaded": entry.model is not None,
+                "in_use": entry.in_use,
+                "failed": entry.failed,
+                "idle_seconds": round(now - entry.last_used, 1) if entry.last_used is not None else None,
+                "rss_mb": round(entry.rss_mb, 1),
+                "loads": entry.loads,
+                "unloads": entry.unloads,
+            }
+        return {
+            "models": models,
+            "resident_mb": round(self.resident_mb(), 1),
+            "process_rss_mb": round(rss_mb(), 1),
+            "memory_budget_mb": self.memory_budget_mb,
+        }
@@ -0,0 +1,163 @@
+"""
+Local Model Artifact Store
+Content-addressed storage for model files so offline starts are fast and
+deterministic.
+- Each file lives once under objects/<sha256>; the familiar name in the model
+  directory (model.onnx, tokenizer.json, ...) is a hard link or copy of it
+- manifest.json records the digest and size of every name. A full checksum is
+  only recomputed when the object's size or mtime changes
+- Optimized onnxruntime graphs are cached under cache/, keyed on the source
+  digest, the onnxruntime version and the optimization level
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Dict, Optional
+
+# Model directory next to this file, so the app doesn't depend on the working directory
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model")
+
+
+def resolve_model_path(path: str) -> str:
+    """Resolve a relative model path against the application directory"""
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+
+
+def sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ChecksumError(Exception):
+    """A stored object no longer matches its recorded digest"""
+
+
+class ModelStore:
+    """Content-addressed model files with a manifest of checksums"""
+
+    def __init__(self, root: str = MODEL_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.lock = threading.Lock()
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            manifest = {}
+        manifest.setdefault("files", {})
+        return manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def add(self, name: str, source: Optional[str] = None) -> str:
+        """
+        Store a file under name (default source: the file already at root/name)
+        Returns: the object path
+        """
+        source = source or os.path.join(self.root, name)
+        digest = sha256_file(source)
+        target = self.object_path(digest)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = target + ".tmp"
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+
+        # Keep the familiar name in place for tools that read the directory
+        named = os.path.join(self.root, name)
+        if not (os.path.exists(named) and os.path.samefile(named, target)):
+            self._link(target, named)
+
+        stat = os.stat(target)
+        with self.lock:
+            self.manifest["files"][name] = {
+                "sha256": digest,
+                "size": stat.st_size,
+                "verified": [stat.st_size, stat.st_mtime_ns],
+            }
+            self._save_manifest()
+        return target
+
+    def _link(self, target: str, named: str):
+        os.makedirs(os.path.dirname(named), exist_ok=True)
+        tmp_path = named + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(target, tmp_path)
+        except OSError:
+            shutil.copyfile(target, tmp_path)
+        os.replace(tmp_path, named)
+
+    def digest(self, name: str) -> Optional[str]:
+        entry = self.manifest["files"].get(name)
+        return entry["sha256"] if entry else None
+
+    def get(self, name: str, verify: bool = False) -> Optional[str]:
+        """
+        Path of the verified object stored under name, or None if it isn't stored.
+        A file sitting at root/name that was never registered is adopted first.
+        Raises ChecksumError if the object was modified or corrupted.
+        """
+        entry = self.manifest["files"].get(name)
+        if entry is None:
+            if not os.path.isfile(os.path.join(self.root, name)):
+                return None
+            return self.add(name)
+
+        path = self.object_path(entry["sha256"])
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise ChecksumError(f"{name}: object {entry['sha256'][:12]} is missing")
+        if stat.st_size != entry["size"]:
+            raise ChecksumError(f"{name}: size {stat.st_size} != {entry['size']}")
+
+        # Hash again only if the file changed since it was last verified
+        if verify or entry.get("verified") != [stat.st_size, stat.st_mtime_ns]:
+            if sha256_file(path) != entry["sha256"]:
+                raise ChecksumError(f"{name}: checksum mismatch")
+            with self.lock:
+                entry["verified"] = [stat.st_size, stat.st_mtime_ns]
+                self._save_manifest()
+        return path
+
+    def has(self, name: str) -> bool:
+        return name in self.manifest["files"] or os.path.isfile(os.path.join(self.root, name))
+
+    def optimized_path(self, name: str, key: str) -> Optional[str]:
+        """Where the optimized graph of name for this runtime/optimization key is cached"""
+        digest = self.digest(name)
+        if digest is None:
+            return None
+        return os.path.join(self.root, "cache", f"{digest[:16]}-{key}.onnx")
+
+    def verify_all(self) -> Dict[str, bool]:
+        """Re-hash every stored file. Returns {name: ok}."""
+        results = {}
+        for name in list(self.manifest["files"]):
+            try:
+                results[name] = self.get(name, verify=True) is not None
+            except ChecksumError as e:
+                print(f"❌ {e}")
+                results[name] = False
+        return results
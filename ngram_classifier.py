@@ -0,0 +1,131 @@
+"""
+Hashed Character N-gram Classifier
+A tiny linear model over hashed character n-grams, distilled from the
+transformer's verdicts (see ngram_distill.py). It answers confident titles
+in microseconds and leaves the rest to AIInferenceEngine.
+- Pure NumPy: features are rolling hashes over the UTF-8 bytes of the title
+- Weights are stored as float16 in a compressed .npz
+"""
+
+import math
+import os
+
+import numpy as np
+
+# Default location of the distilled weights
+NGRAM_MODEL_PATH = "model/ngram.npz"
+
+_FNV_PRIME = np.uint64(1099511628211)
+_FNV_OFFSET = np.uint64(14695981039346656037)
+
+
+def hash_ngrams(text, n_features, ngram_range=(2, 4)):
+    """
+    Bucket indices of every character n-gram of the normalized text
+    Hashing is FNV-1a over UTF-8 bytes, so indices are stable across runs.
+    """
+    data = np.frombuffer(f" {' '.join(text.lower().split())} ".encode('utf-8'), dtype=np.uint8).astype(np.uint64)
+    low, high = ngram_range
+    buckets = []
+    h = np.full(len(data), _FNV_OFFSET, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        # After step k, h[i] is the hash of data[i:i + k + 1]; each order extends the previous one
+        for k in range(min(high, len(data))):
+            h = (h[:len(data) - k] ^ data[k:]) * _FNV_PRIME
+            if k + 1 >= low:
+                buckets.append(h)
+    if not buckets:
+        return np.zeros(0, dtype=np.int64)
+    return (np.concatenate(buckets) % np.uint64(n_features)).astype(np.int64)
+
+
+class NgramClassifier:
+    """Softmax regression over hashed n-gram counts (scaled by 1/sqrt(n-grams))"""
+
+    def __init__(self, labels, n_features=2 ** 16, ngram_range=(2, 4), weights=None, bias=None):
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.weights = np.zeros((n_features, len(self.labels)), dtype=np.float32) if weights is None else weights
+        self.bias = np.zeros(len(self.labels), dtype=np.float32) if bias is None else bias
+
+    def features(self, text):
+        return hash_ngrams(text, self.n_features, self.ngram_range)
+
+    def logits(self, indices):
+        if len(indices) == 0:
+            return self.bias.copy()
+        return self.weights.take(indices, axis=0).sum(axis=0) * (1.0 / math.sqrt(len(indices))) + self.bias
+
+    def predict(self, text):
+        """
+        Returns: (state, confidence)
+        """
+        # A handful of labels: plain floats are faster than NumPy for the softmax
+        logits = self.logits(self.features(text)).tolist()
+        top = max(logits)
+        exps = [math.exp(x - top) for x in logits]
+        idx = exps.index(1.0)
+        return self.labels[idx], 1.0 / sum(exps)
+
+    def predict_batch(self, texts):
+        return [self.predict(text) for text in texts]
+
+    def fit(self, texts, labels, sample_weight=None, epochs=10, learning_rate=0.5, l2=1e-6, batch_size=64, seed=0):
+        """
+        Train on (text, label) pairs with minibatch SGD on the cross-entropy loss.
+        sample_weight lets distillation weigh each title by the teacher's confidence.
+        Returns: final mean training loss
+        """
+        rows = [self.features(text) for text in texts]
+        targets = np.array([self.labels.index(label) for label in labels])
+        weights = np.ones(len(rows), dtype=np.float32) if sample_weight is None else np.asarray(sample_weight, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        loss = 0.0
+
+        for _ in range(epochs):
+            order = rng.permutation(len(rows))
+            loss = 0.0
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                lengths = np.array([len(rows[i]) for i in batch])
+                cols = np.concatenate([rows[i] for i in batch])
+                row_ids = np.repeat(np.arange(len(batch)), lengths)
+                scale = (1.0 / np.sqrt(np.maximum(lengths, 1)))[row_ids][:, None]
+
+                logits = np.tile(self.bias, (len(batch), 1))
+                np.add.at(logits, row_ids, self.weights[cols] * scale)
+                logits -= logits.max(axis=1, keepdims=True)
+                probs = np.exp(logits)
+                probs /= probs.sum(axis=1, keepdims=True)
+
+                batch_targets = targets[batch]
+                loss += float(-(weights[batch] * np.log(probs[np.arange(len(batch)), batch_targets] + 1e-12)).sum())
+                grad = probs
+                grad[np.arange(len(batch)), batch_targets] -= 1.0
+                grad *= weights[batch][:, None] / len(batch)
+
+                weight_grad = (grad[row_ids] * scale).astype(np.float32)
+                touched = np.unique(cols)
+                self.weights[touched] *= (1.0 - learning_rate * l2)  # Decay only the rows this batch uses
+                np.add.at(self.weights, cols, -learning_rate * weight_grad)
+                self.bias -= learning_rate * grad.sum(axis=0)
+            loss /= max(1, len(rows))
+        return loss
+
+    def save(self, path):
+        """Write compact float16 weights"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, labels=np.array(self.labels), weights=self.weights.astype(np.float16),
+                                bias=self.bias.astype(np.float32), ngram_range=np.array(self.ngram_range))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            weights = data["weights"].astype(np.float32)  # float32 in memory: faster row sums
+            return cls([str(l) for l in data["labels"]], n_features=weights.shape[0],
+                       ngram_range=tuple(int(n) for n in data["ngram_range"]),
+                       weights=weights, bias=data["bias"].astype(np.float32))
@@ -0,0 +1,166 @@
+"""
+N-gram Classifier Distillation
+Labels a title corpus with the transformer, trains the hashed n-gram
+classifier on those verdicts and measures how often it would escalate.
+
+Label titles the rules miss with the AI engine and train:
+    python ngram_distill.py train titles.tsv --labels-out labelled.tsv
+
+Benchmark latency and escalation rate (agreement too, given labelled titles):
+    python ngram_distill.py bench labelled.tsv
+
+Corpus files hold one "app<TAB>title" per line; labelled files add
+"<TAB>label<TAB>confidence". Without a corpus, a synthetic one is used.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from ngram_classifier import NgramClassifier, NGRAM_MODEL_PATH
+from rule_engine import RuleEngine
+from model_store import resolve_model_path
+
+
+def load_titles(path):
+    """Returns [(app, title, label or None, confidence)]"""
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if not parts[0]:
+                continue
+            app, title = parts[0], parts[1] if len(parts) > 1 else ""
+            label = parts[2] if len(parts) > 2 else None
+            confidence = float(parts[3]) if len(parts) > 3 else 1.0
+            rows.append((app, title, label, confidence))
+    return rows
+
+
+def save_titles(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        for app, title, label, confidence in rows:
+            f.write(f"{app}\t{title}\t{label}\t{confidence:.4f}\n")
+
+
+def teacher_labels(rows, batch_size=32):
+    """Label unlabelled rows with the AI engine's predictions"""
+    pending = [i for i, row in enumerate(rows) if row[2] is None]
+    if not pending:
+        return rows
+
+    from ai_engine import AIInferenceEngine
+    try:
+        with open('ai_config.json', 'r') as f:
+            ai_config = json.load(f)
+    except FileNotFoundError:
+        ai_config = {}
+    engine = AIInferenceEngine.from_config(ai_config)
+    if not engine.enabled:
+        raise RuntimeError("AI engine unavailable - pass a labelled corpus instead")
+
+    predictions = engine.predict_batch([f"{rows[i][0]} {rows[i][1]}" for i in pending], batch_size=batch_size)
+    for i, (label, confidence) in zip(pending, predictions):
+        rows[i] = (rows[i][0], rows[i][1], label, confidence)
+    return [row for row in rows if row[2] != "unknown"]
+
+
+def rule_misses(rows):
+    """Only titles the rules can't decide ever reach the n-gram tier"""
+    engine = RuleEngine()
+    return [row for row in rows if engine.analyze(row[0], row[1])[0] == "unknown"]
+
+
+def synthetic_rows(size):
+    from rule_benchmark import synthetic_corpus
+    return [(app, title, None, 1.0) for app, title in synthetic_corpus(RuleEngine(), size)]
+
+
+def train(args):
+    rows = load_titles(args.corpus) if args.corpus else synthetic_rows(args.size)
+    if not args.all_titles:
+        rows = rule_misses(rows)
+    rows = teacher_labels(rows)
+    if args.labels_out:
+        save_titles(args.labels_out, rows)
+    if not rows:
+        print("❌ No labelled titles to train on")
+        return
+
+    random.Random(0).shuffle(rows)
+    split = int(len(rows) * (1 - args.holdout))
+    train_rows, test_rows = rows[:split], rows[split:]
+
+    labels = sorted({row[2] for row in rows})
+    model = NgramClassifier(labels, n_features=2 ** args.bits)
+    started = time.time()
+    loss = model.fit([f"{app} {title}" for app, title, _, _ in train_rows], [row[2] for row in train_rows],
+                     sample_weight=[row[3] for row in train_rows], epochs=args.epochs)
+    print(f"Trained on {len(train_rows)} titles in {time.time() - started:.1f}s (loss {loss:.3f})")
+
+    if test_rows:
+        report(model, test_rows, [args.threshold])
+    model.save(args.output)
+    print(f"✅ Saved {args.output}")
+
+
+def report(model, rows, thresholds, repeat=3):
+    """Print per-title latency, escalation rate and agreement with the labels"""
+    texts = [f"{app} {title}" for app, title, _, _ in rows]
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        predictions = [model.predict(text) for text in texts]
+        best = min(best, time.perf_counter() - started)
+
+    labelled = [row[2] is not None for row in rows]
+    print(f"\n{len(texts)} titles, {best / len(texts) * 1e6:.1f} us/title")
+    print(f"{'threshold':>9} {'escalated':>10} {'answered':>9} {'agreement':>10}")
+    for threshold in thresholds:
+        answered = [i for i, (_, confidence) in enumerate(predictions) if confidence >= threshold]
+        scored = [i for i in answered if labelled[i]]
+        agree = sum(1 for i in scored if predictions[i][0] == rows[i][2])
+        agreement = f"{agree / len(scored):.1%}" if scored else "-"
+        print(f"{threshold:>9.2f} {1 - len(answered) / len(texts):>10.1%} {len(answered):>9} {agreement:>10}")
+
+
+def bench(args):
+    model = NgramClassifier.load(args.model)
+    rows = load_titles(args.corpus) if args.corpus else synthetic_rows(args.size)
+    if not args.all_titles:
+        rows = rule_misses(rows)
+    report(model, rows, args.thresholds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill and benchmark the n-gram classifier")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = sub.add_parser('train', help="Label titles with the AI engine and train")
+    train_parser.add_argument('corpus', nargs='?', help="Title corpus (default: synthetic)")
+    train_parser.add_argument('--output', default=resolve_model_path(NGRAM_MODEL_PATH))
+    train_parser.add_argument('--labels-out', help="Save the teacher-labelled corpus here")
+    train_parser.add_argument('--bits', type=int, default=16, help="log2 of the hashed feature count")
+    train_parser.add_argument('--epochs', type=int, default=10)
+    train_parser.add_argument('--holdout', type=float, default=0.2)
+    train_parser.add_argument('--threshold', type=float, default=0.8)
+
+    bench_parser = sub.add_parser('bench', help="Measure latency and escalation rate")
+    bench_parser.add_argument('corpus', nargs='?', help="Title corpus, optionally labelled (default: synthetic)")
+    bench_parser.add_argument('--model', default=resolve_model_path(NGRAM_MODEL_PATH))
+    bench_parser.add_argument('--thresholds', type=float, nargs='+', default=[0.6, 0.7, 0.8, 0.9])
+
+    for p in (train_parser, bench_parser):
+        p.add_argument('--size', type=int, default=5000, help="Synthetic corpus size")
+        p.add_argument('--all-titles', action='store_true', help="Don't drop titles the rules already decide")
+
+    args = parser.parse_args()
+    if args.command == 'train':
+        train(args)
+    else:
+        bench(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+User Correction Overrides
+Windows the user labelled by hand, consulted before rules and AI.
+- window: exact (app, normalized title) match, a dict lookup
+- tokens: every token of the set appears in the title (optionally for one
+  app); stored in a trie over sorted tokens, the most specific set wins
+- app: every window of the app
+Saved to a JSON file that is reloaded when it changes on disk.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from verdict_cache import VerdictCache, normalize_title
+
+OVERRIDE_STATES = ("focused", "distracted", "searching")
+OVERRIDE_SCOPES = ("window", "tokens", "app")
+ANY_APP = "*"
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def title_tokens(window_title):
+    """Sorted distinct tokens of the normalized title"""
+    return sorted(set(_TOKEN.findall(normalize_title(window_title))))
+
+
+class _TrieNode:
+    __slots__ = ("children", "entry")
+
+    def __init__(self):
+        self.children = {}
+        self.entry = None
+
+
+class OverrideIndex:
+    """Persistent user corrections with exact, token-set and app-wide matching"""
+
+    def __init__(self, path="overrides.json", check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval  # Seconds between checks for an edited file
+        self.lock = threading.Lock()
+        self.version = 0  # Bumped on every change, so callers can drop derived state
+        self.mtime = None
+        self.last_check = 0.0
+        self.stats = {"lookups": 0, "hits": 0}
+        self._index([])
+        self.reload()
+
+    def _index(self, entries):
+        # Built aside and swapped in, so lookups never see a half-built index
+        windows, apps, tries = {}, {}, {}  # tries: app (or ANY_APP) -> token trie
+        for entry in entries:
+            if entry["scope"] == "window":
+                windows[(entry["app"], entry["title"])] = entry
+            elif entry["scope"] == "app":
+                apps[entry["app"]] = entry
+            else:
+                node = tries.setdefault(entry["app"], _TrieNode())
+                for token in entry["tokens"]:
+                    node = node.children.setdefault(token, _TrieNode())
+                node.entry = entry
+        self.windows, self.apps, self.tries, self.entries = windows, apps, tries, entries
+        self.version += 1
+
+    def reload(self):
+        """Re-read the file. Returns the number of overrides."""
+        entries = []
+        mtime = None
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r') as f:
+                entries = [e for e in json.load(f).get("overrides", [])
+                           if e.get("scope") in OVERRIDE_SCOPES and e.get("state") in OVERRIDE_STATES]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading overrides: {e}")
+            return len(self.entries)
+        with self.lock:
+            self._index(entries)
+            self.mtime = mtime
+        return len(entries)
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime != self.mtime:
+            self.reload()
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"overrides": self.entries}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.mtime = os.path.getmtime(self.path)
+
+    def _make_entry(self, state, app_name, window_title=None, scope="window", tokens=None):
+        if state not in OVERRIDE_STATES:
+            raise ValueError(f"Unknown state: {state}")
+        if scope not in OVERRIDE_SCOPES:
+            raise ValueError(f"Unknown scope: {scope}")
+        app, title = VerdictCache.key(app_name or ANY_APP, window_title)
+        if scope == "app" and app == ANY_APP:
+            raise ValueError("An app override needs an app name")
+        entry = {"scope": scope, "app": app, "state": state}
+        if scope == "window":
+            if not title:
+                raise ValueError("A window override needs a window title")
+            entry["title"] = title
+        elif scope == "tokens":
+            entry["tokens"] = title_tokens(tokens if tokens is not None else window_title)
+            if not entry["tokens"]:
+                raise ValueError("A token override needs at least one token")
+        return entry
+
+    @staticmethod
+    def _same_target(a, b):
+        return all(a.get(k) == b.get(k) for k in ("scope", "app", "title", "tokens"))
+
+    def add(self, state, app_name, window_title=None, scope="window", tokens=None):
+        """
+        Label a window (scope "window"), every title containing the tokens
+        ("tokens", any app when app_name is None) or a whole app ("app").
+        Replaces an existing override for the same target. Returns the entry.
+        """
+        entry = self._make_entry(state, app_name, window_title, scope, tokens)
+        entry["created"] = int(time.time())
+        with self.lock:
+            entries = [e for e in self.entries if not self._same_target(e, entry)] + [entry]
+            self._index(entries)
+            self._save()
+        return entry
+
+    def remove(self, app_name, window_title=None, scope="window", tokens=None):
+        """Returns True if an override was removed"""
+        target = self._make_entry(OVERRIDE_STATES[0], app_name, window_title, scope, tokens)
+        with self.lock:
+            entries = [e for e in self.entries if not self._same_target(e, target)]
+            if len(entries) == len(self.entries):
+                return False
+            self._index(entries)
+            self._save()
+        return True
+
+    def lookup(self, app_name, window_title):
+        """
+        Returns (state, reason) for an overridden window, or None.
+        Exact window first, then the most specific token set, then the app.
+        """
+        self._reload_if_changed()
+        self.stats["lookups"] += 1
+        if not self.entries:
+            return None
+        app, title = VerdictCache.key(app_name, window_title)
+
+        entry = self.windows.get((app, title))
+        if entry is None and self.tries:
+            tokens = sorted(set(_TOKEN.findall(title)))
+            best = (0, None)
+            for trie_app in (app, ANY_APP):
+                if trie_app in self.tries:
+                    best = max(best, self._match(self.tries[trie_app], tokens, 0, 0), key=lambda b: b[0])
+            entry = best[1]
+        if entry is None:
+            entry = self.apps.get(app)
+        if entry is None:
+            return None
+
+        self.stats["hits"] += 1
+        return entry["state"], f"User override ({entry['scope']})"
+
+    def _match(self, node, tokens, start, depth):
+        """Deepest stored token set that is a subset of tokens: (size, entry)"""
+        best = (depth, node.entry) if node.entry is not None else (0, None)
+        for i in range(start, len(tokens)):
+            child = node.children.get(tokens[i])
+            if child is not None:
+                found = self._match(child, tokens, i + 1, depth + 1)
+                if found[0] > best[0]:
+                    best = found
+        return best
+
+    def get_stats(self):
+        return {"overrides": len(self.entries), **self.stats}
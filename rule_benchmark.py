@@ -0,0 +1,115 @@
+"""
+Rule Engine Throughput Benchmark
+Compares the gated keyword scan with the linear keyword scan on a large
+corpus of window titles and checks that both make identical decisions.
+Exits with status 1 if the gated scan is not faster or any decision differs.
+
+    python rule_benchmark.py                       # synthetic corpus
+    python rule_benchmark.py --titles titles.tsv   # one "app<TAB>title" per line
+"""
+
+import argparse
+import random
+import time
+
+from rule_engine import RuleEngine
+
+APPS = ["Google Chrome", "Safari", "Firefox", "Code", "Cursor", "Terminal", "Slack", "Finder",
+        "Spotify", "Preview", "Notion", "Discord", "Mail", "Zoom"]
+
+TEMPLATES = [
+    "{kw} - {site}",
+    "{file} - {project} - {app}",
+    "({n}) {site} | {kw}",
+    "{kw} {kw2} - {site}",
+    "Inbox ({n}) - {user}@gmail.com",
+    "{project} — {file}",
+    "{site}",
+    "Untitled - {app}",
+]
+
+WORDS = ["weekly", "notes", "report", "meeting", "review", "draft", "photos", "music", "settings",
+         "chapter", "homework", "assignment", "final", "midterm", "project", "budget", "recipe"]
+
+
+def synthetic_corpus(engine, size, seed=0):
+    """Generate realistic-looking (app, title) pairs mixing keywords and neutral words"""
+    rng = random.Random(seed)
+    keywords = (engine.study_keywords + engine.distraction_keywords + engine.search_keywords +
+                engine.educational_channels + engine.explicit_learning)
+    sites = ["YouTube", "Reddit", "Wikipedia", "GitHub", "Stack Overflow", "Canvas", "Netflix",
+             "Google Docs", "Gmail", "Amazon", "Twitch", "Khan Academy"]
+
+    def word():
+        return rng.choice(keywords) if rng.random() < 0.3 else rng.choice(WORDS)
+
+    corpus = []
+    for _ in range(size):
+        app = rng.choice(APPS)
+        title = rng.choice(TEMPLATES).format(
+            kw=word(), kw2=word(), site=rng.choice(sites), app=app, n=rng.randint(1, 99),
+            file=f"{rng.choice(WORDS)}.{rng.choice(['py', 'md', 'pdf', 'txt'])}",
+            project=rng.choice(WORDS), user=rng.choice(WORDS))
+        corpus.append((app, title.title() if rng.random() < 0.5 else title))
+    return corpus
+
+
+def load_corpus(path):
+    corpus = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line:
+                app, _, title = line.partition('\t')
+                corpus.append((app, title))
+    return corpus
+
+
+def measure(fn, corpus, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for app, title in corpus:
+            fn(app, title)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RuleEngine throughput benchmark")
+    parser.add_argument('--titles', help="Tab-separated app/title file (default: synthetic corpus)")
+    parser.add_argument('--size', type=int, default=100000, help="Synthetic corpus size")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    engine = RuleEngine()
+    corpus = load_corpus(args.titles) if args.titles else synthetic_corpus(engine, args.size)
+
+    mismatches = sum(1 for app, title in corpus if engine.analyze(app, title) != engine.analyze_linear(app, title))
+
+    linear = measure(engine.analyze_linear, corpus, args.repeat)
+    gated = measure(engine.analyze, corpus, args.repeat)
+
+    n = len(corpus)
+    keywords = len(set(engine.study_keywords + engine.distraction_keywords + engine.search_keywords +
+                       engine.educational_channels + engine.explicit_learning))
+    print(f"Corpus: {n} titles, {keywords} distinct keywords")
+    print(f"{'linear scan':<16} {n / linear:>12,.0f} titles/s {linear / n * 1e6:>8.2f} us/title")
+    print(f"{'gated scan':<16} {n / gated:>12,.0f} titles/s {gated / n * 1e6:>8.2f} us/title")
+    print(f"Speedup: {linear / gated:.2f}x   Decision mismatches: {mismatches}")
+    passed = gated < linear and mismatches == 0
+
+    # The linear scan stops at the first hit, so its cost depends on the decision
+    by_state = {}
+    for app, title in corpus:
+        by_state.setdefault(engine.analyze(app, title)[0], []).append((app, title))
+    print(f"\n{'decision':<12} {'titles':>8} {'linear us':>10} {'gated us':>10}")
+    for state, titles in sorted(by_state.items()):
+        linear = measure(engine.analyze_linear, titles, args.repeat) / len(titles) * 1e6
+        gated = measure(engine.analyze, titles, args.repeat) / len(titles) * 1e6
+        print(f"{state:<12} {len(titles):>8} {linear:>10.2f} {gated:>10.2f}")
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,177 @@
+"""
+State Stream
+Server-Sent Events channel for the UI state, replacing per-view polling.
+- Publishers hand over a topic's whole state; only the fields that changed
+  since the last publish go out, as one event per change
+- A new subscriber first gets a full snapshot of each topic it asked for
+- Idle connections get a comment line every heartbeat seconds, which keeps
+  proxies from closing them and lets the server notice dead clients
+- A client too slow to keep up is resynced with a fresh snapshot instead of
+  buffering without bound
+- Each publish that changes something leaves an immutable versioned snapshot,
+  serialized at most once per projection, for plain GETs with ETag / If-None-Match
+- Subscribers and GETs may ask for a subset of fields; MessagePack encoding
+  is available when the msgpack package is installed
+"""
+
+import copy
+import json
+import os
+import queue
+import threading
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+MAX_PROJECTIONS = 16  # Encoded projections kept per snapshot
+
+
+def normalize_fields(fields):
+    """Hashable, order-independent field selection (None means every field)"""
+    return tuple(sorted(set(fields))) if fields is not None else None
+
+
+class StateSnapshot:
+    """One published version of a topic (treat state as read-only), encoded on first use"""
+
+    __slots__ = ("version", "state", "etag", "_encoded")
+
+    def __init__(self, version, state, epoch):
+        self.version = version
+        self.state = state
+        # The epoch keeps ETags from a previous run of the server from matching
+        self.etag = f"{epoch}-{version}"
+        self._encoded = {}
+
+    @property
+    def body(self):
+        return self.encode()
+
+    def encode(self, fields=None, encoding="json"):
+        """Bytes of the state, or of only the given fields, as "json" or "msgpack" """
+        fields = normalize_fields(fields)
+        key = (fields, encoding)
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            state = self.project(fields)
+            if encoding == "msgpack":
+                if not HAS_MSGPACK:
+                    raise ValueError("msgpack is not installed")
+                encoded = msgpack.packb(state)
+            else:
+                encoded = json.dumps(state).encode('utf-8')
+            if len(self._encoded) < MAX_PROJECTIONS:
+                self._encoded[key] = encoded
+        return encoded
+
+    def project(self, fields=None):
+        if fields is None:
+            return self.state
+        return {field: self.state[field] for field in fields if field in self.state}
+
+
+class _Subscriber:
+    __slots__ = ("topics", "fields", "queue")
+
+    def __init__(self, topics, fields, max_pending):
+        self.topics = topics
+        self.fields = fields
+        self.queue = queue.Queue(maxsize=max_pending)
+
+
+class StateStream:
+    """Publishes per-topic field changes to SSE subscribers"""
+
+    def __init__(self, heartbeat=15.0, max_pending=64):
+        self.heartbeat = heartbeat
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.topics = {}  # topic -> latest StateSnapshot
+        self.epoch = os.urandom(4).hex()
+        self.subscribers = set()
+        self.stats = {"published": 0, "events": 0, "resyncs": 0}
+
+    def publish(self, topic, state):
+        """Send the fields of state that changed since the last publish. Returns them."""
+        with self.lock:
+            latest = self.topics.get(topic)
+            version, last = (latest.version, latest.state) if latest else (0, {})
+            changes = {key: value for key, value in state.items() if key not in last or last[key] != value}
+            self.stats["published"] += 1
+            if not changes:
+                return changes
+            # Copied so later in-place edits of the caller's dict show up as changes
+            changes = copy.deepcopy(changes)
+            version += 1
+            self.topics[topic] = StateSnapshot(version, {**last, **changes}, self.epoch)
+            events = {}  # Formatted once per distinct field selection
+            for subscriber in self.subscribers:
+                if topic not in subscriber.topics:
+                    continue
+                if subscriber.fields not in events:
+                    selected = changes if subscriber.fields is None else \
+                        {key: value for key, value in changes.items() if key in subscriber.fields}
+                    events[subscriber.fields] = self._format(topic, version, selected) if selected else None
+                if events[subscriber.fields] is not None:
+                    self._send(subscriber, events[subscriber.fields])
+        return changes
+
+    def _send(self, subscriber, event):
+        try:
+            subscriber.queue.put_nowait(event)
+            self.stats["events"] += 1
+        except queue.Full:
+            # Fell behind: drop the backlog, a snapshot carries everything it missed
+            self.stats["resyncs"] += 1
+            try:
+                while True:
+                    subscriber.queue.get_nowait()
+            except queue.Empty:
+                pass  # The client's own thread may take the last events first
+            self._send_snapshots(subscriber)
+
+    def _send_snapshots(self, subscriber):
+        for topic in subscriber.topics:
+            snapshot = self.topics.get(topic)
+            if snapshot is not None:
+                subscriber.queue.put_nowait(self._format(topic, snapshot.version, snapshot.encode(subscriber.fields)))
+
+    @staticmethod
+    def _format(topic, version, fields):
+        data = fields.decode('utf-8') if isinstance(fields, bytes) else json.dumps(fields)
+        return f"event: {topic}\nid: {version}\ndata: {data}\n\n"
+
+    def snapshot(self, topic):
+        """Latest StateSnapshot of topic, or None before its first publish"""
+        return self.topics.get(topic)
+
+    def subscribe(self, topics, fields=None):
+        """Register a client for the given topics (and only these fields); its queue starts with their snapshots"""
+        subscriber = _Subscriber(frozenset(topics), normalize_fields(fields), self.max_pending)
+        with self.lock:
+            self._send_snapshots(subscriber)
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def events(self, subscriber):
+        """SSE text for one client; ends (and unsubscribes) when the client goes away"""
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    yield subscriber.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def get_stats(self):
+        with self.lock:
+            return {"subscribers": len(self.subscribers), **self.stats}
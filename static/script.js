@@ -375,233 +375,257 @@ let sessionWasActive = false;
 let lastSessionComplete = false;
 let autoStopResultsShown = false; // Track if we've shown auto-stop results
 
+// Latest state from the server; the stream sends only the fields that changed
+const statusData = {};
+const cameraData = {};
+
+function connectStatusStream() {
+    // Reconnects by itself; every (re)connect starts with a full snapshot
+    const source = new EventSource('/api/stream?topics=status,camera');
+    source.addEventListener('status', event => {
+        Object.assign(statusData, JSON.parse(event.data));
+        renderStatus(statusData);
+        renderCameraStatus();
+    });
+    source.addEventListener('camera', event => {
+        Object.assign(cameraData, JSON.parse(event.data));
+        renderCameraStatus();
+    });
+    source.onerror = () => console.error('Status stream interrupted, reconnecting...');
+}
+
 function updateStatus() {
     fetch('/api/status')
         .then(response => response.json())
         .then(data => {
-            // Check if there are auto-stop results (health depleted or challenge complete)
-            if (data.auto_stop_results && !autoStopResultsShown) {
-                // Session was auto-stopped, show results
-                showResults(data.auto_stop_results);
-                autoStopResultsShown = true;
-                // Clear the results on backend
-                fetch('/api/session/stop', { method: 'POST' }).catch(() => { });
-            }
+            Object.assign(statusData, data);
+            renderStatus(statusData);
+        })
+        .catch(error => console.error('Error fetching status:', error));
+}
 
-            // Reset flag when session becomes active again
-            if (data.session_active) {
-                autoStopResultsShown = false;
-            }
+function renderStatus(data) {
+    // Check if there are auto-stop results (health depleted or challenge complete)
+    if (data.auto_stop_results && !autoStopResultsShown) {
+        // Session was auto-stopped, show results
+        showResults(data.auto_stop_results);
+        autoStopResultsShown = true;
+        // Clear the results on backend
+        fetch('/api/session/stop', { method: 'POST' }).catch(() => { });
+    }
 
-            // Toggle between mode selection and session view
-            const modeSelection = document.getElementById('mode-selection');
-            const resultsOverlay = document.getElementById('session-results');
-
-            // Don't switch views if results are being shown
-            const resultsVisible = resultsOverlay && resultsOverlay.style.display === 'flex';
-
-            // Toggle views
-            if (data.session_active) {
-                modeSelection.style.display = 'none';
-                document.getElementById('active-session').style.display = 'block';
-                sessionWasActive = true;
-            } else if (!resultsVisible) {
-                // Only switch to mode selection if results aren't showing
-                // This prevents switching away when health fails or challenge fails
-                modeSelection.style.display = 'block';
-                document.getElementById('active-session').style.display = 'none';
-                document.getElementById('active-session').style.display = 'none';
-                sessionWasActive = false;
-
-                // Re-enable buttons when showing mode selection
-                const modeCards = document.querySelectorAll('.mode-card, .challenge-mode-card');
-                modeCards.forEach(card => card.style.pointerEvents = 'auto');
-            } else {
-                // Results are showing but session ended - keep session view visible
-                // so results overlay can be seen
-                document.getElementById('active-session').style.display = 'block';
-            }
+    // Reset flag when session becomes active again
+    if (data.session_active) {
+        autoStopResultsShown = false;
+    }
 
-            // Update mode indicator
-            const modeIndicator = document.getElementById('mode-indicator');
-            if (data.session_mode === 'normal') {
-                modeIndicator.textContent = 'Normal Mode';
-            } else if (data.session_mode === 'challenge') {
-                modeIndicator.textContent = 'Challenge Mode';
-            }
+    // Toggle between mode selection and session view
+    const modeSelection = document.getElementById('mode-selection');
+    const resultsOverlay = document.getElementById('session-results');
 
-            // Update challenge timer if in challenge mode
-            const challengeTimerCard = document.getElementById('challenge-timer-card');
-            const challengeTimer = document.getElementById('challenge-timer');
+    // Don't switch views if results are being shown
+    const resultsVisible = resultsOverlay && resultsOverlay.style.display === 'flex';
+
+    // Toggle views
+    if (data.session_active) {
+        modeSelection.style.display = 'none';
+        document.getElementById('active-session').style.display = 'block';
+        sessionWasActive = true;
+    } else if (!resultsVisible) {
+        // Only switch to mode selection if results aren't showing
+        // This prevents switching away when health fails or challenge fails
+        modeSelection.style.display = 'block';
+        document.getElementById('active-session').style.display = 'none';
+        document.getElementById('active-session').style.display = 'none';
+        sessionWasActive = false;
+
+        // Re-enable buttons when showing mode selection
+        const modeCards = document.querySelectorAll('.mode-card, .challenge-mode-card');
+        modeCards.forEach(card => card.style.pointerEvents = 'auto');
+    } else {
+        // Results are showing but session ended - keep session view visible
+        // so results overlay can be seen
+        document.getElementById('active-session').style.display = 'block';
+    }
 
-            if (data.session_active && data.session_mode === 'challenge') {
-                challengeTimerCard.style.display = 'block';
-                challengeTimer.textContent = formatTime(data.time_remaining);
+    // Update mode indicator
+    const modeIndicator = document.getElementById('mode-indicator');
+    if (data.session_mode === 'normal') {
+        modeIndicator.textContent = 'Normal Mode';
+    } else if (data.session_mode === 'challenge') {
+        modeIndicator.textContent = 'Challenge Mode';
+    }
 
-                // Check if session just completed
-                if (data.time_remaining === 0 && !lastSessionComplete) {
-                    lastSessionComplete = true;
-                    showCompletionMessage();
-                }
-            } else {
-                challengeTimerCard.style.display = 'none';
-                lastSessionComplete = false;
-            }
+    // Update challenge timer if in challenge mode
+    const challengeTimerCard = document.getElementById('challenge-timer-card');
+    const challengeTimer = document.getElementById('challenge-timer');
+
+    if (data.session_active && data.session_mode === 'challenge') {
+        challengeTimerCard.style.display = 'block';
+        challengeTimer.textContent = formatTime(data.time_remaining);
+
+        // Check if session just completed
+        if (data.time_remaining === 0 && !lastSessionComplete) {
+            lastSessionComplete = true;
+            showCompletionMessage();
+        }
+    } else {
+        challengeTimerCard.style.display = 'none';
+        lastSessionComplete = false;
+    }
+
+    // Update course display
+    const courseDisplay = document.getElementById('course-display');
+    const courseName = document.getElementById('course-name');
+    if (data.session_active && data.current_course) {
+        courseDisplay.style.display = 'block';
+        courseName.textContent = data.current_course;
+    } else {
+        courseDisplay.style.display = 'none';
+    }
 
-            // Update course display
-            const courseDisplay = document.getElementById('course-display');
-            const courseName = document.getElementById('course-name');
-            if (data.session_active && data.current_course) {
-                courseDisplay.style.display = 'block';
-                courseName.textContent = data.current_course;
+    // Store courses globally for autocomplete
+    window.availableCourses = data.courses || [];
+
+    // Update Dashboard Stats (mode selection screen)
+    if (!data.session_active) {
+        // Level
+        const dashboardLevel = document.getElementById('dashboard-level');
+        if (dashboardLevel) {
+            dashboardLevel.textContent = data.level;
+        }
+
+        // XP Progress
+        const xpForNextLevel = data.level * 100;
+        const xpInCurrentLevel = data.xp % 100;
+        const xpProgress = (xpInCurrentLevel / 100) * 100;
+
+        const dashboardXpCurrent = document.getElementById('dashboard-xp-current');
+        const dashboardXpNext = document.getElementById('dashboard-xp-next');
+        const dashboardXpFill = document.getElementById('dashboard-xp-fill');
+
+        if (dashboardXpCurrent) dashboardXpCurrent.textContent = xpInCurrentLevel;
+        if (dashboardXpNext) dashboardXpNext.textContent = 100;
+        if (dashboardXpFill) dashboardXpFill.style.width = `${xpProgress}%`;
+
+        // Health
+        const dashboardHealth = document.getElementById('dashboard-health');
+        if (dashboardHealth) {
+            dashboardHealth.textContent = `${Math.round(data.health)}%`;
+        }
+
+        // Update Camera Status Badge (only when session is active)
+        const statusBadgeElem = document.getElementById('status-badge');
+        if (statusBadgeElem && data.camera_enabled && data.session_active) {
+            if (data.user_present === false) {
+                statusBadgeElem.textContent = "User away";
+                statusBadgeElem.className = "status-badge distracted";
+            } else if (data.is_studying) {
+                statusBadgeElem.textContent = "Focused 🧠";
+                statusBadgeElem.className = "status-badge studying";
             } else {
-                courseDisplay.style.display = 'none';
+                statusBadgeElem.textContent = "Distracted ⚠️";
+                statusBadgeElem.className = "status-badge distracted";
             }
+        } else if (statusBadgeElem && data.camera_enabled && !data.session_active) {
+            statusBadgeElem.textContent = data.camera_message || "Camera Active";
+            statusBadgeElem.className = "status-badge";
+        } else if (statusBadgeElem && !data.camera_enabled) {
+            statusBadgeElem.textContent = "Camera Off";
+            statusBadgeElem.className = "status-badge";
+        }
 
-            // Store courses globally for autocomplete
-            window.availableCourses = data.courses || [];
-
-            // Update Dashboard Stats (mode selection screen)
-            if (!data.session_active) {
-                // Level
-                const dashboardLevel = document.getElementById('dashboard-level');
-                if (dashboardLevel) {
-                    dashboardLevel.textContent = data.level;
-                }
-
-                // XP Progress
-                const xpForNextLevel = data.level * 100;
-                const xpInCurrentLevel = data.xp % 100;
-                const xpProgress = (xpInCurrentLevel / 100) * 100;
-
-                const dashboardXpCurrent = document.getElementById('dashboard-xp-current');
-                const dashboardXpNext = document.getElementById('dashboard-xp-next');
-                const dashboardXpFill = document.getElementById('dashboard-xp-fill');
-
-                if (dashboardXpCurrent) dashboardXpCurrent.textContent = xpInCurrentLevel;
-                if (dashboardXpNext) dashboardXpNext.textContent = 100;
-                if (dashboardXpFill) dashboardXpFill.style.width = `${xpProgress}%`;
-
-                // Health
-                const dashboardHealth = document.getElementById('dashboard-health');
-                if (dashboardHealth) {
-                    dashboardHealth.textContent = `${Math.round(data.health)}%`;
-                }
-
-                // Update Camera Status Badge (only when session is active)
-                const statusBadgeElem = document.getElementById('status-badge');
-                if (statusBadgeElem && data.camera_enabled && data.session_active) {
-                    if (data.user_present === false) {
-                        statusBadgeElem.textContent = "User away";
-                        statusBadgeElem.className = "status-badge distracted";
-                    } else if (data.is_studying) {
-                        statusBadgeElem.textContent = "Focused 🧠";
-                        statusBadgeElem.className = "status-badge studying";
-                    } else {
-                        statusBadgeElem.textContent = "Distracted ⚠️";
-                        statusBadgeElem.className = "status-badge distracted";
-                    }
-                } else if (statusBadgeElem && data.camera_enabled && !data.session_active) {
-                    statusBadgeElem.textContent = data.camera_message || "Camera Active";
-                    statusBadgeElem.className = "status-badge";
-                } else if (statusBadgeElem && !data.camera_enabled) {
-                    statusBadgeElem.textContent = "Camera Off";
-                    statusBadgeElem.className = "status-badge";
-                }
-
-                // Total Time
-                const dashboardTotalTime = document.getElementById('dashboard-total-time');
-                if (dashboardTotalTime) {
-                    dashboardTotalTime.textContent = data.time_formatted;
-                }
-
-                // Sessions
-                const dashboardSessions = document.getElementById('dashboard-sessions');
-                if (dashboardSessions) {
-                    dashboardSessions.textContent = data.total_sessions || 0;
-                }
-
-                // Streak display
-                if (data.current_streak && data.current_streak > 0) {
-                    const streakBadge = document.getElementById('streak-badge');
-                    const streakCount = document.getElementById('streak-count');
-                    if (streakBadge && streakCount) {
-                        streakCount.textContent = data.current_streak;
-                        streakBadge.style.display = 'flex';
-                    }
-                } else {
-                    const streakBadge = document.getElementById('streak-badge');
-                    if (streakBadge) {
-                        streakBadge.style.display = 'none';
-                    }
-                }
-            }
+        // Total Time
+        const dashboardTotalTime = document.getElementById('dashboard-total-time');
+        if (dashboardTotalTime) {
+            dashboardTotalTime.textContent = data.time_formatted;
+        }
 
-            // Update Timers
-            if (data.session_active) {
-                // During session: show session time
-                document.getElementById('session-timer').textContent = data.session_time_formatted;
-            }
+        // Sessions
+        const dashboardSessions = document.getElementById('dashboard-sessions');
+        if (dashboardSessions) {
+            dashboardSessions.textContent = data.total_sessions || 0;
+        }
 
-            // Mode selection: show total time
-            const totalTimeDisplay = document.getElementById('total-time-display');
-            if (totalTimeDisplay) {
-                totalTimeDisplay.textContent = data.time_formatted;
+        // Streak display
+        if (data.current_streak && data.current_streak > 0) {
+            const streakBadge = document.getElementById('streak-badge');
+            const streakCount = document.getElementById('streak-count');
+            if (streakBadge && streakCount) {
+                streakCount.textContent = data.current_streak;
+                streakBadge.style.display = 'flex';
             }
-
-            // Update status
-            const statusBadge = document.getElementById('status-badge');
-            const statusText = document.getElementById('status-text');
-            const statusIcon = document.getElementById('status-icon');
-            const statusMessage = document.getElementById('status-message');
-
-            if (data.session_active) {
-                if (data.user_present === false) {
-                    if (statusBadge) {
-                        statusBadge.className = 'status-badge distracted';
-                        statusBadge.textContent = '👻 User away';
-                    }
-                } else if (data.is_studying) {
-                    if (statusBadge) {
-                        statusBadge.className = 'status-badge studying';
-                        statusBadge.textContent = '🧠 Focused';
-                    }
-                } else {
-                    if (statusBadge) {
-                        statusBadge.className = 'status-badge distracted';
-                        statusBadge.textContent = '⚠️ Distracted';
-                    }
-                }
-            } else {
-                if (statusBadge) {
-                    statusBadge.className = 'status-badge idle';
-                    statusBadge.textContent = '💤 Idle';
-                }
+        } else {
+            const streakBadge = document.getElementById('streak-badge');
+            if (streakBadge) {
+                streakBadge.style.display = 'none';
             }
+        }
+    }
+
+    // Update Timers
+    if (data.session_active) {
+        // During session: show session time
+        document.getElementById('session-timer').textContent = data.session_time_formatted;
+    }
 
-            // Update Health
-            const health = Math.round(data.health);
-            document.getElementById('health-text').textContent = `${health}%`;
-            const healthBar = document.getElementById('health-bar');
-            healthBar.style.width = `${health}%`;
+    // Mode selection: show total time
+    const totalTimeDisplay = document.getElementById('total-time-display');
+    if (totalTimeDisplay) {
+        totalTimeDisplay.textContent = data.time_formatted;
+    }
 
-            if (health > 50) {
-                healthBar.style.backgroundColor = "var(--accent-green)";
-            } else if (health > 20) {
-                healthBar.style.backgroundColor = "var(--accent-orange)";
-            } else {
-                healthBar.style.backgroundColor = "var(--accent-red)";
+    // Update status
+    const statusBadge = document.getElementById('status-badge');
+    const statusText = document.getElementById('status-text');
+    const statusIcon = document.getElementById('status-icon');
+    const statusMessage = document.getElementById('status-message');
+
+    if (data.session_active) {
+        if (data.user_present === false) {
+            if (statusBadge) {
+                statusBadge.className = 'status-badge distracted';
+                statusBadge.textContent = '👻 User away';
+            }
+        } else if (data.is_studying) {
+            if (statusBadge) {
+                statusBadge.className = 'status-badge studying';
+                statusBadge.textContent = '🧠 Focused';
+            }
+        } else {
+            if (statusBadge) {
+                statusBadge.className = 'status-badge distracted';
+                statusBadge.textContent = '⚠️ Distracted';
             }
+        }
+    } else {
+        if (statusBadge) {
+            statusBadge.className = 'status-badge idle';
+            statusBadge.textContent = '💤 Idle';
+        }
+    }
 
-            // Update XP & Level
-            document.getElementById('xp-value').textContent = `${data.xp} XP`;
-            document.getElementById('level-value').textContent = data.level;
+    // Update Health
+    const health = Math.round(data.health);
+    document.getElementById('health-text').textContent = `${health}%`;
+    const healthBar = document.getElementById('health-bar');
+    healthBar.style.width = `${health}%`;
 
-            // Update App Info
-            document.getElementById('app-name').textContent = data.app_name;
-            document.getElementById('window-title').textContent = data.window_title || "...";
-        })
-        .catch(error => console.error('Error fetching status:', error));
+    if (health > 50) {
+        healthBar.style.backgroundColor = "var(--accent-green)";
+    } else if (health > 20) {
+        healthBar.style.backgroundColor = "var(--accent-orange)";
+    } else {
+        healthBar.style.backgroundColor = "var(--accent-red)";
+    }
+
+    // Update XP & Level
+    document.getElementById('xp-value').textContent = `${data.xp} XP`;
+    document.getElementById('level-value').textContent = data.level;
+
+    // Update App Info
+    document.getElementById('app-name').textContent = data.app_name;
+    document.getElementById('window-title').textContent = data.window_title || "...";
 }
 
 function showCompletionMessage() {
@@ -612,11 +636,13 @@ function showCompletionMessage() {
     }, 100);
 }
 
-// Update every second
-setInterval(updateStatus, 1000);
-
-// Initial call
-updateStatus();
+// State changes are pushed by the server; poll only where EventSource is missing
+if (window.EventSource) {
+    connectStatusStream();
+} else {
+    setInterval(updateStatus, 1000);
+    updateStatus();
+}
 
 // Custom Autocomplete for Courses
 window.availableCourses = [];
@@ -704,7 +730,6 @@ function setupCourseAutocomplete() {
 setupCourseAutocomplete();
 // Camera Controls
 let cameraEnabled = false;
-let cameraStatusInterval = null;
 
 async function toggleCamera() {
     const checkbox = document.getElementById('camera-checkbox');
@@ -738,58 +763,38 @@ function updateCameraDisplay(enabled) {
     if (enabled) {
         statusDiv.style.display = 'flex';
         statusText.textContent = 'Camera Active';
-        startCameraStatusPolling();
+        renderCameraStatus();
     } else {
         statusDiv.style.display = 'none';
-        stopCameraStatusPolling();
     }
 }
 
-function startCameraStatusPolling() {
-    cameraStatusInterval = setInterval(async () => {
-        try {
-            const response = await fetch('/api/camera/status');
-            const data = await response.json();
-
-            // Also fetch main status to check session state
-            const statusResponse = await fetch('/api/status');
-            const statusData = await statusResponse.json();
-
-            if (data.enabled) {
-                const statusText = document.getElementById('camera-status-text');
-
-                // If session is active, show study state
-                if (statusData.session_active) {
-                    if (statusData.user_present === false) {
-                        statusText.textContent = '👻 User away';
-                    } else if (statusData.is_studying) {
-                        statusText.textContent = '🧠 Focused';
-                    } else {
-                        statusText.textContent = '⚠️ Distracted';
-                    }
-                } else {
-                    // No session - show camera detection status
-                    if (data.message) {
-                        statusText.textContent = data.message;
-                    } else if (data.present === true) {
-                        statusText.textContent = '✅ User Present';
-                    } else if (data.present === false) {
-                        statusText.textContent = '⚠️ User Away';
-                    } else {
-                        statusText.textContent = 'Detecting...';
-                    }
-                }
-            }
-        } catch (error) {
-            console.error('Error fetching camera status:', error);
-        }
-    }, 500); // Poll every 500ms
-}
+function renderCameraStatus() {
+    if (!cameraEnabled || !cameraData.enabled) {
+        return;
+    }
+    const statusText = document.getElementById('camera-status-text');
 
-function stopCameraStatusPolling() {
-    if (cameraStatusInterval) {
-        clearInterval(cameraStatusInterval);
-        cameraStatusInterval = null;
+    // If session is active, show study state
+    if (statusData.session_active) {
+        if (statusData.user_present === false) {
+            statusText.textContent = '👻 User away';
+        } else if (statusData.is_studying) {
+            statusText.textContent = '🧠 Focused';
+        } else {
+            statusText.textContent = '⚠️ Distracted';
+        }
+    } else {
+        // No session - show camera detection status
+        if (cameraData.message) {
+            statusText.textContent = cameraData.message;
+        } else if (cameraData.present === true) {
+            statusText.textContent = '✅ User Present';
+        } else if (cameraData.present === false) {
+            statusText.textContent = '⚠️ User Away';
+        } else {
+            statusText.textContent = 'Detecting...';
+        }
     }
 }
 
@@ -0,0 +1,354 @@
+"""
+Tests for the zero-shot NLI and prototype classifier modes of the AI inference engine
+Builds a tiny ONNX model offline; the NLI tests give its tokenizer a RoBERTa-style pair template.
+"""
+
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from ai_engine import AIInferenceEngine, PrototypeIndex, HYPOTHESES, SEED_EXAMPLES
+from model_store import ModelStore
+
+VOCAB = ["<pad>", "[UNK]", "<s>", "</s>", "youtube", "lecture", "netflix", "this", "activity", "is",
+         "studying", "entertainment", "searching", "for", "information", "."]
+
+
+def build_tiny_model(model_dir, vocab):
+    """Masked embedding mean-pool + linear head with the same inputs as the exported model"""
+    onnx = pytest.importorskip("onnx")
+    from onnx import helper, numpy_helper, TensorProto
+    from tokenizers import Tokenizer
+    from tokenizers.models import WordLevel
+    from tokenizers.pre_tokenizers import Whitespace
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(len(vocab), 16)).astype(np.float32)
+    head = rng.normal(size=(16, 3)).astype(np.float32)
+
+    nodes = [
+        helper.make_node("Gather", ["embeddings", "input_ids"], ["embedded"]),
+        helper.make_node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),
+        helper.make_node("Unsqueeze", ["mask"], ["mask3"], axes=[2]),
+        helper.make_node("Mul", ["embedded", "mask3"], ["masked"]),
+        helper.make_node("ReduceSum", ["masked"], ["total"], axes=[1], keepdims=0),
+        helper.make_node("ReduceSum", ["mask3"], ["count"], axes=[1], keepdims=0),
+        helper.make_node("Div", ["total", "count"], ["pooled"]),
+        helper.make_node("MatMul", ["pooled", "head"], ["logits"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "tiny",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "seq"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "seq"])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", 3])],
+        [numpy_helper.from_array(embeddings, "embeddings"), numpy_helper.from_array(head, "head")])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)], ir_version=7)
+    onnx.save(model, str(model_dir / "model.onnx"))
+
+    tokenizer = Tokenizer(WordLevel({word: i for i, word in enumerate(vocab)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.save(str(model_dir / "tokenizer.json"))
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    from tokenizers import Tokenizer
+    from tokenizers.processors import TemplateProcessing
+
+    build_tiny_model(tmp_path, VOCAB)
+    tokenizer = Tokenizer.from_file(str(tmp_path / "tokenizer.json"))
+    tokenizer.post_processor = TemplateProcessing(
+        single="<s> $A </s>", pair="<s> $A </s> </s> $B </s>",
+        special_tokens=[("<s>", VOCAB.index("<s>")), ("</s>", VOCAB.index("</s>"))])
+    tokenizer.save(str(tmp_path / "tokenizer.json"))
+    return tmp_path
+
+
+def make_engine(model_dir, **kwargs):
+    return AIInferenceEngine(model_path=str(model_dir / "model.onnx"),
+                             tokenizer_path=str(model_dir / "tokenizer.json"), warmup=False, **kwargs)
+
+
+class CountingSession:
+    """Wraps an InferenceSession and records the inputs and batch size of every run"""
+
+    def __init__(self, session):
+        self.session = session
+        self.batches = []
+        self.inputs = []
+
+    def run(self, output_names, inputs):
+        self.inputs.append(inputs)
+        self.batches.append(next(iter(inputs.values())).shape[0])
+        return self.session.run(output_names, inputs)
+
+
+
+class TestZeroShot:
+    """Test hypothesis caching and batched entailment scoring"""
+
+    def test_labels_follow_hypotheses(self, model_dir):
+        engine = make_engine(model_dir)
+        assert engine.zero_shot
+        assert engine.labels == list(HYPOTHESES)
+        assert set(engine.hypothesis_rows) == set(HYPOTHESES)
+
+    def test_cached_rows_match_pair_encoding(self, model_dir):
+        """Prefix + title + cached suffix is exactly what encoding the pair would produce"""
+        engine = make_engine(model_dir)
+        title = "youtube lecture"
+        premise = engine.tokenizer.encode(title, add_special_tokens=False).ids
+
+        for label, hypothesis in HYPOTHESES.items():
+            prefix_ids, _, _, suffix_ids, _ = engine.hypothesis_rows[label]
+            assert prefix_ids + premise + suffix_ids == engine.tokenizer.encode(title, hypothesis).ids
+
+    def test_one_session_call_per_batch(self, model_dir):
+        engine = make_engine(model_dir)
+        engine.session = CountingSession(engine.session)
+
+        results = engine.predict_batch(["youtube lecture", "netflix", "searching for information"])
+
+        assert engine.session.batches == [3 * len(HYPOTHESES)]
+        assert all(label in HYPOTHESES for label, _ in results)
+        assert all(0.0 < conf <= 1.0 for _, conf in results)
+
+    def test_batch_matches_single_predictions(self, model_dir):
+        engine = make_engine(model_dir)
+        texts = ["youtube lecture", "netflix netflix netflix", "this"]
+        batched = engine.predict_batch(texts)
+        for text, (label, conf) in zip(texts, batched):
+            single_label, single_conf = engine.predict(text)
+            assert single_label == label
+            assert single_conf == pytest.approx(conf, abs=1e-5)
+
+    def test_long_titles_truncated_to_max_length(self, model_dir):
+        engine = make_engine(model_dir, max_length=20)
+        rows = []
+        original_run = engine._run
+        engine._run = lambda batch: rows.extend(batch) or original_run(batch)
+
+        engine.predict("youtube " * 50)
+        assert rows and all(len(ids) <= 20 for ids, _ in rows)
+
+
+class TestBatching:
+    """Test predict_batch against single predictions, chunking and padding"""
+
+    TEXTS = ["youtube lecture " * 6, "netflix", "this activity is studying", "lecture",
+             "searching for information .", "youtube", "netflix netflix"]
+
+    def test_order_kept_across_batch_size(self, model_dir):
+        engine = make_engine(model_dir)
+        engine.session = CountingSession(engine.session)
+        batched = engine.predict_batch(self.TEXTS, batch_size=3)
+        assert engine.session.batches == [3 * len(HYPOTHESES)] * 2 + [len(HYPOTHESES)]
+
+        singles = [engine.predict(text) for text in self.TEXTS]
+        for (label, conf), (single_label, single_conf) in zip(batched, singles):
+            assert label == single_label
+            assert conf == pytest.approx(single_conf, abs=1e-5)
+
+        # Reversing the input reverses the output, whatever the length sorting does
+        assert [label for label, _ in engine.predict_batch(self.TEXTS[::-1], batch_size=3)] == \
+            [label for label, _ in batched][::-1]
+
+    def test_task_labels_mode_matches_single(self, model_dir):
+        (model_dir / "config.json").write_text(json.dumps(
+            {"id2label": {"0": "focused", "1": "distracted", "2": "searching"}}))
+        engine = make_engine(model_dir)
+        assert not engine.zero_shot
+
+        batched = engine.predict_batch(self.TEXTS, batch_size=2)
+        for text, (label, conf) in zip(self.TEXTS, batched):
+            single_label, single_conf = engine.predict(text)
+            assert label == single_label
+            assert conf == pytest.approx(single_conf, abs=1e-5)
+
+    def test_mixed_lengths_padded_and_truncated(self, model_dir):
+        engine = make_engine(model_dir, max_length=20)
+        engine.session = CountingSession(engine.session)
+
+        engine.predict_batch(["youtube " * 40, "netflix"])
+        ids, mask = engine.session.inputs[0]["input_ids"], engine.session.inputs[0]["attention_mask"]
+        assert ids.shape[1] <= 20
+        lengths = mask.sum(axis=1)
+        assert lengths.max() == ids.shape[1] and lengths.min() < ids.shape[1]
+        for row, length in enumerate(lengths):
+            assert (ids[row, length:] == engine.pad_id).all()
+
+    def test_empty_batch(self, model_dir):
+        assert make_engine(model_dir).predict_batch([]) == []
+
+
+class TestLabelConfig:
+    """Test reading the logit layout from config.json"""
+
+    def test_entailment_index_from_config(self, model_dir):
+        (model_dir / "config.json").write_text(json.dumps(
+            {"id2label": {"0": "ENTAILMENT", "1": "NEUTRAL", "2": "CONTRADICTION"}}))
+        engine = make_engine(model_dir)
+        assert engine.zero_shot
+        assert engine.entailment_index == 0
+
+    def test_task_labels_disable_zero_shot(self, model_dir):
+        (model_dir / "config.json").write_text(json.dumps(
+            {"id2label": {"0": "focused", "1": "distracted", "2": "searching"}}))
+        engine = make_engine(model_dir)
+        engine.session = CountingSession(engine.session)
+
+        assert not engine.zero_shot
+        engine.predict_batch(["youtube lecture", "netflix"])
+        assert engine.session.batches == [2]
+
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestPrototypeIndex:
+    """Test prototype building, scoring and persistence"""
+
+    def test_scores_pick_nearest_prototype(self):
+        index = PrototypeIndex()
+        index.add("focused", np.stack([unit(1, 0, 0), unit(1, 0.2, 0)]))
+        index.add("distracted", unit(0, 1, 0))
+
+        scores = index.scores(np.stack([unit(1, 0.1, 0), unit(0, 1, 0.1)]))
+        assert scores.shape == (2, 2)
+        assert index.labels[int(np.argmax(scores[0]))] == "focused"
+        assert index.labels[int(np.argmax(scores[1]))] == "distracted"
+        assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0)
+
+    def test_examples_extend_prototype(self):
+        """Adding examples moves the prototype toward them without touching other labels"""
+        index = PrototypeIndex()
+        index.add("focused", unit(1, 0, 0))
+        index.add("distracted", unit(0, 1, 0))
+        before = index.scores(unit(0, 0, 1))[0, 0]
+
+        index.add("focused", unit(0, 0, 1))
+        assert index.counts.tolist() == [2, 1]
+        assert index.scores(unit(0, 0, 1))[0, 0] > before
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "prototypes.npz")
+        index = PrototypeIndex(path)
+        index.add("focused", unit(1, 0, 0))
+        index.add("searching", unit(0, 0, 1))
+        index.save()
+
+        loaded = PrototypeIndex(path)
+        assert loaded.load()
+        assert loaded.labels == ["focused", "searching"]
+        assert loaded.dim == 3
+        assert np.allclose(loaded.matrix, index.matrix)
+
+    def test_dimension_mismatch(self):
+        index = PrototypeIndex()
+        index.add("focused", unit(1, 0, 0))
+        with pytest.raises(ValueError):
+            index.add("focused", unit(1, 0))
+
+    def test_missing_file(self, tmp_path):
+        assert not PrototypeIndex(str(tmp_path / "none.npz")).load()
+
+
+class TestPrototypeMode:
+    """Test the prototype classifier mode end to end"""
+
+    def test_builds_index_from_seeds(self, model_dir):
+        engine = make_engine(model_dir, mode="prototype")
+
+        assert engine.enabled
+        assert engine.labels == list(SEED_EXAMPLES)
+        assert (model_dir / "prototypes.npz").exists()
+        label, conf = engine.predict("youtube lecture")
+        assert label in SEED_EXAMPLES
+        assert 0.0 < conf <= 1.0
+
+    def test_seen_titles_use_embedding_cache(self, model_dir):
+        engine = make_engine(model_dir, mode="prototype")
+        engine.session = CountingSession(engine.session)
+
+        first = engine.predict_batch(["youtube lecture", "netflix", "youtube lecture"])
+        assert engine.session.batches == [2]  # Duplicates embedded once
+        second = engine.predict_batch(["netflix", "youtube lecture"])
+
+        assert engine.session.batches == [2]
+        assert second == [first[1], first[0]]
+
+    def test_user_examples_persist(self, model_dir):
+        engine = make_engine(model_dir, mode="prototype")
+        assert engine.add_example("reading", "lecture notes")
+        assert "reading" in engine.labels
+
+        reloaded = make_engine(model_dir, mode="prototype")
+        assert reloaded.labels == list(SEED_EXAMPLES) + ["reading"]
+        assert reloaded.prototypes.counts[-1] == 1
+
+    def test_add_example_requires_prototype_mode(self, model_dir):
+        assert not make_engine(model_dir).add_example("focused", "youtube lecture")
+
+
+class TestModelLoading:
+    """Test the model store, optimized-graph cache and lazy loading"""
+
+    def test_optimized_graph_cached_and_reused(self, model_dir):
+        first = make_engine(model_dir)
+        cached = os.listdir(model_dir / "cache")
+        assert len(cached) == 1
+        mtime = os.path.getmtime(model_dir / "cache" / cached[0])
+
+        second = make_engine(model_dir)
+        assert os.listdir(model_dir / "cache") == cached
+        assert os.path.getmtime(model_dir / "cache" / cached[0]) == mtime
+        assert second.predict("youtube lecture") == pytest.approx(first.predict("youtube lecture"))
+
+    def test_lazy_load_defers_session(self, model_dir):
+        engine = make_engine(model_dir, lazy=True)
+        assert engine.enabled
+        assert engine.session is None
+
+        assert engine.predict("youtube lecture")[0] in HYPOTHESES
+        assert engine.session is not None
+
+    def test_unload_and_reload(self, model_dir):
+        engine = make_engine(model_dir)
+        before = engine.predict("youtube lecture")
+        engine.unload()
+        assert engine.session is None and engine.enabled
+
+        assert engine.predict("youtube lecture") == pytest.approx(before)
+        assert engine.session is not None
+
+    def test_missing_model_does_not_download(self, tmp_path, monkeypatch):
+        import download_model
+        monkeypatch.setattr(download_model, "download_model", lambda: pytest.fail("download attempted"))
+        engine = make_engine(tmp_path, lazy=True)
+        assert not engine.enabled
+        assert engine.predict("anything") == ("unknown", 0.0)
+
+    def test_tampered_model_disables_ai(self, model_dir, capsys):
+        make_engine(model_dir)
+        object_path = ModelStore(str(model_dir)).get("model.onnx")
+        data = bytearray(open(object_path, 'rb').read())
+        data[-1] ^= 0xFF
+        with open(object_path, 'wb') as f:
+            f.write(data)
+        os.utime(object_path, ns=(1, 1))
+
+        engine = make_engine(model_dir)
+        assert not engine.enabled
+        assert engine.predict("youtube lecture") == ("unknown", 0.0)
+        assert "failed verification" in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
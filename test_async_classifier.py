@@ -0,0 +1,70 @@
+"""
+Tests for background AI classification
+"""
+
+import threading
+import time
+
+import pytest
+from async_classifier import AsyncClassifier
+
+
+class SlowModel:
+    """Fake predictor that blocks until released"""
+    
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+    
+    def predict(self, text):
+        self.calls.append(text)
+        self.release.wait(5)
+        return ("focused", 0.9)
+
+
+class TestAsyncClassifier:
+    """Test deadlines, pickup and de-duplication"""
+    
+    def test_fast_prediction_within_deadline(self):
+        """A prediction that finishes before the deadline is returned directly"""
+        classifier = AsyncClassifier(lambda text: ("distracted", 0.8))
+        assert classifier.classify("key", "text", timeout=1.0) == ("distracted", 0.8)
+    
+    def test_slow_prediction_picked_up_later(self):
+        """A missed deadline returns None and the verdict is available on a later call"""
+        model = SlowModel()
+        classifier = AsyncClassifier(model.predict)
+        
+        assert classifier.classify("key", "text", timeout=0.01) is None
+        model.release.set()
+        
+        deadline = time.time() + 2
+        while classifier.is_pending("key") and time.time() < deadline:
+            time.sleep(0.01)
+        assert classifier.classify("key", "text") == ("focused", 0.9)
+    
+    def test_in_flight_requests_deduplicated(self):
+        """Repeated requests for a pending key don't queue more predictions"""
+        model = SlowModel()
+        classifier = AsyncClassifier(model.predict)
+        
+        for _ in range(5):
+            assert classifier.classify("key", "text") is None
+        model.release.set()
+        time.sleep(0.1)
+        
+        assert len(model.calls) == 1
+        assert classifier.get_stats()['deduplicated'] == 4
+    
+    def test_predict_error_not_cached(self):
+        """A failing prediction frees the key for another attempt"""
+        def broken(text):
+            raise RuntimeError("boom")
+        classifier = AsyncClassifier(broken)
+        
+        assert classifier.classify("key", "text", timeout=1.0) is None
+        assert classifier.is_pending("key") == False
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -7,9 +7,30 @@ from camera_integration import (
     calculate_attention_multiplier,
     PostureMonitor,
     BreakReminder,
-    CameraAnalytics
+    CameraAnalytics,
+    CameraStatusMixin,
+    CascadeGate,
+    Detection,
+    DetectionAccumulator,
+    PhoneSchedule
 )
+import json
+import pickle
 import time
+from collections import namedtuple
+
+Landmark = namedtuple('Landmark', ['x', 'y', 'visibility'])
+
+
+def make_pose(wrist_y):
+    """Pose with nose at (0.5, 0.3), shoulders 0.3 apart and both wrists at wrist_y"""
+    pose = [Landmark(0.5, 0.9, 0.0) for _ in range(33)]
+    pose[CascadeGate.NOSE] = Landmark(0.5, 0.3, 0.99)
+    pose[CascadeGate.LEFT_SHOULDER] = Landmark(0.65, 0.5, 0.99)
+    pose[CascadeGate.RIGHT_SHOULDER] = Landmark(0.35, 0.5, 0.99)
+    pose[CascadeGate.LEFT_WRIST] = Landmark(0.6, wrist_y, 0.9)
+    pose[CascadeGate.RIGHT_WRIST] = Landmark(0.4, wrist_y, 0.9)
+    return pose
 
 
 class TestAttentionMultiplier:
@@ -202,5 +223,181 @@ class TestCameraAnalytics:
         assert analytics.time_away_seconds == 0
 
 
+class TestDetectionAccumulator:
+    """Test per-tick aggregation of camera detections"""
+    
+    def test_empty_window(self):
+        """No detections should produce no window"""
+        accumulator = DetectionAccumulator()
+        assert accumulator.consume() is None
+    
+    def test_window_aggregates(self):
+        """All detections in a tick should contribute to the aggregates"""
+        accumulator = DetectionAccumulator()
+        
+        for score in (90, 80, 70):
+            accumulator.add({'attention_score': score, 'looking_at_screen': True, 'present': True})
+        accumulator.add({'attention_score': 0, 'looking_at_screen': False, 'present': False,
+                         'phone_detected': True})
+        
+        window = accumulator.consume()
+        assert window['samples'] == 4
+        assert window['attention_score'] == 60
+        assert window['looking_fraction'] == 0.75
+        assert window['present_fraction'] == 0.75
+        assert window['present'] == True
+        assert window['phone_detected'] == True
+    
+    def test_single_bad_frame_does_not_decide_tick(self):
+        """One absent frame among many present ones should not mark user away"""
+        accumulator = DetectionAccumulator()
+        
+        for _ in range(9):
+            accumulator.add({'attention_score': 85, 'present': True})
+        accumulator.add({'attention_score': 0, 'present': False})
+        
+        window = accumulator.consume()
+        assert window['present'] == True
+        assert window['attention_score'] == 76
+    
+    def test_consume_resets_window(self):
+        """Consuming should drain the accumulator"""
+        accumulator = DetectionAccumulator()
+        accumulator.add({'attention_score': 50, 'present': True})
+        
+        assert accumulator.consume()['samples'] == 1
+        assert accumulator.consume() is None
+    
+    def test_bounded_memory(self):
+        """Old detections should be dropped once the window is full"""
+        accumulator = DetectionAccumulator(max_samples=5)
+        for _ in range(20):
+            accumulator.add({'attention_score': 100, 'present': True})
+        
+        assert accumulator.consume()['samples'] == 5
+
+
+
+class FakeDetector(CameraStatusMixin):
+    """Minimal host for the status mixin"""
+    
+    def __init__(self):
+        self.enabled = True
+        self.last_detection = None
+        self.detection_thread = None
+        self.accumulator = DetectionAccumulator()
+        self.calibration_data = {'is_calibrated': False}
+
+
+class TestDetectionSnapshots:
+    """Test slotted detection results and cached status snapshots"""
+    
+    def make_detection(self, score=85):
+        return Detection(present=True, face_count=1, attention_score=score,
+                         looking_at_screen=score > 60, confidence=0.9, method='advanced')
+    
+    def test_dict_style_access(self):
+        """Detections can be read like the old result dicts"""
+        detection = self.make_detection()
+        assert detection['present'] == True
+        assert detection.get('phone_detected') == False
+        assert detection.get('missing', 'default') == 'default'
+        assert detection.to_dict()['attention_score'] == 85
+        with pytest.raises(KeyError):
+            detection['missing']
+    
+    def test_pickles_for_worker_process(self):
+        """Detections survive the trip from the worker process"""
+        detection = self.make_detection()
+        copy = pickle.loads(pickle.dumps(detection))
+        assert copy.to_dict() == detection.to_dict()
+    
+    def test_status_cached_per_version(self):
+        """Repeated reads between detections return the same snapshot"""
+        detector = FakeDetector()
+        detector._publish_detection(self.make_detection(85))
+        
+        first = detector.get_status()
+        assert detector.get_status() is first
+        assert detector.get_status_json() is detector.get_status_json()
+        assert json.loads(detector.get_status_json())['attention_score'] == 85
+        
+        detector._publish_detection(self.make_detection(30))
+        second = detector.get_status()
+        assert second is not first
+        assert second['message'] == '❌ Distracted'
+    
+    def test_status_tracks_enabled_flag(self):
+        """Disabling the camera invalidates the cached status"""
+        detector = FakeDetector()
+        detector._publish_detection(self.make_detection())
+        assert detector.get_status()['enabled'] == True
+        
+        detector.enabled = False
+        assert detector.get_status()['message'] == 'Camera disabled'
+
+
+
+class TestCascadeGate:
+    """Test wrist-based gating of the hand and phone models"""
+    
+    def test_wrists_down_skips_models(self):
+        """Wrists far from the face should skip the gated models"""
+        gate = CascadeGate(refresh_frames=0)
+        for _ in range(20):
+            assert gate.update(make_pose(wrist_y=1.0)) == False
+        assert gate.get_stats()['skip_rate'] == 1.0
+    
+    def test_wrist_near_face_runs_models(self):
+        """A raised wrist should open the gate"""
+        gate = CascadeGate(refresh_frames=0)
+        assert gate.update(make_pose(wrist_y=0.35)) == True
+    
+    def test_hold_after_wrist_drops(self):
+        """The gate stays open for hold_frames after the trigger"""
+        gate = CascadeGate(hold_frames=3, refresh_frames=0)
+        gate.update(make_pose(wrist_y=0.35))
+        results = [gate.update(make_pose(wrist_y=1.0)) for _ in range(5)]
+        assert results == [True, True, True, False, False]
+    
+    def test_periodic_refresh(self):
+        """The refresh still runs the models every refresh_frames frames"""
+        gate = CascadeGate(refresh_frames=10)
+        results = [gate.update(make_pose(wrist_y=1.0)) for _ in range(30)]
+        assert sum(results) == 3
+    
+    def test_missing_pose_fails_open(self):
+        """Without pose landmarks the gate cannot decide and lets models run"""
+        gate = CascadeGate()
+        assert gate.update(None) == True
+
+
+class TestPhoneSchedule:
+    """Test when YOLO runs and how long its verdict is held"""
+    
+    def test_runs_every_interval_while_open(self):
+        """An open gate runs YOLO on the first frame and then every interval frames"""
+        schedule = PhoneSchedule(interval=3)
+        assert [schedule.due(True, False) for _ in range(7)] == [True, False, False, True, False, False, True]
+    
+    def test_closed_gate_without_phone_skips(self):
+        """With the gate closed and no phone seen, YOLO does not run"""
+        schedule = PhoneSchedule(interval=3)
+        assert not any(schedule.due(False, False) for _ in range(10))
+        assert schedule.due(True, False)  # Reopening runs at once
+    
+    def test_gate_closing_keeps_visible_phone(self):
+        """A phone held just outside the wrist window stays detected until a real run clears it"""
+        from cascade_benchmark import simulate
+        near, away = make_pose(wrist_y=0.35), make_pose(wrist_y=1.0)
+        trace = ([{'pose': near, 'phone': True}] * 6 + [{'pose': away, 'phone': True}] * 30 +
+                 [{'pose': away, 'phone': False}] * 30)
+        result = simulate(trace, CascadeGate(hold_frames=0, refresh_frames=0))
+        assert result['recall'] == 1.0
+        # Cleared by the first run after the phone went away, then YOLO stops
+        assert result['precision'] > 0.9
+        assert result['yolo_runs'] <= (6 + 30) // 3 + 2
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
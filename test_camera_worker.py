@@ -0,0 +1,80 @@
+"""
+Tests for the camera worker shared-memory frame ring
+"""
+
+import pytest
+from camera_worker import SharedFrameRing
+
+
+class TestSharedFrameRing:
+    """Test frame hand-off through shared memory"""
+    
+    def test_empty_ring(self):
+        """A new ring has no frame to read"""
+        ring = SharedFrameRing.create(slot_count=2, slot_size=16)
+        try:
+            assert ring.read_latest() is None
+            assert ring.latest_seq() == 0
+        finally:
+            ring.close()
+    
+    def test_latest_frame_wins(self):
+        """Readers always get the most recently written frame"""
+        ring = SharedFrameRing.create(slot_count=3, slot_size=16)
+        try:
+            for i in range(10):
+                assert ring.write(f"frame-{i}".encode())
+            
+            seq, data = ring.read_latest()
+            assert seq == 10
+            assert data == b"frame-9"
+        finally:
+            ring.close()
+    
+    def test_oversized_frame_rejected(self):
+        """Frames larger than a slot are dropped, keeping the previous one"""
+        ring = SharedFrameRing.create(slot_count=2, slot_size=8)
+        try:
+            ring.write(b"small")
+            assert ring.write(b"x" * 9) == False
+            assert ring.read_latest() == (1, b"small")
+        finally:
+            ring.close()
+    
+    def test_attach_reads_same_memory(self):
+        """A second handle attached by name sees frames from the writer"""
+        ring = SharedFrameRing.create(slot_count=2, slot_size=32)
+        reader = SharedFrameRing.attach(ring.name)
+        try:
+            ring.write(b"\xff\xd8jpeg-bytes")
+            assert reader.read_latest() == (1, b"\xff\xd8jpeg-bytes")
+            assert reader.slot_size == 32
+        finally:
+            reader.close()
+            ring.close()
+
+
+class TestClipFrames:
+    """Test clip frames from the worker are downscaled like in-process ones"""
+    
+    def test_clip_frame_downscaled_once_per_frame(self):
+        cv2 = pytest.importorskip("cv2")
+        import numpy as np
+        from camera_worker import ProcessCameraDetector
+        
+        detector = ProcessCameraDetector()
+        detector.ring = SharedFrameRing.create(slot_count=2, slot_size=1 << 20)
+        try:
+            frame = np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+            detector.ring.write(cv2.imencode('.jpg', frame)[1].tobytes())
+            
+            clip = detector.get_clip_frame(max_width=320, quality=60)
+            assert cv2.imdecode(np.frombuffer(clip, np.uint8), cv2.IMREAD_COLOR).shape[:2] == (180, 320)
+            assert len(clip) < len(detector.get_frame())
+            assert detector.get_clip_frame(max_width=320, quality=60) is clip
+        finally:
+            detector.ring.close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,136 @@
+"""
+Tests for event-triggered clip capture
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+from clip_recorder import ClipBuffer, ClipRecorder
+
+
+class TestClipBuffer:
+    """Test the bounded pre-roll buffer"""
+    
+    def test_evicts_by_age(self):
+        """Frames older than the window are dropped"""
+        buffer = ClipBuffer(max_seconds=2, max_bytes=1000)
+        for ts in range(10):
+            buffer.append(b"x", timestamp=float(ts))
+        
+        assert [ts for ts, _ in buffer.frames] == [7.0, 8.0, 9.0]
+    
+    def test_hard_byte_ceiling(self):
+        """Total buffered bytes never exceed the ceiling"""
+        buffer = ClipBuffer(max_seconds=100, max_bytes=25)
+        for ts in range(10):
+            buffer.append(b"0123456789", timestamp=float(ts))
+        
+        assert buffer.total_bytes <= 25
+        assert len(buffer.frames) == 2
+    
+    def test_oversized_frame_rejected(self):
+        """A frame larger than the ceiling is not buffered"""
+        buffer = ClipBuffer(max_seconds=10, max_bytes=5)
+        assert buffer.append(b"0123456789") == False
+        assert buffer.total_bytes == 0
+    
+    def test_pinned_frames_count_against_ceiling(self):
+        """Frames of a clip being written are kept; new frames that don't fit are dropped"""
+        buffer = ClipBuffer(max_seconds=2, max_bytes=30)
+        for ts in range(3):
+            buffer.append(b"0123456789", timestamp=float(ts))
+        buffer.pin(0.0)
+        assert buffer.append(b"0123456789", timestamp=3.0) == False
+        assert [ts for ts, _ in buffer.frames] == [0.0, 1.0, 2.0]
+        assert buffer.total_bytes == 30
+        
+        buffer.unpin()
+        assert buffer.append(b"0123456789", timestamp=4.0) == True
+        assert [ts for ts, _ in buffer.frames] == [2.0, 4.0]
+    
+    def test_frames_until_end(self):
+        """A clip's frames stop at its end timestamp"""
+        buffer = ClipBuffer(max_seconds=10, max_bytes=1000)
+        for ts in range(5):
+            buffer.append(b"x", timestamp=float(ts))
+        assert [ts for ts, _ in buffer.frames_since(1.0, 3.0)] == [1.0, 2.0, 3.0]
+
+
+class TestClipRecorder:
+    """Test trigger handling and clip writing"""
+    
+    def make_recorder(self, tmp_path, **kwargs):
+        return ClipRecorder(lambda: b"\xff\xd8frame\xff\xd9", clip_dir=str(tmp_path),
+                            pre_roll_seconds=0.2, post_roll_seconds=0.2, fps=50, **kwargs)
+    
+    def test_phone_trigger_writes_clip(self, tmp_path):
+        """A phone detection produces a clip with pre- and post-roll frames"""
+        recorder = self.make_recorder(tmp_path)
+        recorder.start()
+        try:
+            time.sleep(0.3)
+            assert recorder.check_triggers({'enabled': True, 'present': True, 'phone_detected': True}) == 'phone'
+            time.sleep(0.5)
+        finally:
+            recorder.stop()
+        
+        assert recorder.clips_written == 1
+        sidecar = [name for name in os.listdir(tmp_path) if name.endswith('.json')][0]
+        with open(os.path.join(tmp_path, sidecar)) as f:
+            meta = json.load(f)
+        assert meta['reason'] == 'phone'
+        assert min(meta['frame_offsets']) < 0 < max(meta['frame_offsets'])
+    
+    def test_backed_up_writer_stays_within_budget(self, tmp_path):
+        """While a clip waits on a slow disk, buffered bytes stay under the ceiling"""
+        frame = b"\xff\xd8" + b"x" * 96 + b"\xff\xd9"
+        recorder = ClipRecorder(lambda: frame, clip_dir=str(tmp_path), pre_roll_seconds=0.1,
+                                post_roll_seconds=0.05, fps=100, max_buffer_mb=2000 / (1024 * 1024),
+                                cooldown_seconds=0)
+        release = threading.Event()
+        write_clip = recorder._write_clip
+        
+        def slow_write(*args):
+            release.wait(5)
+            return write_clip(*args)
+        
+        recorder._write_clip = slow_write
+        recorder.start()
+        try:
+            time.sleep(0.15)
+            recorder.trigger('phone')
+            time.sleep(0.1)
+            recorder.trigger('phone')  # Finishes while the first is still being written
+            peak = 0
+            for _ in range(30):
+                peak = max(peak, recorder.buffer.total_bytes)
+                time.sleep(0.01)
+            assert peak <= recorder.buffer.max_bytes
+            release.set()
+        finally:
+            recorder.stop()
+        assert recorder.clips_written == 1
+        # The pre-roll outlived the buffer's time window because the clip pinned it
+        sidecar = [name for name in os.listdir(tmp_path) if name.endswith('.json')][0]
+        with open(os.path.join(tmp_path, sidecar)) as f:
+            assert min(json.load(f)['frame_offsets']) <= -0.05
+    
+    def test_cooldown(self):
+        """A second trigger within the cooldown is ignored"""
+        recorder = ClipRecorder(lambda: None, cooldown_seconds=60)
+        assert recorder.trigger('phone') == True
+        recorder.pending = None
+        assert recorder.trigger('phone') == False
+    
+    def test_disabled_triggers_ignored(self):
+        """Only configured triggers fire"""
+        recorder = ClipRecorder(lambda: None, triggers=['phone'])
+        status = {'enabled': True, 'present': True, 'attention_score': 10}
+        assert recorder.check_triggers(status) is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,148 @@
+"""
+Tests for the course title statistics and the course signal in FocusDetector
+"""
+
+import pytest
+
+from course_stats import CountMinSketch, CourseStats, course_tokens
+from focus_detector import FocusDetector
+
+
+class TestCountMinSketch:
+    """Test approximate counting"""
+
+    def test_exact_without_collisions(self):
+        sketch = CountMinSketch(width=1024, depth=4)
+        for _ in range(5):
+            sketch.add("calculus")
+        sketch.add("lecture", 3)
+        assert sketch.estimate("calculus") == 5
+        assert sketch.estimate("lecture") == 3
+        assert sketch.estimate("netflix") == 0
+
+    def test_never_undercounts_and_memory_is_fixed(self):
+        sketch = CountMinSketch(width=64, depth=3)
+        for i in range(2000):
+            sketch.add(f"token{i % 500}")
+        assert all(sketch.estimate(f"token{i}") >= 4 for i in range(500))
+        assert sketch.table.nbytes == 64 * 3 * 4
+
+
+def study(stats, course, title, state, visits):
+    for _ in range(visits):
+        stats.observe(course, title, state)
+
+
+class TestCourseStats:
+    """Test course association"""
+
+    def test_association(self, tmp_path):
+        stats = CourseStats(str(tmp_path / "stats.npz"), min_support=10)
+        study(stats, "MATH 201", "Problem set 3 - calculus.pdf", "focused", 40)
+        study(stats, "MATH 201", "Cat videos - YouTube", "distracted", 40)
+        study(stats, "MATH 201", "Calculus lecture - YouTube", "focused", 10)
+
+        score, token = stats.association("math 201", "Calculus problem set")
+        assert (score, token) == (1.0, "calculus")
+        # YouTube is 20% study, below the course's 56% base rate
+        assert stats.association("MATH 201", "Music - YouTube") == (0.0, None)
+        # Unseen words count as the base rate and dilute a single strong word
+        assert stats.association("MATH 201", "Calculus week notes") == (0.0, None)
+        assert stats.association("HIST 110", "calculus") == (0.0, None)
+
+    def test_numbers_and_stopwords_ignored(self):
+        assert course_tokens("The Witcher 3 - Wild Hunt trailer") == ["hunt", "trailer", "wild", "witcher"]
+        assert course_tokens("Chapter 3 - The Derivative notes.pdf") == ["chapter", "derivative", "notes"]
+
+    def test_shared_common_token_not_enough(self, tmp_path):
+        stats = CourseStats(str(tmp_path / "stats.npz"))
+        study(stats, "Calculus", "Chapter 3 - The Derivative notes.pdf", "focused", 600)
+        study(stats, "Calculus", "Reddit - front page", "distracted", 40)
+        assert stats.association("Calculus", "The Witcher 3 - Wild Hunt trailer") == (0.0, None)
+
+        study(stats, "History", "Chapter 2 - Reformation essay", "focused", 600)
+        study(stats, "History", "Reddit - front page", "distracted", 400)
+        assert stats.association("Calculus", "Chapter 7 - Reformation") == (0.0, None)
+        assert stats.association("Calculus", "Derivative notes") == (1.0, "derivative")
+
+    def test_min_support(self, tmp_path):
+        stats = CourseStats(str(tmp_path / "stats.npz"), min_support=10)
+        study(stats, "MATH 201", "calculus", "focused", 9)
+        study(stats, "MATH 201", "netflix", "distracted", 20)
+        assert stats.association("MATH 201", "calculus")[0] == 0.0
+        stats.observe("MATH 201", "calculus", "focused")
+        assert stats.association("MATH 201", "calculus")[0] == 1.0
+
+    def test_persisted(self, tmp_path):
+        path = str(tmp_path / "stats.npz")
+        stats = CourseStats(path, min_support=1)
+        study(stats, "MATH 201", "calculus", "focused", 3)
+        study(stats, "MATH 201", "netflix", "distracted", 3)
+        stats.save()
+        loaded = CourseStats(path, min_support=1)
+        assert (loaded.total_visits, loaded.course_visits) == (6, {"math 201": 3})
+        assert loaded.association("MATH 201", "calculus") == (1.0, "calculus")
+
+    def test_course_count_bounded(self, tmp_path):
+        stats = CourseStats(str(tmp_path / "stats.npz"), max_courses=2)
+        for course in ("A", "B", "C"):
+            stats.observe(course, "notes", "focused")
+        assert list(stats.courses) == ["b", "c"]
+        assert list(stats.course_visits) == ["b", "c"]
+
+
+class StaticProvider:
+    def __init__(self, window):
+        self.window = window
+
+    def get_active_window(self):
+        return (*self.window, True)
+
+
+class TestFocusDetector:
+    """Test the course signal comes before the AI and depends on the course"""
+
+    def test_learned_tokens_count_as_study(self, tmp_path):
+        provider = StaticProvider(("Code", "stokes theorem.py"))
+        detector = FocusDetector({'ngram_model': None, 'overrides_path': None,
+                                  'course_stats_path': str(tmp_path / "stats.npz")},
+                                 window_provider=provider)
+        detector.course_stats.min_support = 5
+        detector.set_course("MATH 201")
+        for _ in range(5):
+            provider.window = ("Code", "stokes theorem.py")
+            detector.get_focus_state()  # Rules say focused: learned for the course
+            provider.window = ("Safari", "Netflix")
+            detector.get_focus_state()  # Rules say distracted: the course is not always study
+
+        provider.window = ("Preview", "Stokes theorem")  # No rule matches
+        result = detector.get_focus_state()
+        assert (result['state'], result['source']) == ("focused", "course")
+
+        detector.set_course("HIST 110")
+        assert detector.get_focus_state()['source'] != "course"
+        assert (tmp_path / "stats.npz").exists()  # Saved when the course ended
+
+    def test_each_visit_counts_once(self, tmp_path):
+        provider = StaticProvider(("Code", "stokes theorem.py"))
+        detector = FocusDetector({'ngram_model': None, 'overrides_path': None,
+                                  'course_stats_path': str(tmp_path / "stats.npz")},
+                                 window_provider=provider)
+        detector.set_course("MATH 201")
+        for _ in range(10):
+            detector.get_focus_state()  # Staying on a window is one visit
+        detector._on_window_change("Code", "stokes theorem.py", True)  # Pushed re-evaluation
+        assert detector.course_stats.total_visits == 1
+
+        provider.window = ("Safari", "Netflix")
+        detector.get_focus_state()
+        provider.window = ("Code", "stokes theorem.py")
+        detector.get_focus_state()
+        detector.set_course("MATH 202")
+        detector.get_focus_state()  # Same window in another course is a new visit
+        assert detector.course_stats.total_visits == 4
+        assert detector.course_stats.course_visits == {"math 201": 2, "math 202": 1}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
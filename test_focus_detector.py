@@ -0,0 +1,156 @@
+"""
+Tests for change-driven focus evaluation and pushed window changes
+"""
+
+import pytest
+
+from focus_detector import FocusDetector
+from window_provider import WindowProvider
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ManualProvider(WindowProvider):
+    """A provider whose window is set by the test; optionally pushes changes"""
+
+    def __init__(self, window, push=False):
+        self.window = window
+        self.push = push
+        self.listeners = []
+
+    def get_active_window(self):
+        return self.window
+
+    def subscribe(self, callback):
+        if not self.push:
+            return False
+        self.listeners.append(callback)
+        return True
+
+    def switch(self, app_name, window_title):
+        self.window = (app_name, window_title, True)
+        for callback in self.listeners:
+            callback(*self.window)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_detector(provider, clock):
+    detector = FocusDetector({'ngram_model': None, 'overrides_path': None}, window_provider=provider, clock=clock)
+    calls = []
+    classify = detector._classify
+    detector._classify = lambda app, title: calls.append((app, title)) or classify(app, title)
+    return detector, calls
+
+
+class TestChangeDriven:
+    """Test that only window changes re-classify"""
+
+    def test_unchanged_window_not_reclassified(self, clock):
+        provider = ManualProvider(("Code", "main.py", True))
+        detector, calls = make_detector(provider, clock)
+
+        for _ in range(5):
+            assert detector.get_focus_state()['state'] == "focused"
+        assert calls == [("Code", "main.py")]
+
+        provider.switch("Terminal", "bash")
+        detector.get_focus_state()
+        assert calls[-1] == ("Terminal", "bash")
+        stats = detector.get_evaluation_stats()
+        assert stats["ticks"] == 6 and stats["evaluations"] == 2
+
+    def test_grace_period_advances_without_reclassifying(self, clock):
+        provider = ManualProvider(("Code", "main.py", True))
+        detector, calls = make_detector(provider, clock)
+        detector.get_focus_state()
+
+        provider.switch("Safari", "YouTube")
+        states = []
+        for second in range(20):
+            clock.now = float(second)
+            states.append(detector.get_focus_state()['state'])
+
+        assert states[:15] == ["searching"] * 15
+        assert states[15:] == ["distracted"] * 5
+        assert len(calls) == 2
+
+    def test_pending_verdict_retried(self, clock):
+        provider = ManualProvider(("Obscure App", "something", True))
+        detector, calls = make_detector(provider, clock)
+        detector._classify = lambda app, title: calls.append(title) or ("distracted", 0.5, "AI classification pending", "pending")
+
+        detector.get_focus_state()
+        detector.get_focus_state()
+        assert len(calls) == 2
+
+
+class TestPush:
+    """Test pushed window changes"""
+
+    def test_pull_only_provider(self, clock):
+        detector, _ = make_detector(ManualProvider(("Code", "main.py", True)), clock)
+        assert not detector.enable_push(lambda result: None)
+
+    def test_pushed_change_evaluated_immediately(self, clock):
+        provider = ManualProvider(("Code", "main.py", True), push=True)
+        detector, calls = make_detector(provider, clock)
+        results = []
+        assert detector.enable_push(results.append)
+
+        provider.switch("Safari", "YouTube")
+        assert [r['app_name'] for r in results] == ["Safari"]
+        assert results[0]['state'] == "searching"  # Grace period starts at the switch
+        assert detector.in_grace_period
+
+        # The next tick reuses the pushed verdict
+        assert detector.get_focus_state()['state'] == "searching"
+        assert calls == [("Safari", "YouTube")]
+        assert detector.get_evaluation_stats()["pushed"] == 1
+
+    def test_no_evaluation_while_inactive(self, clock):
+        provider = ManualProvider(("Code", "main.py", True), push=True)
+        detector, calls = make_detector(provider, clock)
+        session = {"active": False}
+        results = []
+        detector.enable_push(results.append, active=lambda: session["active"])
+
+        provider.switch("Safari", "YouTube")
+        assert calls == [] and results == []
+        assert not detector.in_grace_period
+
+        session["active"] = True
+        provider.switch("Terminal", "bash")
+        assert calls == [("Terminal", "bash")]
+        assert [r['app_name'] for r in results] == ["Terminal"]
+
+    def test_results_ordered_by_sequence(self, clock):
+        provider = ManualProvider(("Code", "main.py", True), push=True)
+        detector, _ = make_detector(provider, clock)
+        results = []
+        detector.enable_push(results.append)
+
+        polled = detector.get_focus_state()
+        provider.switch("Safari", "YouTube")
+        assert results[0]['sequence'] > polled['sequence']
+        assert detector.get_focus_state()['sequence'] > results[0]['sequence']
+
+    def test_callback_errors_contained(self, clock):
+        provider = ManualProvider(("Code", "main.py", True), push=True)
+        detector, _ = make_detector(provider, clock)
+        detector.enable_push(lambda result: 1 / 0)
+        provider.switch("Terminal", "bash")
+        assert detector.get_focus_state()['app_name'] == "Terminal"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,286 @@
+"""
+Tests for the shared inference server: framing, micro-batching, the socket
+round trip and the client-side fallback to in-process models
+"""
+
+import os
+import socket
+import stat
+import struct
+import threading
+import time
+
+import pytest
+
+import inference_server
+from inference_server import (InferenceClient, InferenceServer, InferenceUnavailable, MicroBatcher,
+                              SharedInferenceEngine, peer_uid, recv_message, send_message)
+
+
+class FakeTextEngine:
+    """Labels titles containing 'lecture' as focused and records batch sizes"""
+
+    def __init__(self):
+        self.enabled = True
+        self.batches = []
+
+    def predict_batch(self, texts, batch_size=32):
+        self.batches.append(len(texts))
+        return [("focused", 0.9) if "lecture" in text else ("distracted", 0.8) for text in texts]
+
+
+def fake_phone_detector(jpegs):
+    return [(data == b"phone", (1, 2, 3, 4) if data == b"phone" else None) for data in jpegs]
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    run_dir = tmp_path / "run"
+    run_dir.mkdir(mode=0o700)
+    return str(run_dir / "inference.sock")
+
+
+@pytest.fixture
+def server(socket_path):
+    server = InferenceServer(socket_path, FakeTextEngine(), fake_phone_detector, window=0.05)
+    server.start()
+    yield server
+    server.stop()
+
+
+class TestFraming:
+    """Test length-prefixed JSON messages with binary payloads"""
+
+    def test_roundtrip(self):
+        a, b = socket.socketpair()
+        try:
+            send_message(a, {"op": "phone", "n": 1}, b"\x00\xffjpeg")
+            send_message(a, {"op": "ping"})
+            assert recv_message(b) == ({"op": "phone", "n": 1}, b"\x00\xffjpeg")
+            assert recv_message(b) == ({"op": "ping"}, b"")
+        finally:
+            a.close()
+            b.close()
+
+    def test_closed_connection(self):
+        a, b = socket.socketpair()
+        a.close()
+        with pytest.raises(ConnectionError):
+            recv_message(b)
+        b.close()
+
+
+class TestMicroBatcher:
+    """Test merging concurrent requests into one call"""
+
+    def test_concurrent_submits_share_a_batch(self):
+        sizes = []
+        batcher = MicroBatcher(lambda items: sizes.append(len(items)) or [item * 2 for item in items], window=0.2)
+        results = {}
+
+        def submit(n):
+            results[n] = batcher.submit([n, n + 100], timeout=5)
+
+        threads = [threading.Thread(target=submit, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {n: [n * 2, (n + 100) * 2] for n in range(4)}
+        assert sum(sizes) == 8
+        assert len(sizes) < 4
+        assert batcher.get_stats()["requests"] == 4
+
+    def test_max_batch_closes_window(self):
+        batcher = MicroBatcher(lambda items: items, window=5.0, max_batch=2)
+        started = time.monotonic()
+        assert batcher.submit([1, 2], timeout=5) == [1, 2]
+        assert time.monotonic() - started < 1.0
+
+    def test_errors_reach_every_caller(self):
+        def fail(items):
+            raise ValueError("model crashed")
+
+        batcher = MicroBatcher(fail, window=0.01)
+        with pytest.raises(ValueError):
+            batcher.submit(["title"], timeout=5)
+
+
+class TestServer:
+    """Test the socket round trip between InferenceClient and InferenceServer"""
+
+    def test_ping_reports_models(self, server, socket_path):
+        client = InferenceClient(socket_path)
+        assert client.ping() == {"ok": True, "text": True, "phone": True}
+        client.close()
+
+    def test_classify_and_phone(self, server, socket_path):
+        client = InferenceClient(socket_path)
+        assert client.classify(["python lecture", "netflix"]) == [("focused", 0.9), ("distracted", 0.8)]
+        assert client.detect_phone(b"phone") == (True, (1, 2, 3, 4))
+        assert client.detect_phone(b"desk") == (False, None)
+        client.close()
+
+    def test_clients_batched_together(self, server, socket_path):
+        clients = [InferenceClient(socket_path) for _ in range(4)]
+        threads = [threading.Thread(target=client.classify, args=(["lecture"],)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(server.text_engine.batches) == 4
+        assert len(server.text_engine.batches) < 4
+        for client in clients:
+            client.close()
+
+    def test_unsupported_operation(self, socket_path):
+        server = InferenceServer(socket_path, FakeTextEngine())
+        server.start()
+        try:
+            with pytest.raises(InferenceUnavailable):
+                InferenceClient(socket_path).detect_phone(b"phone")
+        finally:
+            server.stop()
+
+    def test_refuses_to_replace_live_server(self, server, socket_path):
+        with pytest.raises(RuntimeError):
+            InferenceServer(socket_path, FakeTextEngine()).start()
+
+    def test_replaces_stale_socket(self, socket_path):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+
+        server = InferenceServer(socket_path, FakeTextEngine())
+        server.start()
+        try:
+            assert InferenceClient(socket_path).ping()["ok"]
+        finally:
+            server.stop()
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+class TestAccessControl:
+    """Test the socket is private to its user and clients only talk to their own user's server"""
+
+    def test_private_socket_and_directory(self, tmp_path):
+        socket_path = str(tmp_path / "new" / "inference.sock")
+        server = InferenceServer(socket_path, FakeTextEngine())
+        server.start()
+        try:
+            assert mode(tmp_path / "new") == 0o700
+            assert mode(socket_path) == 0o600
+        finally:
+            server.stop()
+
+    def test_refuses_shared_directory(self, tmp_path):
+        os.chmod(tmp_path, 0o755)
+        with pytest.raises(RuntimeError):
+            InferenceServer(str(tmp_path / "inference.sock"), FakeTextEngine()).start()
+
+    def test_default_directory_is_per_user(self, monkeypatch):
+        monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1000")
+        assert inference_server.default_socket_dir() == "/run/user/1000/focuswin"
+        monkeypatch.delenv("XDG_RUNTIME_DIR")
+        assert inference_server.default_socket_dir().endswith(f"focuswin-{os.getuid()}")
+
+    def test_peer_is_own_user(self, server, socket_path):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+            assert peer_uid(sock) in (os.getuid(), None)
+        finally:
+            sock.close()
+
+    def test_foreign_socket_rejected(self, server, socket_path, monkeypatch):
+        monkeypatch.setattr(inference_server.os, "getuid", lambda: os.stat(socket_path).st_uid + 1)
+        with pytest.raises(InferenceUnavailable, match="another user"):
+            InferenceClient(socket_path).detect_phone(b"phone")
+
+    def test_foreign_server_gets_nothing(self, socket_path, monkeypatch):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(socket_path)
+        listener.listen(1)
+        monkeypatch.setattr(inference_server, "peer_uid", lambda sock: os.getuid() + 1)
+        try:
+            with pytest.raises(InferenceUnavailable, match="another user"):
+                InferenceClient(socket_path).detect_phone(b"frame")
+            conn, _ = listener.accept()
+            conn.settimeout(1.0)
+            assert conn.recv(1) == b""  # Closed without a byte of the frame
+            conn.close()
+        finally:
+            listener.close()
+
+    def test_unknown_peer_trusted_in_private_directory(self, server, socket_path, monkeypatch):
+        monkeypatch.setattr(inference_server, "peer_uid", lambda sock: None)
+        assert InferenceClient(socket_path).ping()["ok"]
+
+    def test_unknown_peer_rejected_in_shared_directory(self, server, socket_path, monkeypatch):
+        monkeypatch.setattr(inference_server, "peer_uid", lambda sock: None)
+        os.chmod(os.path.dirname(socket_path), 0o755)
+        with pytest.raises(InferenceUnavailable, match="Cannot verify"):
+            InferenceClient(socket_path).ping()
+
+    def test_peer_credentials_without_so_peercred(self, monkeypatch):
+        class FakeSocket:
+            def getsockopt(self, level, option, size):
+                self.args = (level, option)
+                return struct.pack('IIh16I', 0, 501, 1, *[20] * 16)
+
+        monkeypatch.delattr(socket, "SO_PEERCRED", raising=False)
+        monkeypatch.delattr(socket, "LOCAL_PEERCRED", raising=False)
+        monkeypatch.setattr(inference_server.sys, "platform", "darwin")
+        sock = FakeSocket()
+        assert peer_uid(sock) == 501
+        assert sock.args == (0, 0x001)
+
+    def test_engine_falls_back_from_foreign_server(self, server, socket_path, monkeypatch):
+        monkeypatch.setattr(inference_server, "peer_uid", lambda sock: os.getuid() + 1)
+        local = FakeTextEngine()
+        engine = SharedInferenceEngine(socket_path, fallback=lambda: local)
+        assert not engine.remote
+        assert engine.predict("lecture") == ("focused", 0.9)
+        assert local.batches == [1] and server.text_batcher.get_stats()["requests"] == 0
+
+
+class TestSharedInferenceEngine:
+    """Test the drop-in engine and its in-process fallback"""
+
+    def test_uses_server(self, server, socket_path):
+        engine = SharedInferenceEngine(socket_path, fallback=lambda: pytest.fail("fallback built"))
+        assert engine.enabled and engine.remote
+        assert engine.predict("python lecture") == ("focused", 0.9)
+
+    def test_falls_back_without_server(self, socket_path):
+        local = FakeTextEngine()
+        engine = SharedInferenceEngine(socket_path, fallback=lambda: local)
+        assert engine.enabled and not engine.remote
+        assert engine.predict("netflix") == ("distracted", 0.8)
+        assert local.batches == [1]
+
+    def test_falls_back_when_server_stops(self, socket_path):
+        server = InferenceServer(socket_path, FakeTextEngine(), window=0.0)
+        server.start()
+        local = FakeTextEngine()
+        engine = SharedInferenceEngine(socket_path, fallback=lambda: local)
+        assert engine.predict("lecture") == ("focused", 0.9)
+
+        server.stop()
+        assert engine.predict("lecture") == ("focused", 0.9)
+        assert not engine.remote
+        assert local.batches == [1]
+
+    def test_no_fallback_returns_unknown(self, socket_path):
+        engine = SharedInferenceEngine(socket_path)
+        assert not engine.enabled
+        assert engine.predict_batch(["a", "b"]) == [("unknown", 0.0)] * 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,82 @@
+"""
+Tests for the model variant comparison tool
+Runs offline against the tiny model built in test_ai_engine.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from model_compare import agreement, percentile, compare
+from test_ai_engine import build_tiny_model
+
+
+class TestAgreement:
+    """Test the pure comparison helpers"""
+
+    def test_full_agreement(self):
+        preds = [("focused", 0.9), ("distracted", 0.7)]
+        result = agreement(preds, preds)
+        assert result['agreement'] == 1.0
+        assert result['mean_confidence_drift'] == 0.0
+
+    def test_partial_agreement(self):
+        baseline = [("focused", 0.9), ("distracted", 0.7), ("focused", 0.8), ("searching", 0.6)]
+        candidate = [("focused", 0.8), ("focused", 0.6), ("focused", 0.8), ("searching", 0.6)]
+        result = agreement(baseline, candidate)
+        assert result['agreement'] == 0.75
+        assert result['per_label'] == {"distracted": 0.0, "focused": 1.0, "searching": 1.0}
+        assert result['mean_confidence_drift'] == pytest.approx(0.05)
+
+    def test_length_mismatch(self):
+        with pytest.raises(ValueError):
+            agreement([("focused", 0.9)], [])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) in (50, 51)
+        assert percentile(values, 100) == 100
+        assert percentile([], 95) == 0.0
+
+
+class TestTinyModel:
+    """End-to-end comparison against a locally built model"""
+
+    def test_fp32_vs_int8(self, tmp_path):
+        pytest.importorskip("onnxruntime")
+        pytest.importorskip("tokenizers")
+        from download_model import quantize_model
+
+        vocab = ["[PAD]", "[UNK]", "youtube", "lecture", "netflix", "code", "reddit", "notes"]
+        build_tiny_model(tmp_path, vocab)
+        assert quantize_model(str(tmp_path)) is not None
+
+        texts = ["youtube lecture", "netflix", "code notes", "reddit", "unknown words here"]
+        report = compare(str(tmp_path), texts)
+
+        assert report['titles'] == len(texts)
+        assert report['baseline']['variant'] == "fp32"
+        assert report['candidate']['variant'] == "int8"
+        assert 0.0 <= report['agreement'] <= 1.0
+        assert report['baseline']['p50_ms'] >= 0
+
+    def test_engine_builds_missing_variant(self, tmp_path):
+        """Selecting int8 quantizes the fp32 export when the int8 file is absent"""
+        pytest.importorskip("onnxruntime")
+        from ai_engine import AIInferenceEngine
+
+        build_tiny_model(tmp_path, ["[PAD]", "[UNK]", "youtube", "lecture"])
+        engine = AIInferenceEngine(model_path=str(tmp_path / "model.onnx"),
+                                   tokenizer_path=str(tmp_path / "tokenizer.json"), variant="int8")
+
+        assert engine.enabled
+        assert engine.variant == "int8"
+        assert (tmp_path / "model.int8.onnx").exists()
+        assert engine.predict("youtube lecture")[0] in engine.labels
+
+    def test_missing_variant(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            compare(str(tmp_path), ["text"])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,169 @@
+"""
+Tests for the model lifecycle manager: lazy loading, idle eviction,
+the memory budget and reloading after an unload
+"""
+
+import time
+
+import pytest
+
+import model_manager
+from model_manager import ModelManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_manager(clock, loads, **kwargs):
+    manager = ModelManager(clock=clock, **kwargs)
+    for name in ("face_mesh", "yolo", "text_model"):
+        manager.register(name, lambda name=name: loads.append(name) or FakeModel(name), lambda model: model.close())
+    return manager
+
+
+class TestLoading:
+    """Test on-demand loading"""
+
+    def test_loads_on_first_use_only(self, clock):
+        loads = []
+        manager = make_manager(clock, loads)
+        assert loads == []
+        first = manager.get("yolo")
+        assert manager.get("yolo") is first
+        assert loads == ["yolo"]
+        assert manager.is_loaded("yolo") and not manager.is_loaded("face_mesh")
+
+    def test_reloads_after_unload(self, clock):
+        """A model closed by unload (e.g. camera stop) is recreated on the next use"""
+        loads = []
+        manager = make_manager(clock, loads)
+        first = manager.get("face_mesh")
+        assert manager.unload("face_mesh")
+        assert first.closed
+
+        second = manager.get("face_mesh")
+        assert second is not first and not second.closed
+        assert manager.get_stats()["models"]["face_mesh"]["loads"] == 2
+
+    def test_failed_loader_not_retried(self, clock):
+        calls = []
+
+        def broken():
+            calls.append(1)
+            raise RuntimeError("no weights")
+
+        manager = ModelManager(clock=clock)
+        manager.register("yolo", broken)
+        assert manager.get("yolo") is None
+        assert manager.get("yolo") is None
+        assert calls == [1]
+        assert not manager.available("yolo")
+
+        manager.reset("yolo")
+        assert manager.available("yolo")
+
+    def test_unregistered_model(self, clock):
+        manager = ModelManager(clock=clock)
+        with manager.use("hands") as model:
+            assert model is None
+        assert not manager.available("hands")
+
+
+class TestEviction:
+    """Test idle timeouts and the memory budget"""
+
+    def test_idle_models_unloaded(self, clock):
+        loads = []
+        manager = make_manager(clock, loads, idle_timeout=60)
+        yolo = manager.get("yolo")
+        clock.now = 30
+        manager.get("text_model")
+
+        clock.now = 70
+        assert manager.evict() == ["yolo"]
+        assert yolo.closed
+        assert manager.is_loaded("text_model")
+
+    def test_models_in_use_are_kept(self, clock):
+        loads = []
+        manager = make_manager(clock, loads, idle_timeout=10)
+        with manager.use("text_model") as model:
+            clock.now = 100
+            assert manager.evict() == []
+            assert not manager.unload("text_model")
+            assert not model.closed
+        clock.now = 200
+        assert manager.evict() == ["text_model"]
+
+    def test_per_model_timeout(self, clock):
+        manager = ModelManager(idle_timeout=10, clock=clock)
+        manager.register("pose", lambda: FakeModel("pose"), idle_timeout=None)
+        manager.get("pose")
+        clock.now = 1000
+        assert manager.evict() == []
+
+    def test_reaper_restarts(self, clock):
+        manager = make_manager(clock, [], idle_timeout=10, check_interval=0.01)
+        manager.start()
+        manager.stop()
+        manager.start()  # e.g. the camera stopped and started again
+        try:
+            yolo = manager.get("yolo")
+            clock.now = 100
+            for _ in range(200):
+                if yolo.closed:
+                    break
+                time.sleep(0.01)
+            assert yolo.closed
+        finally:
+            manager.stop()
+
+    def test_memory_budget_evicts_least_recently_used(self, clock, monkeypatch):
+        rss = iter([0, 100, 100, 250, 250, 300])  # before/after each load
+        monkeypatch.setattr(model_manager, "rss_mb", lambda: next(rss))
+        loads = []
+        manager = make_manager(clock, loads, idle_timeout=None, memory_budget_mb=260)
+
+        manager.get("face_mesh")  # 100 MB
+        clock.now = 1
+        manager.get("yolo")  # 150 MB
+        clock.now = 2
+        manager.get("text_model")  # 50 MB -> 300 MB, over budget
+
+        assert not manager.is_loaded("face_mesh")
+        assert manager.is_loaded("yolo") and manager.is_loaded("text_model")
+        assert manager.resident_mb() == pytest.approx(200)
+
+    def test_stats(self, clock):
+        loads = []
+        manager = make_manager(clock, loads)
+        manager.get("yolo")
+        clock.now = 5
+        stats = manager.get_stats()
+        assert stats["models"]["yolo"]["loaded"]
+        assert stats["models"]["yolo"]["idle_seconds"] == 5
+        assert stats["models"]["face_mesh"] == {"loaded": False, "in_use": 0, "failed": False, "idle_seconds": None,
+                                                "rss_mb": 0.0, "loads": 0, "unloads": 0}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,122 @@
+"""
+Tests for the content-addressed model store
+"""
+
+import json
+import os
+
+import pytest
+
+import model_store
+from model_store import ModelStore, ChecksumError, resolve_model_path
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+class TestModelStore:
+    """Test storing, verifying and adopting model files"""
+
+    def test_add_and_get(self, tmp_path):
+        source = tmp_path / "export.onnx"
+        write(source, b"weights")
+        store = ModelStore(str(tmp_path / "model"))
+
+        object_path = store.add("model.onnx", str(source))
+        assert os.path.basename(object_path) == store.digest("model.onnx")
+        assert store.get("model.onnx") == object_path
+        # The familiar name points at the same content
+        assert (tmp_path / "model" / "model.onnx").read_bytes() == b"weights"
+
+    def test_manifest_persists(self, tmp_path):
+        root = tmp_path / "model"
+        root.mkdir()
+        write(root / "tokenizer.json", b"{}")
+        ModelStore(str(root)).add("tokenizer.json")
+
+        manifest = json.loads((root / "manifest.json").read_text())
+        assert manifest["files"]["tokenizer.json"]["size"] == 2
+        assert ModelStore(str(root)).digest("tokenizer.json") == manifest["files"]["tokenizer.json"]["sha256"]
+
+    def test_identical_content_stored_once(self, tmp_path):
+        root = tmp_path / "model"
+        root.mkdir()
+        write(tmp_path / "a", b"same")
+        write(tmp_path / "b", b"same")
+        store = ModelStore(str(root))
+        assert store.add("a.onnx", str(tmp_path / "a")) == store.add("b.onnx", str(tmp_path / "b"))
+
+    def test_adopts_unregistered_file(self, tmp_path):
+        write(tmp_path / "model.onnx", b"legacy")
+        store = ModelStore(str(tmp_path))
+        assert store.digest("model.onnx") is None
+
+        path = store.get("model.onnx")
+        assert path is not None
+        assert store.digest("model.onnx") is not None
+
+    def test_missing_name(self, tmp_path):
+        store = ModelStore(str(tmp_path))
+        assert store.get("model.onnx") is None
+        assert not store.has("model.onnx")
+
+    def test_detects_corruption(self, tmp_path):
+        write(tmp_path / "model.onnx", b"weights")
+        store = ModelStore(str(tmp_path))
+        path = store.get("model.onnx")
+
+        write(path, b"WEIGHTS")  # Same size, new content and mtime
+        os.utime(path, ns=(1, 1))
+        with pytest.raises(ChecksumError):
+            ModelStore(str(tmp_path)).get("model.onnx")
+
+    def test_detects_missing_object(self, tmp_path):
+        write(tmp_path / "model.onnx", b"weights")
+        store = ModelStore(str(tmp_path))
+        os.remove(store.get("model.onnx"))
+        with pytest.raises(ChecksumError):
+            store.get("model.onnx")
+
+    def test_unchanged_files_not_rehashed(self, tmp_path, monkeypatch):
+        write(tmp_path / "model.onnx", b"weights")
+        ModelStore(str(tmp_path)).get("model.onnx")
+
+        calls = []
+        original = model_store.sha256_file
+        monkeypatch.setattr(model_store, "sha256_file", lambda path: calls.append(path) or original(path))
+        store = ModelStore(str(tmp_path))
+        store.get("model.onnx")
+        assert calls == []
+
+        store.get("model.onnx", verify=True)
+        assert len(calls) == 1
+
+    def test_verify_all(self, tmp_path):
+        write(tmp_path / "model.onnx", b"weights")
+        write(tmp_path / "config.json", b"{}")
+        store = ModelStore(str(tmp_path))
+        store.get("model.onnx")
+        store.get("config.json")
+        assert store.verify_all() == {"model.onnx": True, "config.json": True}
+
+    def test_optimized_path_keyed_on_content(self, tmp_path):
+        write(tmp_path / "model.onnx", b"weights")
+        store = ModelStore(str(tmp_path))
+        assert store.optimized_path("model.onnx", "key") is None
+
+        store.get("model.onnx")
+        cached = store.optimized_path("model.onnx", "ort1.0-all")
+        assert os.path.basename(cached).startswith(store.digest("model.onnx")[:16])
+        assert cached.endswith("-ort1.0-all.onnx")
+
+    def test_relative_paths_resolve_to_app_dir(self):
+        resolved = resolve_model_path("model/model.onnx")
+        assert os.path.isabs(resolved)
+        assert os.path.dirname(os.path.dirname(resolved)) == os.path.dirname(os.path.abspath(model_store.__file__))
+        assert resolve_model_path("/abs/model.onnx") == "/abs/model.onnx"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
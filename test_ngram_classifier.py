@@ -0,0 +1,83 @@
+"""
+Tests for the distilled hashed n-gram classifier
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from ngram_classifier import NgramClassifier, hash_ngrams
+
+FOCUSED = ["Linear Algebra Lecture Notes", "Calculus homework set 3", "Physics lab report draft",
+           "Organic chemistry study guide", "Lecture 12 - Algorithms", "Statistics homework solutions"]
+DISTRACTED = ["Funny cat compilation", "Top 10 movie trailers", "Celebrity gossip news",
+              "Gaming stream highlights", "Memes of the week", "Cat videos to watch"]
+
+
+def trained_model():
+    model = NgramClassifier(["distracted", "focused"], n_features=2 ** 12)
+    texts = FOCUSED + DISTRACTED
+    labels = ["focused"] * len(FOCUSED) + ["distracted"] * len(DISTRACTED)
+    model.fit(texts, labels, epochs=30, batch_size=4)
+    return model
+
+
+class TestHashNgrams:
+    """Test feature hashing"""
+
+    def test_stable_and_in_range(self):
+        indices = hash_ngrams("Khan Academy - Calculus", 1024)
+        assert np.array_equal(indices, hash_ngrams("Khan Academy - Calculus", 1024))
+        assert indices.min() >= 0 and indices.max() < 1024
+
+    def test_counts_every_ngram(self):
+        """' ab ' has 3 bigrams, 2 trigrams and 1 four-gram"""
+        assert len(hash_ngrams("ab", 1024, (2, 4))) == 6
+
+    def test_normalizes_case_and_whitespace(self):
+        assert np.array_equal(hash_ngrams("Hello   World", 4096), hash_ngrams("hello world", 4096))
+
+    def test_empty_text(self):
+        assert len(hash_ngrams("", 1024, (3, 4))) == 0
+
+
+class TestNgramClassifier:
+    """Test training, prediction and serialization"""
+
+    def test_learns_training_titles(self):
+        model = trained_model()
+        for text in FOCUSED:
+            assert model.predict(text)[0] == "focused"
+        for text in DISTRACTED:
+            assert model.predict(text)[0] == "distracted"
+
+    def test_generalizes_to_similar_titles(self):
+        model = trained_model()
+        assert model.predict("Lecture notes for calculus")[0] == "focused"
+        assert model.predict("funny cat memes")[0] == "distracted"
+
+    def test_confidence_is_probability(self):
+        label, confidence = trained_model().predict("something else entirely")
+        assert label in ("focused", "distracted")
+        assert 0.5 <= confidence <= 1.0
+
+    def test_untrained_model_is_uncertain(self):
+        model = NgramClassifier(["a", "b", "c"], n_features=256)
+        assert model.predict("anything")[1] == pytest.approx(1 / 3)
+
+    def test_save_and_load(self, tmp_path):
+        model = trained_model()
+        path = str(tmp_path / "ngram.npz")
+        model.save(path)
+
+        loaded = NgramClassifier.load(path)
+        assert loaded.labels == model.labels
+        assert loaded.n_features == model.n_features
+        assert loaded.weights.dtype == np.float32
+        for text in FOCUSED + DISTRACTED:
+            label, confidence = model.predict(text)
+            assert loaded.predict(text)[0] == label
+            assert loaded.predict(text)[1] == pytest.approx(confidence, abs=1e-2)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
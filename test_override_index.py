@@ -0,0 +1,118 @@
+"""
+Tests for the user override index and its place in FocusDetector
+"""
+
+import json
+
+import pytest
+
+from focus_detector import FocusDetector
+from override_index import OverrideIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    return OverrideIndex(str(tmp_path / "overrides.json"), check_interval=0)
+
+
+class TestLookup:
+    """Test exact, token-set and app-wide matching"""
+
+    def test_exact_window(self, index):
+        index.add("focused", "Safari", "Khan Academy - YouTube")
+        assert index.lookup("Safari", "Khan Academy - YouTube")[0] == "focused"
+        assert index.lookup("Safari", "Music - YouTube") is None
+        assert index.lookup("Chrome", "Khan Academy - YouTube") is None
+
+    def test_token_subset_most_specific_wins(self, index):
+        index.add("distracted", None, scope="tokens", tokens="youtube")
+        index.add("focused", None, scope="tokens", tokens="calculus youtube")
+
+        assert index.lookup("Chrome", "Calculus 1 Lecture - YouTube")[0] == "focused"
+        assert index.lookup("Safari", "Cat videos - YouTube")[0] == "distracted"
+        assert index.lookup("Safari", "Calculus notes") is None
+
+    def test_app_tokens_before_any_app(self, index):
+        index.add("distracted", None, scope="tokens", tokens="lecture")
+        index.add("focused", "Safari", scope="tokens", tokens="lecture")
+        assert index.lookup("Safari", "Lecture 4")[0] == "focused"
+        assert index.lookup("Chrome", "Lecture 4")[0] == "distracted"
+
+    def test_precedence(self, index):
+        index.add("distracted", "Safari", scope="app")
+        index.add("focused", "Safari", scope="tokens", tokens="lecture")
+        index.add("distracted", "Safari", "Lecture 4 - recap")
+
+        assert index.lookup("Safari", "Lecture 4 - recap") == ("distracted", "User override (window)")
+        assert index.lookup("Safari", "Lecture 5") == ("focused", "User override (tokens)")
+        assert index.lookup("Safari", "News") == ("distracted", "User override (app)")
+
+    def test_replace_and_remove(self, index):
+        index.add("focused", "Safari", "Reading")
+        index.add("distracted", "Safari", "Reading")
+        assert len(index.entries) == 1
+        assert index.lookup("Safari", "Reading")[0] == "distracted"
+
+        assert index.remove("Safari", "Reading")
+        assert not index.remove("Safari", "Reading")
+        assert index.lookup("Safari", "Reading") is None
+
+    def test_invalid(self, index):
+        with pytest.raises(ValueError):
+            index.add("bored", "Safari", "Reading")
+        with pytest.raises(ValueError):
+            index.add("focused", "Safari", scope="window")
+        with pytest.raises(ValueError):
+            index.add("focused", None, scope="app")
+
+
+class TestPersistence:
+    """Test saving and picking up edits without a restart"""
+
+    def test_survives_restart(self, index):
+        index.add("focused", "Safari", "Reading")
+        assert OverrideIndex(index.path).lookup("Safari", "Reading")[0] == "focused"
+
+    def test_external_edit_reloaded(self, index):
+        assert index.lookup("Notion", "Plan") is None
+        with open(index.path, 'w') as f:
+            json.dump({"overrides": [{"scope": "app", "app": "notion", "state": "focused"}]}, f)
+        index.mtime = None  # Filesystems with coarse mtimes
+        assert index.lookup("Notion", "Plan")[0] == "focused"
+
+    def test_corrupt_file_keeps_index(self, index):
+        index.add("focused", "Safari", "Reading")
+        with open(index.path, 'w') as f:
+            f.write("{not json")
+        index.mtime = None
+        assert index.lookup("Safari", "Reading")[0] == "focused"
+
+
+class StaticProvider:
+    def __init__(self, window):
+        self.window = window
+
+    def get_active_window(self):
+        return self.window
+
+
+class TestFocusDetector:
+    """Test overrides win over rules and AI"""
+
+    def test_override_beats_rules_and_applies_at_once(self, tmp_path):
+        provider = StaticProvider(("Safari", "Netflix", True))
+        detector = FocusDetector({'ngram_model': None, 'overrides_path': str(tmp_path / "o.json")},
+                                 window_provider=provider)
+        assert detector.get_focus_state()['source'] != "override"
+        detector.get_focus_state()  # Verdict now reused
+
+        detector.add_override("focused", "Safari", "Netflix")
+        result = detector.get_focus_state()
+        assert (result['state'], result['source']) == ("focused", "override")
+
+        detector.remove_override("Safari", "Netflix")
+        assert detector.get_focus_state()['source'] != "override"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,92 @@
+"""
+Tests for the gated keyword scan in RuleEngine
+"""
+
+import random
+import re
+import time
+
+import pytest
+from rule_benchmark import synthetic_corpus
+from rule_engine import RuleEngine, _trie_pattern
+
+
+FILLER = ['main.py', 'google chrome', 'safari', 'untitled', 'inbox', 'email', 'slack',
+          'spotify', 'elearning', 'maintenance', 'xcodebuild', 'twitter.comments', '-', '|', '(3)']
+
+
+def build_corpus(engine, size=5000, seed=7):
+    """Titles mixing keywords from every list with filler, including overlapping substrings"""
+    keywords = sorted(set(engine.study_keywords + engine.distraction_keywords + engine.search_keywords +
+                          engine.educational_channels + engine.explicit_learning))
+    rng = random.Random(seed)
+    corpus = [("App", keyword) for keyword in keywords]
+    corpus += [("App", a + b) for a in keywords[:40] for b in keywords[:40]]
+    for _ in range(size):
+        parts = [rng.choice(FILLER if rng.random() < 0.6 else keywords) for _ in range(rng.randint(1, 7))]
+        corpus.append((rng.choice(["Google Chrome", "Code", "Safari", "Finder"]), ' '.join(parts).title()))
+    return corpus
+
+
+class TestTriePattern:
+    """Test the regex that gates the keyword scan"""
+    
+    def test_matches_every_word(self):
+        """Words sharing prefixes or nested in each other are all found"""
+        pattern = re.compile(_trie_pattern(sorted(["twitter.com", "twitter", "itt", "x"])))
+        for word in ("twitter.com", "twitter", "itt", "x", "a twitter b"):
+            assert pattern.search(word), word
+        assert pattern.search("tweet") is None
+    
+    def test_no_keywords(self):
+        """Empty keyword lists never open the gate"""
+        engine = RuleEngine()
+        engine.search_keywords, engine.distraction_keywords, engine.study_keywords = [], [], []
+        engine.compile_keywords()
+        assert engine.keyword_gate is None
+        assert engine.analyze("Code", "main.py")[0] == "unknown"
+
+
+class TestRuleEngineEquivalence:
+    """The gated scan must reproduce the linear scan exactly"""
+    
+    def test_identical_decisions(self):
+        """State, confidence and reason match the reference implementation on every title"""
+        engine = RuleEngine()
+        for app_name, title in build_corpus(engine):
+            assert engine.analyze(app_name, title) == engine.analyze_linear(app_name, title), title
+    
+    def test_priority_order(self):
+        """Search beats distraction, educational override beats distraction, distraction beats study"""
+        engine = RuleEngine()
+        assert engine.analyze("Chrome", "YouTube search results")[0] == "searching"
+        assert engine.analyze("Chrome", "Python tutorial - YouTube")[0] == "focused"
+        assert engine.analyze("Chrome", "Reddit - r/python")[0] == "distracted"
+        assert engine.analyze("Code", "main.py")[0] == "focused"
+    
+    def test_recompile_after_edit(self):
+        """Edited keyword lists take effect after compile_keywords()"""
+        engine = RuleEngine()
+        engine.distraction_keywords.append('mastodon')
+        engine.compile_keywords()
+        assert engine.analyze("Chrome", "Mastodon")[0] == "distracted"
+
+
+class TestSpeed:
+    """The gated scan must beat the linear scan it replaces"""
+    
+    def test_faster_than_linear_on_benchmark_corpus(self):
+        engine = RuleEngine()
+        corpus = synthetic_corpus(engine, 3000)
+        best = {engine.analyze: float('inf'), engine.analyze_linear: float('inf')}
+        for _ in range(15):  # Interleaved best-of runs, so load spikes hit both alike
+            for fn in best:
+                started = time.perf_counter()
+                for app_name, title in corpus:
+                    fn(app_name, title)
+                best[fn] = min(best[fn], time.perf_counter() - started)
+        assert best[engine.analyze] < best[engine.analyze_linear]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,163 @@
+"""
+Tests for the Server-Sent Events state stream
+"""
+
+import json
+import queue
+
+import pytest
+
+from state_stream import StateStream
+
+
+def parse(event):
+    """(topic, version, fields) of one SSE event"""
+    lines = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+    return lines["event"], int(lines["id"]), json.loads(lines["data"])
+
+
+def drain(subscriber):
+    events = []
+    while not subscriber.queue.empty():
+        events.append(parse(subscriber.queue.get_nowait()))
+    return events
+
+
+class TestPublish:
+    """Test snapshots and field-level changes"""
+
+    def test_snapshot_then_changed_fields_only(self):
+        stream = StateStream()
+        state = {"xp": 0, "health": 100, "courses": ["Math"]}
+        stream.publish("status", state)
+
+        subscriber = stream.subscribe(["status"])
+        assert drain(subscriber) == [("status", 1, state)]
+
+        state["xp"] = 5
+        stream.publish("status", state)
+        stream.publish("status", state)  # Nothing changed, nothing sent
+        assert drain(subscriber) == [("status", 2, {"xp": 5})]
+
+    def test_in_place_edits_detected(self):
+        stream = StateStream()
+        state = {"courses": ["Math"]}
+        stream.publish("status", state)
+        subscriber = stream.subscribe(["status"])
+        drain(subscriber)
+
+        state["courses"].append("Physics")
+        assert stream.publish("status", state) == {"courses": ["Math", "Physics"]}
+        assert drain(subscriber)[0][2] == {"courses": ["Math", "Physics"]}
+
+    def test_topics_filtered(self):
+        stream = StateStream()
+        subscriber = stream.subscribe(["status"])
+        stream.publish("camera", {"enabled": True})
+        stream.publish("status", {"xp": 1})
+        assert [topic for topic, _, _ in drain(subscriber)] == ["status"]
+
+    def test_fields_filtered(self):
+        stream = StateStream()
+        stream.publish("status", {"xp": 1, "health": 100, "window_title": "notes"})
+        subscriber = stream.subscribe(["status"], fields=["health", "xp"])
+        assert drain(subscriber)[0][2] == {"xp": 1, "health": 100}
+
+        stream.publish("status", {"xp": 1, "health": 100, "window_title": "YouTube"})
+        assert drain(subscriber) == []  # No selected field changed
+        stream.publish("status", {"xp": 1, "health": 95, "window_title": "YouTube"})
+        assert drain(subscriber) == [("status", 3, {"health": 95})]
+
+    def test_slow_client_resynced(self):
+        stream = StateStream(max_pending=3)
+        subscriber = stream.subscribe(["status"])
+        for xp in range(10):
+            stream.publish("status", {"xp": xp, "health": 100})
+
+        events = drain(subscriber)
+        assert len(events) <= 3
+        # Merging whatever arrived still ends at the latest state
+        merged = {}
+        for _, _, fields in events:
+            merged.update(fields)
+        assert merged == {"xp": 9, "health": 100}
+        assert stream.get_stats()["resyncs"] > 0
+
+    def test_resync_survives_consumer_race(self):
+        stream = StateStream(max_pending=1)
+        slow, other = stream.subscribe(["status"]), stream.subscribe(["status"])
+        stream.publish("status", {"xp": 1})
+
+        take = slow.queue.get_nowait
+
+        def taken_by_consumer():
+            take()  # The client thread empties the queue between empty() and get_nowait()
+            raise queue.Empty
+
+        slow.queue.get_nowait = taken_by_consumer
+        drain(other)
+        stream.publish("status", {"xp": 2})  # slow is full: resync must not raise
+        assert drain(other) == [("status", 2, {"xp": 2})]
+
+
+class TestSnapshot:
+    """Test the versioned snapshot served to plain GETs"""
+
+    def test_versioned_and_serialized_once(self):
+        stream = StateStream()
+        assert stream.snapshot("status") is None
+        state = {"xp": 0, "health": 100}
+        stream.publish("status", state)
+        first = stream.snapshot("status")
+        assert json.loads(first.body) == state
+        assert first.body is first.body
+
+        stream.publish("status", state)
+        assert stream.snapshot("status") is first  # Unchanged: same version, same ETag
+
+        state["xp"] = 5
+        stream.publish("status", state)
+        second = stream.snapshot("status")
+        assert second.version == first.version + 1 and second.etag != first.etag
+        assert first.state == {"xp": 0, "health": 100}  # Old snapshots never change
+
+    def test_projection(self):
+        stream = StateStream()
+        stream.publish("status", {"xp": 1, "health": 90, "courses": ["Math"]})
+        snapshot = stream.snapshot("status")
+        assert json.loads(snapshot.encode(["health", "xp", "missing"])) == {"xp": 1, "health": 90}
+        assert snapshot.encode(["xp", "health"]) is snapshot.encode(["health", "xp"])
+
+    def test_msgpack(self):
+        msgpack = pytest.importorskip("msgpack")
+        stream = StateStream()
+        stream.publish("status", {"xp": 1, "health": 90})
+        assert msgpack.unpackb(stream.snapshot("status").encode(["health"], "msgpack")) == {"health": 90}
+
+    def test_etag_differs_across_restarts(self):
+        first, second = StateStream(), StateStream()
+        first.publish("status", {"xp": 1})
+        second.publish("status", {"xp": 2})
+        assert first.snapshot("status").etag != second.snapshot("status").etag
+
+
+class TestEvents:
+    """Test the SSE text generator"""
+
+    def test_heartbeat_and_unsubscribe(self):
+        stream = StateStream(heartbeat=0.01)
+        stream.publish("status", {"xp": 1})
+        subscriber = stream.subscribe(["status"])
+        events = stream.events(subscriber)
+
+        assert next(events).startswith("retry:")
+        assert parse(next(events))[2] == {"xp": 1}
+        assert next(events) == ": heartbeat\n\n"
+        assert stream.get_stats()["subscribers"] == 1
+
+        events.close()  # Client went away
+        assert stream.get_stats()["subscribers"] == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
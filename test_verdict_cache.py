@@ -0,0 +1,63 @@
+"""
+Tests for focus verdict memoization
+"""
+
+import pytest
+from verdict_cache import VerdictCache, normalize_title
+
+
+class TestNormalizeTitle:
+    """Test stripping of volatile title fragments"""
+    
+    def test_notification_counts(self):
+        assert normalize_title("(3) YouTube") == normalize_title("(12) YouTube") == "youtube"
+        assert normalize_title("Inbox (99+) - Gmail") == "inbox - gmail"
+        assert normalize_title("Slack [4] general") == "slack general"
+    
+    def test_unread_badges(self):
+        assert normalize_title("• Discord | #general") == "discord | #general"
+        assert normalize_title("Mail - 5 unread messages") == "mail -"
+    
+    def test_timers(self):
+        assert normalize_title("Pomodoro 24:59 - Focus") == normalize_title("Pomodoro 03:12 - Focus")
+        assert normalize_title("Lecture 1:02:33 / 1:30:00") == "lecture /"
+    
+    def test_stable_text_unchanged(self):
+        assert normalize_title("main.py - project - Visual Studio Code") == "main.py - project - visual studio code"
+
+
+class TestVerdictCache:
+    """Test the bounded LRU verdict cache"""
+    
+    def test_hit_after_put(self):
+        cache = VerdictCache()
+        verdict = ("distracted", 0.95, "Detected distraction app/site: youtube", "rules")
+        cache.put("Chrome", "(3) YouTube", verdict)
+        
+        assert cache.get("Chrome", "(4) YouTube") == verdict
+        assert cache.get("Chrome", "Reddit") is None
+        
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+    
+    def test_app_name_is_part_of_key(self):
+        cache = VerdictCache()
+        cache.put("Code", "notes", ("focused", 0.8, "", "rules"))
+        assert cache.get("Spotify", "notes") is None
+    
+    def test_lru_eviction(self):
+        cache = VerdictCache(maxsize=2)
+        cache.put("App", "a", 1)
+        cache.put("App", "b", 2)
+        cache.get("App", "a")  # "b" becomes least recently used
+        cache.put("App", "c", 3)
+        
+        assert cache.get("App", "b") is None
+        assert cache.get("App", "a") == 1
+        assert cache.get_stats()['evictions'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,216 @@
+"""
+Tests for the window providers
+- The co-process provider runs against a stub helper script
+- The X11 provider runs headless against Xvfb with windows scripted over a
+  second connection (acting as the window manager that sets _NET_ACTIVE_WINDOW)
+"""
+
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+from window_provider import CoprocessWindowProvider, LinuxX11WindowProvider
+
+STUB_HELPER = """
+import os, sys, time
+mode = sys.argv[1]
+for count, line in enumerate(sys.stdin, 1):
+    if mode == "hang":
+        time.sleep(60)
+    if mode == "denied":
+        reply = "denied\t\tNot authorized"
+    elif mode == "own":
+        reply = "ok\tFocusWin\tDashboard"
+    else:
+        reply = f"ok\tCode\trequest {count} from {os.getpid()}"
+    print(reply, flush=True)
+    if mode == "crash":
+        sys.exit(1)
+"""
+
+
+@pytest.fixture
+def stub_provider(tmp_path):
+    script = tmp_path / "helper.py"
+    script.write_text(STUB_HELPER)
+    providers = []
+
+    def make(mode, **kwargs):
+        provider = CoprocessWindowProvider([sys.executable, str(script), mode], **kwargs)
+        providers.append(provider)
+        return provider
+
+    yield make
+    for provider in providers:
+        provider.close()
+
+
+class TestCoprocessWindowProvider:
+    """Test the persistent helper protocol, timeouts and restarts"""
+
+    def test_one_helper_serves_every_request(self, stub_provider):
+        provider = stub_provider("ok")
+        replies = [provider.get_active_window() for _ in range(3)]
+
+        pids = {title.split()[-1] for _, title, _ in replies}
+        assert len(pids) == 1
+        assert [title.split()[1] for _, title, _ in replies] == ["1", "2", "3"]
+        assert all(app == "Code" and ok for app, _, ok in replies)
+        assert provider.has_permissions
+
+    def test_permission_denied(self, stub_provider):
+        provider = stub_provider("denied")
+        assert provider.get_active_window() == ("Unknown", "Unknown", False)
+        assert not provider.has_permissions
+
+    def test_own_window_reported_as_focuswin(self, stub_provider):
+        assert stub_provider("own").get_active_window() == ("FocusWin", "FocusWin", True)
+
+    def test_restarts_after_helper_exits(self, stub_provider):
+        provider = stub_provider("crash")
+        assert provider.get_active_window()[1].startswith("request 1")
+        assert provider.get_active_window() == ("Unknown", "Window helper unavailable", False)
+
+        # Backing off: no new helper until the restart delay has passed
+        assert provider.get_active_window()[2] is False
+        assert provider.process is None
+        provider.restart_at = 0
+        assert provider.get_active_window()[1].startswith("request 1")
+
+    def test_hung_helper_times_out(self, stub_provider):
+        provider = stub_provider("hang", timeout=0.2)
+        started = time.monotonic()
+        assert provider.get_active_window()[2] is False
+        assert time.monotonic() - started < 2.0
+        assert provider.process is None
+
+    def test_missing_helper(self):
+        provider = CoprocessWindowProvider(["/nonexistent/window-helper"])
+        assert provider.get_active_window() == ("Unknown", "Window helper unavailable", False)
+
+
+@pytest.fixture(scope="module")
+def xvfb():
+    pytest.importorskip("Xlib")
+    if shutil.which("Xvfb") is None:
+        pytest.skip("Xvfb not installed")
+    process = subprocess.Popen(['Xvfb', '-displayfd', '1', '-screen', '0', '640x480x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    number = process.stdout.readline().strip().decode()
+    if not number:
+        process.kill()
+        pytest.skip("Xvfb did not start")
+    yield f":{number}"
+    process.terminate()
+    process.wait()
+
+
+class ScriptedDesktop:
+    """Creates windows and switches the active one like a window manager would"""
+
+    def __init__(self, display_name):
+        from Xlib import X, Xatom, display
+        self.X, self.Xatom = X, Xatom
+        self.display = display.Display(display_name)
+        self.screen = self.display.screen()
+        self.NET_ACTIVE_WINDOW = self.display.intern_atom('_NET_ACTIVE_WINDOW')
+        self.NET_WM_NAME = self.display.intern_atom('_NET_WM_NAME')
+        self.UTF8_STRING = self.display.intern_atom('UTF8_STRING')
+
+    def open(self, app, title):
+        window = self.screen.root.create_window(0, 0, 100, 100, 0, self.screen.root_depth)
+        window.set_wm_class(app.lower(), app)
+        self.retitle(window, title)
+        return window
+
+    def retitle(self, window, title):
+        window.change_property(self.NET_WM_NAME, self.UTF8_STRING, 8, title.encode('utf-8'))
+        self.display.sync()
+
+    def activate(self, window):
+        self.screen.root.change_property(self.NET_ACTIVE_WINDOW, self.Xatom.WINDOW, 32, [window.id])
+        self.display.sync()
+
+    def close(self):
+        self.display.close()
+
+
+@pytest.fixture
+def desktop(xvfb):
+    desktop = ScriptedDesktop(xvfb)
+    yield desktop
+    desktop.close()
+
+
+def apply(provider, action):
+    """Run a scripted change and wait until the provider has processed its event"""
+    before = provider.updates
+    action()
+    provider.wait_for_update(before, timeout=2.0)
+    return provider.get_active_window()
+
+
+class TestLinuxX11WindowProvider:
+    """Test the cached active window follows X11 events"""
+
+    def test_reads_initial_active_window(self, xvfb, desktop):
+        desktop.activate(desktop.open("Code", "main.py - project"))
+        provider = LinuxX11WindowProvider(xvfb)
+        try:
+            assert provider.get_active_window() == ("Code", "main.py - project", True)
+        finally:
+            provider.close()
+
+    def test_follows_activation_and_title_changes(self, xvfb, desktop):
+        editor = desktop.open("Code", "notes.md")
+        browser = desktop.open("firefox", "Lecture 3 — YouTube")
+        desktop.activate(editor)
+        provider = LinuxX11WindowProvider(xvfb)
+        try:
+            assert apply(provider, lambda: desktop.activate(browser)) == ("firefox", "Lecture 3 — YouTube", True)
+            assert apply(provider, lambda: desktop.retitle(browser, "Netflix")) == ("firefox", "Netflix", True)
+
+            # Title changes of background windows are not followed
+            before = provider.updates
+            desktop.retitle(editor, "todo.md")
+            assert provider.wait_for_update(before, timeout=0.3) == before
+            assert provider.get_active_window() == ("firefox", "Netflix", True)
+
+            assert apply(provider, lambda: desktop.activate(editor)) == ("Code", "todo.md", True)
+        finally:
+            provider.close()
+
+    def test_pushes_changes_to_listeners(self, xvfb, desktop):
+        editor = desktop.open("Code", "notes.md")
+        browser = desktop.open("firefox", "Reading")
+        desktop.activate(editor)
+        provider = LinuxX11WindowProvider(xvfb)
+        pushed = []
+        try:
+            assert provider.subscribe(lambda *active: pushed.append(active))
+            apply(provider, lambda: desktop.activate(browser))
+            apply(provider, lambda: desktop.activate(browser))  # No change, no push
+            assert pushed == [("firefox", "Reading", True)]
+        finally:
+            provider.close()
+
+    def test_own_window_reported_as_focuswin(self, xvfb, desktop):
+        desktop.activate(desktop.open("FocusWin", "Dashboard"))
+        provider = LinuxX11WindowProvider(xvfb)
+        try:
+            assert provider.get_active_window() == ("FocusWin", "FocusWin", True)
+        finally:
+            provider.close()
+
+
+def test_missing_display():
+    provider = LinuxX11WindowProvider(":4242")
+    assert not provider.has_permissions
+    assert provider.get_active_window()[2] is False
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,126 @@
+"""
+Tests for window activity recording and replay, including replaying a trace
+through FocusDetector's grace period
+"""
+
+import json
+
+import pytest
+
+import window_trace
+from focus_detector import FocusDetector
+from window_trace import ReplayWindowProvider, RecordingWindowProvider, WindowRecorder, load_trace
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class ScriptedProvider:
+    def __init__(self, windows):
+        self.windows = list(windows)
+
+    def get_active_window(self):
+        return self.windows.pop(0)
+
+
+class TestRecorder:
+    """Test the append-only trace format"""
+
+    def test_records_changes_only(self, tmp_path):
+        path = str(tmp_path / "trace.jsonl")
+        clock = FakeClock()
+        provider = RecordingWindowProvider(ScriptedProvider([
+            ("Code", "main.py", True), ("Code", "main.py", True), ("Safari", "YouTube", True),
+        ]), WindowRecorder(path, clock=clock))
+
+        for _ in range(3):
+            provider.get_active_window()
+            clock.now += 1
+        provider.recorder.close()
+
+        lines = [json.loads(line) for line in open(path, encoding='utf-8')]
+        assert "start" in lines[0]
+        assert lines[1:] == [[100.0, "Code", "main.py", True], [102.0, "Safari", "YouTube", True]]
+
+    def test_sessions_joined_without_gaps(self, tmp_path):
+        path = str(tmp_path / "trace.jsonl")
+        first = WindowRecorder(path, clock=FakeClock(50.0))
+        first.record("Code", "main.py")
+        first.clock.now = 60.0
+        first.record("Terminal", "bash")
+        first.close()
+
+        # After a reboot the monotonic clock starts over
+        second = WindowRecorder(path, clock=FakeClock(5.0))
+        second.record("Safari", "YouTube")
+        second.close()
+        with open(path, 'a') as f:
+            f.write('[9.0,"Saf')  # Torn line from a crash
+
+        assert load_trace(path) == [(0.0, "Code", "main.py", True), (10.0, "Terminal", "bash", True),
+                                    (11.0, "Safari", "YouTube", True)]
+
+
+EVENTS = [(0.0, "Code", "main.py", True), (10.0, "Safari", "YouTube", True), (40.0, "Terminal", "bash", True)]
+
+
+class TestReplay:
+    """Test stepping and wall-clock replay"""
+
+    def test_manual_advance(self):
+        provider = ReplayWindowProvider(EVENTS, speed=None)
+        seen = []
+        while not provider.finished:
+            seen.append(provider.get_active_window()[0])
+            provider.advance(5.0)
+        assert seen == ["Code", "Code", "Safari", "Safari", "Safari", "Safari", "Safari", "Safari"]
+
+    def test_accelerated_wall_clock(self, monkeypatch):
+        clock = FakeClock(0.0)
+        monkeypatch.setattr(window_trace.time, "monotonic", clock)
+        provider = ReplayWindowProvider(EVENTS, speed=60.0)
+
+        assert provider.get_active_window()[0] == "Code"
+        clock.now = 0.5  # 30 trace seconds
+        assert provider.get_active_window()[0] == "Safari"
+        clock.now = 1.0
+        assert provider.get_active_window()[0] == "Terminal"
+        assert provider.finished
+
+    def test_loop(self):
+        provider = ReplayWindowProvider(EVENTS, speed=None, loop=True)
+        provider.advance(45.0)
+        assert provider.get_active_window()[0] == "Code"
+        provider.advance(10.0)
+        assert provider.get_active_window()[0] == "Safari"
+        assert not provider.finished
+
+    def test_empty_trace(self):
+        assert ReplayWindowProvider([], speed=None).get_active_window()[2] is False
+
+
+class TestGracePeriodReplay:
+    """Grace period behaviour driven by trace time"""
+
+    def test_grace_period_expires_in_trace_time(self):
+        provider = ReplayWindowProvider(EVENTS, speed=None)
+        detector = FocusDetector({'ngram_model': None, 'overrides_path': None}, window_provider=provider, clock=provider.now)
+
+        states = {}
+        while not provider.finished:
+            states[provider.now()] = detector.get_focus_state()['state']
+            provider.advance(1.0)
+
+        assert states[9.0] == "focused"
+        assert all(states[t] == "searching" for t in range(10, 25))
+        assert all(states[t] == "distracted" for t in range(25, 40))
+        assert detector.get_evaluation_stats()['evaluations'] == 2  # Once per window, not per tick
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,67 @@
+import re
+from collections import OrderedDict
+
+# Volatile title fragments that change without the activity changing
+_VOLATILE_PATTERNS = [
+    re.compile(r'[\(\[]\s*\d+\+?\s*(?:new|unread)?\s*[\)\]]', re.IGNORECASE),  # "(3)", "[12]", "(99+)", "(2 unread)"
+    re.compile(r'^\s*[•●◉*]+\s*'),                                             # Leading unread dots
+    re.compile(r'\b\d{1,2}:\d{2}(?::\d{2})?(?:\s*[ap]m)?\b', re.IGNORECASE),   # Clocks and timers "12:04", "1:02:33"
+    re.compile(r'\b\d+\s+(?:new|unread)\s+(?:messages?|notifications?|items?)\b', re.IGNORECASE),
+]
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_title(window_title):
+    """Strip notification counts, unread badges and timers so they don't split cache entries"""
+    text = window_title or ""
+    for pattern in _VOLATILE_PATTERNS:
+        text = pattern.sub(' ', text)
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+class VerdictCache:
+    """Bounded LRU cache of classification verdicts keyed on normalized (app_name, window_title)"""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(app_name, window_title):
+        return ((app_name or "").lower(), normalize_title(window_title))
+
+    def get(self, app_name, window_title):
+        """Returns the cached verdict or None"""
+        key = self.key(app_name, window_title)
+        verdict = self.entries.get(key)
+        if verdict is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return verdict
+
+    def put(self, app_name, window_title, verdict):
+        key = self.key(app_name, window_title)
+        self.entries[key] = verdict
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -1,60 +1,318 @@
+import os
 import platform
+import select
 import subprocess
+import threading
 import time
 
+# Our own windows are reported as FocusWin rather than classified
+OWN_APP_NAMES = ["Python", "antigravity", "AI Study Tracker", "StudyWin", "FocusWin"]
+
 class WindowProvider:
     """Abstract base class for window providers"""
     def get_active_window(self):
         """Returns (app_name, window_title, has_permissions)"""
         raise NotImplementedError
 
-class MacOSWindowProvider(WindowProvider):
-    """macOS implementation using AppleScript/Quartz"""
-    def __init__(self):
+    def subscribe(self, callback):
+        """
+        Call callback(app_name, window_title, has_permissions) from the provider's
+        thread whenever the active window changes. Returns False if this provider
+        can only be polled.
+        """
+        return False
+
+class CoprocessWindowProvider(WindowProvider):
+    """
+    Asks one long-lived helper process for the active window instead of
+    spawning a process per tick. Each request is a line on the helper's stdin;
+    the reply is one line on its stdout: "ok<TAB>app<TAB>title", or an error
+    status such as "denied<TAB><TAB>message". A helper that times out or exits
+    is killed and restarted with exponential backoff.
+    """
+    def __init__(self, command, timeout=1.0, max_restart_delay=30.0):
+        self.command = command
+        self.timeout = timeout
+        self.max_restart_delay = max_restart_delay
+        self.process = None
+        self.buffer = b""
+        self.lock = threading.Lock()
+        self.restart_count = 0
+        self.restart_at = 0.0
+        self.started_at = None
         self.has_permissions = False
-        self.check_permissions()
 
-    def check_permissions(self):
-        try:
-            # Try to get window title - this requires Accessibility permissions
-            script = 'tell application "System Events" to get name of window 1 of (first application process whose frontmost is true)'
-            subprocess.check_output(['osascript', '-e', script], stderr=subprocess.PIPE)
-            self.has_permissions = True
-            return True
-        except subprocess.CalledProcessError:
+    def get_active_window(self):
+        reply = self.request()
+        if reply is None:
+            return ("Unknown", "Window helper unavailable", False)
+        status, app_name, window_title = reply
+        if status != "ok":
+            # Likely permission error or no window active
             self.has_permissions = False
+            return ("Unknown", "Unknown", False)
+        self.has_permissions = True
+
+        # Filter out our own app wrapper
+        if app_name in OWN_APP_NAMES:
+            return ("FocusWin", "FocusWin", True)
+        return (app_name, window_title, True)
+
+    def request(self, command="active"):
+        """Send one request. Returns (status, app, title), or None if the helper is unavailable."""
+        with self.lock:
+            if self.process is None and not self._start():
+                return None
+            try:
+                self.process.stdin.write(command.encode('utf-8') + b"\n")
+                self.process.stdin.flush()
+                line = self._read_line(time.monotonic() + self.timeout)
+            except (OSError, ValueError) as e:
+                line = None
+                print(f"⚠️ Window helper failed: {e}")
+            if line is None:
+                self._kill()
+                return None
+        fields = line.decode('utf-8', errors='replace').rstrip('\r\n').split('\t')
+        fields += [""] * (3 - len(fields))
+        return fields[0], fields[1], fields[2]
+
+    def _start(self):
+        if time.monotonic() < self.restart_at:
             return False
-        except Exception:
+        try:
+            self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, bufsize=0)
+        except OSError as e:
+            print(f"❌ Could not start window helper: {e}")
+            self._schedule_restart()
             return False
+        self.buffer = b""
+        self.started_at = time.monotonic()
+        return True
 
-    def get_active_window(self):
-        try:
-            # Get App Name
-            script_app = 'tell application "System Events" to get name of (first application process whose frontmost is true)'
-            app_name = subprocess.check_output(['osascript', '-e', script_app], stderr=subprocess.PIPE).decode('utf-8').strip()
-            
-            # Get Window Title
-            script_title = 'tell application "System Events" to get name of window 1 of (first application process whose frontmost is true)'
-            window_title = subprocess.check_output(['osascript', '-e', script_title], stderr=subprocess.PIPE).decode('utf-8').strip()
-            
-            # Filter out our own app wrapper
-            if app_name in ["Python", "antigravity", "AI Study Tracker", "StudyWin", "FocusWin"]:
-                return ("FocusWin", "FocusWin", True)
-
-            return (app_name, window_title, True)
-            
-        except subprocess.CalledProcessError:
-            # Likely permission error or no window active
-            return ("Unknown", "Unknown", False)
-        except Exception as e:
-            print(f"Error getting window: {e}")
-            return ("Unknown", "Error", False)
+    def _read_line(self, deadline):
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self.buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print("⚠️ Window helper timed out - restarting it")
+                return None
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                print("⚠️ Window helper exited - restarting it")
+                return None
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return line
+
+    def _kill(self):
+        if self.process is not None:
+            try:
+                self.process.kill()
+                self.process.wait(timeout=1.0)
+            except Exception:
+                pass
+            for pipe in (self.process.stdin, self.process.stdout):
+                try:
+                    pipe.close()
+                except Exception:
+                    pass
+            self.process = None
+        self._schedule_restart()
+
+    def _schedule_restart(self):
+        # A helper that ran for a while before failing gets a fresh backoff
+        if self.started_at and time.monotonic() - self.started_at > self.max_restart_delay:
+            self.restart_count = 0
+        self.restart_count += 1
+        delay = min(self.max_restart_delay, 0.5 * (2 ** (self.restart_count - 1)))
+        self.restart_at = time.monotonic() + delay
+
+    def close(self):
+        with self.lock:
+            if self.process is not None:
+                try:
+                    self.process.stdin.close()  # EOF asks the helper to exit
+                    self.process.wait(timeout=1.0)
+                except Exception:
+                    pass
+                self._kill()
+
+# JXA helper: answers every stdin line with the frontmost app and its first window title
+MACOS_HELPER_SCRIPT = r"""
+ObjC.import('Foundation');
+function clean(value) { return String(value === null || value === undefined ? '' : value).replace(/[\t\r\n]/g, ' '); }
+function run() {
+    var events = Application('System Events');
+    var input = $.NSFileHandle.fileHandleWithStandardInput;
+    var output = $.NSFileHandle.fileHandleWithStandardOutput;
+    var pending = '';
+    while (true) {
+        var data = input.availableData;
+        if (data.length === 0) { return; }
+        pending += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+        var lines = pending.split('\n');
+        pending = lines.pop();
+        lines.forEach(function () {
+            var reply;
+            try {
+                var process = events.processes.whose({frontmost: true})[0];
+                // Reading the window title requires Accessibility permissions
+                reply = ['ok', process.name(), process.windows[0].name()];
+            } catch (e) {
+                reply = ['denied', '', e.message];
+            }
+            output.writeData($(reply.map(clean).join('\t') + '\n').dataUsingEncoding($.NSUTF8StringEncoding));
+        });
+    }
+}
+"""
+
+class MacOSWindowProvider(CoprocessWindowProvider):
+    """macOS implementation: one persistent osascript (JXA) helper querying System Events"""
+    def __init__(self):
+        super().__init__(['osascript', '-l', 'JavaScript', '-e', MACOS_HELPER_SCRIPT], timeout=2.0)
+        self.check_permissions()
+
+    def check_permissions(self):
+        reply = self.request()
+        self.has_permissions = reply is not None and reply[0] == "ok"
+        return self.has_permissions
 
 class WindowsWindowProvider(WindowProvider):
     """Windows implementation (Placeholder for future)"""
     def get_active_window(self):
         return ("Windows Support", "Coming Soon", True)
 
+class LinuxX11WindowProvider(WindowProvider):
+    """
+    Linux implementation driven by X11 events (python-xlib)
+    A background thread listens for PropertyNotify on the root window's
+    _NET_ACTIVE_WINDOW and on the active window's _NET_WM_NAME/WM_NAME, so
+    get_active_window() only reads the cached result. Under Wayland only
+    XWayland windows are visible.
+    """
+    def __init__(self, display_name=None):
+        self.has_permissions = False
+        self.active = ("Unknown", "No X11 display", False)
+        self.display = None
+        self.window = None  # Active window we are subscribed to
+        self.running = False
+        self.thread = None
+        self.updates = 0  # Number of cache refreshes, for tests and debugging
+        self.changed = threading.Condition()
+        self.listeners = []
+        try:
+            from Xlib import X, Xatom, display, error
+            self.X, self.Xatom, self.Xerror = X, Xatom, error
+            self.display = display.Display(display_name)
+        except ImportError:
+            print("⚠️ python-xlib not installed - window tracking disabled (pip install -r requirements-linux.txt)")
+            return
+        except Exception as e:
+            print(f"⚠️ Could not open X11 display: {e}")
+            return
+
+        self.root = self.display.screen().root
+        self.NET_ACTIVE_WINDOW = self.display.intern_atom('_NET_ACTIVE_WINDOW')
+        self.NET_WM_NAME = self.display.intern_atom('_NET_WM_NAME')
+        self.UTF8_STRING = self.display.intern_atom('UTF8_STRING')
+        self.root.change_attributes(event_mask=self.X.PropertyChangeMask)
+        self.has_permissions = True
+        self._refresh_active()
+
+        self.running = True
+        self.thread = threading.Thread(target=self._event_loop, daemon=True)
+        self.thread.start()
+
+    def get_active_window(self):
+        return self.active
+
+    def subscribe(self, callback):
+        if not self.has_permissions:
+            return False
+        self.listeners.append(callback)
+        return True
+
+    def wait_for_update(self, after, timeout=1.0):
+        """Block until more than `after` refreshes happened. Returns the refresh count."""
+        with self.changed:
+            self.changed.wait_for(lambda: self.updates > after, timeout)
+            return self.updates
+
+    def close(self):
+        self.running = False
+        if self.display is not None:
+            try:
+                self.display.close()
+            except Exception:
+                pass
+
+    def _event_loop(self):
+        while self.running:
+            try:
+                event = self.display.next_event()
+            except Exception as e:
+                if self.running:
+                    print(f"❌ X11 connection lost: {e}")
+                    self._publish(("Unknown", "X11 connection lost", False))
+                return
+            if event.type != self.X.PropertyNotify:
+                continue
+            try:
+                if event.window == self.root and event.atom == self.NET_ACTIVE_WINDOW:
+                    self._refresh_active()
+                elif self.window is not None and event.window == self.window and \
+                        event.atom in (self.NET_WM_NAME, self.Xatom.WM_NAME):
+                    self._publish(self._describe(self.window))
+            except self.Xerror.XError:
+                pass  # The window went away between the event and our read
+
+    def _refresh_active(self):
+        """Follow the new active window: watch its title and cache app + title"""
+        prop = self.root.get_full_property(self.NET_ACTIVE_WINDOW, self.X.AnyPropertyType)
+        window_id = prop.value[0] if prop is not None and len(prop.value) else 0
+        window = self.display.create_resource_object('window', window_id) if window_id else None
+
+        if self.window is not None and self.window != window:
+            self.window.change_attributes(event_mask=self.X.NoEventMask, onerror=lambda *args: None)
+        if window is not None and window != self.window:
+            window.change_attributes(event_mask=self.X.PropertyChangeMask, onerror=lambda *args: None)
+        self.window = window
+        self._publish(self._describe(window) if window is not None else ("Unknown", "No active window", True))
+
+    def _describe(self, window):
+        wm_class = window.get_wm_class()
+        app_name = wm_class[1] if wm_class else "Unknown"
+        if app_name in OWN_APP_NAMES:
+            return ("FocusWin", "FocusWin", True)
+
+        prop = window.get_full_property(self.NET_WM_NAME, self.UTF8_STRING)
+        if prop is not None:
+            title = prop.value
+        else:
+            title = window.get_wm_name() or ""
+        if isinstance(title, bytes):
+            title = title.decode('utf-8', errors='replace')
+        return (app_name, title, True)
+
+    def _publish(self, active):
+        changed = active != self.active
+        self.active = active
+        if changed:
+            for callback in self.listeners:
+                try:
+                    callback(*active)
+                except Exception as e:
+                    print(f"❌ Error in window change listener: {e}")
+        with self.changed:
+            self.updates += 1
+            self.changed.notify_all()
+
 def get_window_provider():
     """Factory function to get the correct provider for the current OS"""
     system = platform.system()
@@ -62,5 +320,7 @@ def get_window_provider():
         return MacOSWindowProvider()
     elif system == "Windows":
         return WindowsWindowProvider()
+    elif system == "Linux":
+        return LinuxX11WindowProvider()
     else:
         raise NotImplementedError(f"OS {system} not supported")
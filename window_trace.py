@@ -0,0 +1,228 @@
+"""
+Window Activity Traces
+Records real window switching to a compact append-only file and replays it
+through FocusDetector without a desktop.
+- Each line is a JSON array [monotonic_ts, app_name, window_title, has_permissions],
+  written only when the active window changes
+- A {"start": ...} line opens every recording session; replay joins sessions
+  without the gaps between them
+
+Record a day of window switching (polls the real provider once per second):
+    python window_trace.py record day.jsonl
+
+Replay it through FocusDetector as fast as possible, one tick per trace second:
+    python window_trace.py replay day.jsonl
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import List, Optional, Tuple
+
+from window_provider import WindowProvider
+
+
+class WindowRecorder:
+    """Appends window changes to a trace file"""
+
+    def __init__(self, path: str, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.last = None
+        self.events = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, 'a', encoding='utf-8')
+        self._write({"start": time.time(), "monotonic": clock()})
+
+    def record(self, app_name: str, window_title: str, has_permissions: bool = True) -> bool:
+        """Log the window if it changed since the last call. Returns True if a line was written."""
+        current = (app_name, window_title, bool(has_permissions))
+        if current == self.last:
+            return False
+        self.last = current
+        self._write([round(self.clock(), 3), *current])
+        self.events += 1
+        return True
+
+    def _write(self, item):
+        # One short line per change, flushed so a crash loses nothing already seen
+        self.file.write(json.dumps(item, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class RecordingWindowProvider(WindowProvider):
+    """Wraps a provider and records every window it reports"""
+
+    def __init__(self, provider: WindowProvider, recorder: WindowRecorder):
+        self.provider = provider
+        self.recorder = recorder
+
+    def get_active_window(self):
+        active = self.provider.get_active_window()
+        self.recorder.record(*active)
+        return active
+
+    def subscribe(self, callback):
+        def record_and_forward(*active):
+            self.recorder.record(*active)
+            callback(*active)
+        return self.provider.subscribe(record_and_forward)
+
+
+def load_trace(path: str) -> List[Tuple[float, str, str, bool]]:
+    """Read a trace as [(seconds since trace start, app, title, has_permissions)], sessions joined"""
+    events = []
+    offset = None  # Maps the current session's monotonic clock onto trace time
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue  # Torn last line of an interrupted recording
+            if isinstance(item, dict):
+                offset = None
+                continue
+            ts, app_name, window_title, has_permissions = item
+            if offset is None:
+                # Sessions follow each other one second apart
+                offset = (events[-1][0] + 1.0 if events else 0.0) - ts
+            events.append((ts + offset, app_name, window_title, bool(has_permissions)))
+    return events
+
+
+class ReplayWindowProvider(WindowProvider):
+    """
+    Replays a trace as a window provider.
+    With a speed, trace time follows the wall clock (1.0 real time, 60.0 one
+    hour per minute) from the first call. With speed=None, trace time only
+    moves through advance(), for deterministic tests and benchmarks.
+    """
+
+    def __init__(self, path_or_events, speed: Optional[float] = 1.0, loop: bool = False):
+        self.events = load_trace(path_or_events) if isinstance(path_or_events, str) else list(path_or_events)
+        self.speed = speed
+        self.loop = loop
+        self.position = 0.0  # Trace time when speed is None
+        self.started = None
+        self.index = 0
+
+    @property
+    def duration(self) -> float:
+        return self.events[-1][0] if self.events else 0.0
+
+    def now(self) -> float:
+        """Current trace time in seconds"""
+        if self.speed is None:
+            return self.position
+        if self.started is None:
+            self.started = time.monotonic()
+        return (time.monotonic() - self.started) * self.speed
+
+    def advance(self, seconds: float):
+        self.position += seconds
+
+    @property
+    def finished(self) -> bool:
+        return not self.loop and self.now() >= self.duration
+
+    def get_active_window(self):
+        if not self.events:
+            return ("Unknown", "Empty trace", False)
+        now = self.now()
+        if self.loop and self.duration > 0:
+            now %= self.duration + 1.0
+        if self.index >= len(self.events) or self.events[self.index][0] > now:
+            self.index = 0  # Looped around (or first call)
+        while self.index + 1 < len(self.events) and self.events[self.index + 1][0] <= now:
+            self.index += 1
+        _, app_name, window_title, has_permissions = self.events[self.index]
+        return (app_name, window_title, has_permissions)
+
+
+def record(args):
+    from window_provider import get_window_provider
+
+    recorder = WindowRecorder(args.trace)
+    provider = RecordingWindowProvider(get_window_provider(), recorder)
+    deadline = time.monotonic() + args.seconds if args.seconds else None
+    print(f"🎥 Recording window changes to {args.trace} (Ctrl+C to stop)")
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            provider.get_active_window()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.close()
+    print(f"✅ Recorded {recorder.events} window changes")
+
+
+def replay(args):
+    from focus_detector import FocusDetector
+
+    try:
+        with open('ai_config.json', 'r') as f:
+            ai_config = json.load(f)
+    except FileNotFoundError:
+        ai_config = {}
+
+    provider = ReplayWindowProvider(args.trace, speed=args.speed)
+    detector = FocusDetector(ai_config, window_provider=provider, clock=provider.now)
+    if args.no_ai:
+        detector.ai_engine.enabled = False
+
+    ticks, states, sources = 0, {}, {}
+    busy = 0.0
+    while not provider.finished:
+        started = time.perf_counter()
+        result = detector.get_focus_state()
+        busy += time.perf_counter() - started
+        ticks += 1
+        states[result['state']] = states.get(result['state'], 0) + 1
+        sources[result['source']] = sources.get(result['source'], 0) + 1
+        if args.speed is None:
+            provider.advance(args.tick)
+        else:
+            time.sleep(args.tick / args.speed)
+
+    cache = detector.get_cache_stats()
+    print(f"\n{len(provider.events)} window changes over {provider.duration / 3600:.2f}h of trace, {ticks} ticks")
+    print(f"Tick cost: {busy / max(1, ticks) * 1e6:.0f} us mean, {ticks / max(busy, 1e-9):.0f} ticks/s")
+    evaluations = detector.get_evaluation_stats()
+    print(f"Re-classified on {evaluations['evaluations']} ticks ({1 - evaluations['reuse_rate']:.1%}), "
+          f"verdict cache hit rate {cache['hit_rate']:.1%}")
+    print(f"Ticks per state: {states}")
+    print(f"Ticks per source: {sources}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay window activity traces")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = sub.add_parser('record', help="Log window changes from this desktop")
+    record_parser.add_argument('trace')
+    record_parser.add_argument('--interval', type=float, default=1.0, help="Seconds between polls")
+    record_parser.add_argument('--seconds', type=float, help="Stop after this long (default: until Ctrl+C)")
+
+    replay_parser = sub.add_parser('replay', help="Run a trace through FocusDetector")
+    replay_parser.add_argument('trace')
+    replay_parser.add_argument('--speed', type=float, help="Replay at N x real time (default: as fast as possible)")
+    replay_parser.add_argument('--tick', type=float, default=1.0, help="Trace seconds between focus checks")
+    replay_parser.add_argument('--no-ai', action='store_true', help="Rules and n-gram model only")
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args)
+    else:
+        replay(args)
+
+
+if __name__ == '__main__':
+    main()